@@ -6,6 +6,22 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import time
+from validation_engine import (
+    ENV_DB_MAP, DATA_COMPARE_MODES, ENCRYPTED_COMPARE_MODES, NON_ENCRYPTED_COMPARE_MODES,
+    SAMPLING_LEVELS, DEFAULT_SAMPLING_LEVEL, MASKING_VALIDATION_STEPS, MASKING_SWEEP_SCOPES, MASKING_NAME_LIMIT,
+    TAG_COVERAGE_PROVIDERS, DEFAULT_MAX_CONCURRENCY, VALIDATION_PROCEDURE_NAME,
+    fetch_validation_tables, count_validation_rows, data_validation_rows, duplicate_validation_rows,
+    ingestion_suite_rows, masking_validation_rows, masking_sweep_rows, masked_content_rows, encryption_validation_rows, non_encryption_validation_rows,
+    register_validation_procedure, environment_matrix_rows, to_environment_database, ingestion_table_versions,
+    fetch_load_watermarks, procedure_tag_references
+)
+from local_store import (
+    catalog_age, invalidate_catalog, refresh_catalog, refresh_catalog_in_background, list_databases, list_schemas,
+    refresh_data_set_index, invalidate_data_set_index, data_set_index,
+    refresh_tag_snapshot, invalidate_tag_snapshot, tag_snapshot,
+    cached_validation_results, store_validation_results, invalidate_validation_cache,
+    validation_watermarks, store_validation_watermarks, invalidate_validation_watermarks
+)
 
 # Page configuration
 st.set_page_config(
@@ -195,14 +211,6 @@ if not session_connected:
     st.error("❌ Could not establish Snowflake connection. Please ensure you're properly connected.")
     st.stop()
 
-# Environment to database mapping
-ENV_DB_MAP = {
-    "DEV": "dev_db_manager",
-    "QA": "qa_db_manager", 
-    "UAT": "uat_db_manager",
-    "PROD": "prod_db_manager"
-}
-
 # Sidebar navigation with icons
 st.sidebar.markdown("### 🎯 ZDQ Navigation")
 page = st.sidebar.radio(
@@ -210,24 +218,43 @@ page = st.sidebar.radio(
     ["🏠 Home", "📊 Data Ingestion DQ", "🎭 Masking DQ", "🔐 Encryption DQ"],
     label_visibility="collapsed"
 )
+execution_target = st.sidebar.radio(
+    "⚙️ Execution",
+    ["In App", "Stored Procedure"],
+    help="Stored Procedure runs the whole validation inside Snowflake and returns one result table"
+)
 
-# Data fetching functions with caching
-@st.cache_data(ttl=300)
-def fetch_list(query):
-    if session:
-        try:
-            return [row['name'] for row in session.sql(query).collect()]
-        except:
-            return []
-    return []
+# Local catalog snapshot older than this is refreshed in the background
+CATALOG_MAX_AGE = 300
+
+if st.sidebar.button("🧹 Clear Result Cache"):
+    invalidate_validation_cache()
+    invalidate_validation_watermarks()
+
+if st.sidebar.button("🔄 Refresh Catalog"):
+    invalidate_catalog()
+    invalidate_data_set_index()
+    invalidate_tag_snapshot()
+
+# Catalog lookups served from the local snapshot
+def ensure_catalog(database=None):
+    """Load the snapshot on first use; once stale, serve it as-is and refresh in the background"""
+    age = catalog_age(database)
+    try:
+        if age is None:
+            refresh_catalog(session, database)
+        elif age > CATALOG_MAX_AGE:
+            refresh_catalog_in_background(session, database)
+    except Exception as e:
+        st.warning(f"⚠️ Could not refresh catalog snapshot: {e}")
 
-@st.cache_data(ttl=300)
 def fetch_databases(environment):
-    return fetch_list("SHOW DATABASES") if session else []
+    ensure_catalog()
+    return list_databases()
 
-@st.cache_data(ttl=300)
 def fetch_schemas(database_name):
-    return fetch_list(f"SHOW SCHEMAS IN DATABASE {database_name}") if session else []
+    ensure_catalog(database_name)
+    return list_schemas(database_name)
 
 @st.cache_data(ttl=300)
 def fetch_source_db_types(environment):
@@ -249,217 +276,271 @@ def fetch_load_groups(environment):
     except:
         return []
 
-def get_source_target_tables(load_group, load_type, source_db_type, environment):
+def fetch_audit_recon_version(environment):
+    """Cheap change marker for audit_recon; new load records produce a new value"""
     db_name = ENV_DB_MAP.get(environment)
-    if not db_name: return [], []
+    query = f"SELECT COUNT(*) AS ROW_COUNT, MAX(ROW_CRE_DT) AS LAST_CRE_DT FROM {db_name}.public.audit_recon"
+    try:
+        row = session.sql(query).collect()[0]
+        return f"{row['ROW_COUNT']}:{row['LAST_CRE_DT']}"
+    except:
+        # Unknown state, never reuse a cached universe
+        return datetime.now().isoformat()
 
-    query_template = lambda db_type: f"""
-        SELECT upper(table_name) as table_name, row_count FROM {db_name}.public.audit_recon
-        WHERE LOAD_GROUP IN ('{load_group}') AND LOAD_TYPE IN ('{load_type}') AND db_type = '{db_type}'
-        QUALIFY ROW_NUMBER() OVER (PARTITION BY TABLE_NAME ORDER BY ROW_CRE_DT) = 1
+@st.cache_data(ttl=3600)
+def get_table_universe(environment, selected_db, selected_schema, load_group, load_type, recon_version):
+    """Base tables of a schema with audit_recon entries for the load group and load type.
+
+    recon_version is only part of the cache key, so new audit_recon rows invalidate the entry.
     """
+    return fetch_validation_tables(session, environment, selected_db, selected_schema, load_group, load_type)
 
-    try:
-        source_result = session.sql(query_template(source_db_type)).collect() if session else []
-        target_result = session.sql(query_template('SNOWFLAKE')).collect() if session else []
+def resolve_validation_tables(environment, selected_db, selected_schema, load_group, load_type):
+    """(schema, table) pairs shared by every ingestion rule"""
+    recon_version = fetch_audit_recon_version(environment)
+    return get_table_universe(environment, selected_db, selected_schema, load_group, load_type, recon_version)
 
-        source_tables = [{'table_name': r['TABLE_NAME'], 'row_count': r['ROW_COUNT']} for r in source_result]
-        target_tables = [{'table_name': r['TABLE_NAME'], 'row_count': r['ROW_COUNT']} for r in target_result]
+@st.cache_resource
+def get_validation_procedure():
+    """Register the validation stored procedure once per session"""
+    return register_validation_procedure(session)
 
-        source_tables.sort(key=lambda x: x['table_name'])
-        target_tables.sort(key=lambda x: x['table_name'])
+def run_validation_in_snowflake(rule, params):
+    """Run a whole validation as a stored procedure and fetch its single result table"""
+    with st.spinner("🔄 Running validation inside Snowflake..."):
+        try:
+            procedure_name = get_validation_procedure()
+            return session.call(procedure_name, rule, params).to_pandas()
+        except Exception as e:
+            st.error(f"❌ Error running {VALIDATION_PROCEDURE_NAME}: {e}")
+            return pd.DataFrame([])
 
-        return source_tables, target_tables
-    except Exception as e:
-        st.error(f"Error fetching tables: {e}")
-        return [], []
+def run_environment_matrix(rule, params):
+    """Run one rule in DEV, QA, UAT and PROD at the same time and merge the results"""
+    run_rule = None
+    if execution_target == "Stored Procedure":
+        procedure_name = get_validation_procedure()
+
+        def call_procedure(rule_session, rule_name, rule_params):
+            return rule_session.call(procedure_name, rule_name, rule_params).to_pandas().to_dict("records")
+        run_rule = call_procedure
+
+    with st.spinner(f"🔄 Running {rule.lower()} across {', '.join(ENV_DB_MAP)}..."):
+        progress_bar = st.progress(0)
+        # Every environment gets its own worker sharing the active session, which is
+        # thread-safe from snowflake-snowpark-python 1.24 (the minimum in requirements.txt)
+        rows = environment_matrix_rows({environment: session for environment in ENV_DB_MAP}, rule, params,
+                                       run_rule=run_rule, on_progress=progress_bar.progress, on_warning=st.warning)
+        progress_bar.empty()
+    return pd.DataFrame(rows)
+
+def environment_matrix(results_df, index_columns):
+    """Pivot merged results into one row per object with a ✅/❌ column per environment"""
+    if not set(index_columns) <= set(results_df.columns):
+        return pd.DataFrame(columns=index_columns)
+
+    # Rows of a failed environment carry no object and only show in the detailed results
+    cells = results_df.dropna(subset=index_columns)
+    cells = cells.assign(Result=["✅" if test_case == "SUCCESS" else "❌" for test_case in cells["Test Case"]])
+    matrix = cells.pivot_table(index=index_columns, columns="Environment", values="Result", aggfunc="first")
+    return matrix.reindex(columns=[environment for environment in ENV_DB_MAP if environment in matrix.columns]).reset_index()
 
 def run_count_validation(selected_load_group, load_type, source_db_type, environment):
     with st.spinner("🔄 Running count validation..."):
-        s_list, t_list = get_source_target_tables(selected_load_group, load_type, source_db_type, environment)
-        max_len = max(len(s_list), len(t_list))
-        rows = []
-
-        for i in range(max_len):
-            s = s_list[i] if i < len(s_list) else {'table_name': 'N/A', 'row_count': 0}
-            t = t_list[i] if i < len(t_list) else {'table_name': 'N/A', 'row_count': 0}
-            test_result = "SUCCESS" if s['row_count'] == t['row_count'] else "FAILURE"
-
-            detail_msg = ""
-            if test_result == "FAILURE":
-                if s['row_count'] > t['row_count']:
-                    detail_msg = "Source count is greater than target count"
-                elif t['row_count'] > s['row_count']:
-                    detail_msg = "Target count is greater than source count"
-
-            rows.append({
-                "Load Type": load_type,
-                "Load Group": selected_load_group,
-                "Environment": environment,
-                "SOURCE_TABLE": s['table_name'],
-                "SOURCE_ROWS": s['row_count'],
-                "TARGET_TABLE": t['table_name'],
-                "TARGET_ROWS": t['row_count'],
-                "Test Case": test_result,
-                "Details": detail_msg
-            })
+        try:
+            rows = count_validation_rows(session, selected_load_group, load_type, source_db_type, environment)
+        except Exception as e:
+            st.error(f"Error fetching tables: {e}")
+            rows = []
 
         df = pd.DataFrame(rows)
         return df
 
-def run_data_validation(selected_db, selected_schema, load_type, selected_load_group, environment):
-    with st.spinner("🔄 Running data validation..."):
-        query_tables = f"""
-            SELECT DISTINCT TABLE_SCHEMA, TABLE_NAME
-            FROM {selected_db}.INFORMATION_SCHEMA.COLUMNS
-            WHERE TABLE_SCHEMA = '{selected_schema}'
-            AND TABLE_NAME IN (
-                SELECT DISTINCT UPPER(TABLE_NAME)
-                FROM {ENV_DB_MAP[environment]}.public.audit_recon
-                WHERE LOAD_GROUP IN ('{selected_load_group}')
-                AND LOAD_TYPE IN ('{load_type}')
-            )
-            AND COLUMN_NAME NOT LIKE 'ROW_%'
-            AND COLUMN_NAME NOT LIKE 'RAW_%'
-        """
+def run_with_result_cache(rule, tables, selected_db, load_type, selected_load_group, environment, run_tables,
+                          use_cache=True):
+    """Serve tables unchanged since their last validation from the local result cache and run the rest.
+
+    run_tables validates a list of tables and returns their rows; every row gains a From Cache column.
+    """
+    versions = ingestion_table_versions(session, tables, selected_db, environment)
+    cached = {}
+    if use_cache:
+        cached = cached_validation_results(rule, {
+            (target, source): version for target, source, version in versions.values() if version
+        })
+    hits = {
+        table_key: cached[versions[table_key][:2]]
+        for table_key in tables if table_key in versions and versions[table_key][:2] in cached
+    }
+    if hits:
+        st.info(f"⚡ {len(hits)} of {len(tables)} tables unchanged since their last validation - served from cache")
 
+    fresh_rows = run_tables([table_key for table_key in tables if table_key not in hits])
+
+    # Errors are reported as -1 counts and are never cached
+    store_validation_results(rule, [
+        versions[(row['Schema'], row['Table'])] + (row,)
+        for row in fresh_rows
+        if versions.get((row['Schema'], row['Table']), (None, None, None))[2] and -1 not in row.values()
+    ])
+
+    rows = {(row['Schema'], row['Table']): dict(row, **{"From Cache": "No"}) for row in fresh_rows}
+    for table_key, row in hits.items():
+        rows[table_key] = dict(row, **{"Load Type": load_type, "Load Group": selected_load_group, "From Cache": "Yes"})
+    return [rows[table_key] for table_key in tables if table_key in rows]
+
+def incremental_tables(rule, tables, selected_db, load_type, selected_load_group, environment, incremental=False):
+    """Tables to validate and the current audit_recon load of every table.
+
+    In incremental mode a table is skipped when its latest audit_recon load is the one it
+    last passed the rule at; tables that failed or were never validated always run.
+    """
+    try:
+        loads = fetch_load_watermarks(session, environment, selected_load_group, load_type)
+    except Exception as e:
+        st.warning(f"⚠️ Could not read audit_recon watermarks, validating every table: {e}")
+        return tables, {}
+
+    if not incremental:
+        return tables, loads
+
+    passed = validation_watermarks(environment, rule, selected_db, selected_load_group, load_type)
+    skipped = [table_key for table_key in tables
+               if loads.get(table_key[1]) is not None and passed.get(table_key) == loads[table_key[1]]]
+    changed = [table_key for table_key in tables if table_key not in skipped]
+
+    col1, col2 = st.columns(2)
+    col1.metric("🔁 Validated (new loads)", len(changed))
+    col2.metric("⏭️ Skipped (unchanged)", len(skipped))
+    if skipped:
+        with st.expander(f"⏭️ {len(skipped)} table(s) skipped - no audit_recon load since their last successful validation"):
+            st.dataframe(pd.DataFrame(skipped, columns=["Schema", "Table"]), use_container_width=True)
+    return changed, loads
+
+def record_watermarks(rule, rows, selected_db, load_type, selected_load_group, environment, loads):
+    """Advance the watermark of every table that passed to its latest audit_recon load"""
+    store_validation_watermarks(environment, rule, selected_db, selected_load_group, load_type, [
+        (row['Schema'], row['Table'], loads[row['Table']])
+        for row in rows if row['Test Case'] == "SUCCESS" and loads.get(row['Table']) is not None
+    ])
+
+def record_cdc_high_water(rows, selected_db, load_type, selected_load_group, environment):
+    """Start the next CDC window of every table that passed at the newest change it saw.
+
+    Only values that parse as timestamps are kept, so a missing high water never becomes a window start.
+    """
+    store_validation_watermarks(environment, "CDC WINDOW", selected_db, selected_load_group, load_type, [
+        (row['Schema'], row['Table'], str(row['High Water']))
+        for row in rows
+        if row['Test Case'] == "SUCCESS" and pd.notna(pd.to_datetime(row.get('High Water'), errors="coerce"))
+    ])
+
+def run_data_validation(selected_db, selected_schema, load_type, selected_load_group, environment,
+                        max_concurrency=DEFAULT_MAX_CONCURRENCY, compare_mode="MINUS DIFF", use_cache=True,
+                        incremental=False):
+    with st.spinner("🔄 Running data validation..."):
         try:
-            tables_df = session.sql(query_tables).to_pandas()
-            if tables_df.empty:
+            tables = resolve_validation_tables(environment, selected_db, selected_schema, selected_load_group, load_type)
+            if not tables:
                 st.info("ℹ️ No tables found for the given criteria.")
                 return pd.DataFrame([])
 
-            results = []
-            env_datalake_map = {
-                "DEV": "dev_datalake",
-                "QA": "qa_datalake",
-                "UAT": "uat_datalake",
-                "PROD": "prod_datalake"
-            }
+            tables, loads = incremental_tables("DATA VALIDATION", tables, selected_db, load_type, selected_load_group,
+                                               environment, incremental)
+            if not tables:
+                st.success("✅ No table has new loads since its last successful validation.")
+                return pd.DataFrame([])
 
-            progress_bar = st.progress(0)
-            for idx, (_, row) in enumerate(tables_df.iterrows()):
-                schema_name = row['TABLE_SCHEMA']
-                table_name = row['TABLE_NAME']
-                
-                progress_bar.progress((idx + 1) / len(tables_df))
-
-                source_db_name = env_datalake_map.get(environment, f"{selected_db}_RAW")
-
-                try:
-                    # Target vs View
-                    target_vs_view_query = f"""
-                        SELECT COUNT(*) AS DIFF_COUNT FROM (
-                            SELECT * EXCLUDE (ROW_CRE_DT, ROW_MOD_DT, ROW_CRE_USR_ID, ROW_MOD_USR_ID, RAW_ROW_CRE_DT)
-                            FROM {selected_db}.{schema_name}.{table_name}
-                            MINUS
-                            SELECT DISTINCT * EXCLUDE (RAW_ROW_CRE_DT)
-                            FROM {source_db_name}.{schema_name}.VW_RAW_{table_name}
-                        )
-                    """
-                    t2v_result = session.sql(target_vs_view_query).collect()
-                    t2v_diff = t2v_result[0]['DIFF_COUNT'] if t2v_result else 0
-
-                    # View vs Target
-                    view_vs_target_query = f"""
-                        SELECT COUNT(*) AS DIFF_COUNT FROM (
-                            SELECT DISTINCT * EXCLUDE (RAW_ROW_CRE_DT)
-                            FROM {source_db_name}.{schema_name}.VW_RAW_{table_name}
-                            MINUS
-                            SELECT * EXCLUDE (ROW_CRE_DT, ROW_MOD_DT, ROW_CRE_USR_ID, ROW_MOD_USR_ID, RAW_ROW_CRE_DT)
-                            FROM {selected_db}.{schema_name}.{table_name}
-                        )
-                    """
-                    v2t_result = session.sql(view_vs_target_query).collect()
-                    v2t_diff = v2t_result[0]['DIFF_COUNT'] if v2t_result else 0
-
-                except Exception as e:
-                    st.warning(f"⚠️ Error comparing {schema_name}.{table_name}: {e}")
-                    t2v_diff = v2t_diff = -1
-
-                test_case_result = "SUCCESS" if t2v_diff == 0 and v2t_diff == 0 else "FAILURE"
-
-                results.append({
-                    "Load Type": load_type,
-                    "Load Group": selected_load_group,
-                    "Environment": environment,
-                    "Database": selected_db,
-                    "Schema": schema_name,
-                    "Table": table_name,
-                    "TARGET VS VIEW": t2v_diff,
-                    "VIEW VS TARGET": v2t_diff,
-                    "Test Case": test_case_result
-                })
+            cdc_since = None
+            if compare_mode == "CDC WINDOW":
+                cdc_since = validation_watermarks(environment, "CDC WINDOW", selected_db, selected_load_group, load_type)
 
+            progress_bar = st.progress(0)
+            on_row, clear_live = live_results_view()
+
+            def run_tables(changed_tables):
+                return data_validation_rows(session, changed_tables, selected_db, load_type, selected_load_group,
+                                            environment, max_concurrency, compare_mode, cdc_since,
+                                            on_progress=progress_bar.progress, on_warning=st.warning, on_row=on_row)
+
+            # A CDC row only covers one change window, so it never feeds the full-table cache or watermarks
+            if compare_mode == "CDC WINDOW":
+                results = run_tables(tables)
+            else:
+                results = run_with_result_cache("DATA VALIDATION", tables, selected_db, load_type, selected_load_group,
+                                                environment, run_tables, use_cache)
             progress_bar.empty()
+            clear_live()
+            if compare_mode == "CDC WINDOW":
+                record_cdc_high_water(results, selected_db, load_type, selected_load_group, environment)
+            else:
+                record_watermarks("DATA VALIDATION", results, selected_db, load_type, selected_load_group, environment, loads)
             return pd.DataFrame(results)
         except Exception as e:
             st.error(f"❌ Error during data validation: {e}")
             return pd.DataFrame([])
 
-def run_duplicate_validation(selected_db, selected_schema, load_type, selected_load_group, environment):
+def run_duplicate_validation(selected_db, selected_schema, load_type, selected_load_group, environment, use_cache=True,
+                             incremental=False):
     with st.spinner("🔄 Running duplicate validation..."):
-        query_tables = f"""
-            SELECT DISTINCT TABLE_SCHEMA, TABLE_NAME
-            FROM {selected_db}.INFORMATION_SCHEMA.COLUMNS
-            WHERE TABLE_SCHEMA = '{selected_schema}'
-            AND TABLE_NAME IN (
-                SELECT DISTINCT UPPER(TABLE_NAME)
-                FROM {ENV_DB_MAP[environment]}.public.audit_recon
-                WHERE LOAD_GROUP IN ('{selected_load_group}')
-                AND LOAD_TYPE IN ('{load_type}')
-            )
-            AND COLUMN_NAME NOT LIKE 'ROW_%'
-            AND COLUMN_NAME NOT LIKE 'RAW_%'
-        """
-
         try:
-            tables_df = session.sql(query_tables).to_pandas()
-            if tables_df.empty:
+            tables = resolve_validation_tables(environment, selected_db, selected_schema, selected_load_group, load_type)
+            if not tables:
                 st.info("ℹ️ No tables found for the given criteria.")
                 return pd.DataFrame([])
 
-            results = []
+            tables, loads = incremental_tables("DUPLICATE VALIDATION", tables, selected_db, load_type, selected_load_group,
+                                               environment, incremental)
+            if not tables:
+                st.success("✅ No table has new loads since its last successful validation.")
+                return pd.DataFrame([])
+
             progress_bar = st.progress(0)
+            on_row, clear_live = live_results_view()
+            results = run_with_result_cache(
+                "DUPLICATE VALIDATION", tables, selected_db, load_type, selected_load_group, environment,
+                lambda changed_tables: duplicate_validation_rows(session, changed_tables, selected_db, load_type,
+                                                                 selected_load_group, environment,
+                                                                 on_progress=progress_bar.progress, on_warning=st.warning,
+                                                                 on_row=on_row),
+                use_cache
+            )
+            progress_bar.empty()
+            clear_live()
+            record_watermarks("DUPLICATE VALIDATION", results, selected_db, load_type, selected_load_group, environment, loads)
+            return pd.DataFrame(results)
+        except Exception as e:
+            st.error(f"❌ Error during duplicate validation: {e}")
+            return pd.DataFrame([])
 
-            for idx, (_, row) in enumerate(tables_df.iterrows()):
-                schema_name = row['TABLE_SCHEMA']
-                table_name = row['TABLE_NAME']
-                
-                progress_bar.progress((idx + 1) / len(tables_df))
-
-                try:
-                    dup_query = f"""
-                        SELECT COUNT(*) AS DUP_COUNT FROM (
-                            SELECT * EXCLUDE (ROW_CRE_DT, ROW_MOD_DT, ROW_CRE_USR_ID, ROW_MOD_USR_ID, RAW_ROW_CRE_DT)
-                            FROM {selected_db}.{schema_name}.{table_name}
-                            GROUP BY ALL
-                            HAVING COUNT(*) > 1
-                        )
-                    """
-                    result = session.sql(dup_query).collect()
-                    dup_count = result[0]['DUP_COUNT'] if result else 0
-                    test_case_result = "SUCCESS" if dup_count == 0 else "FAILURE"
-                except Exception as e:
-                    st.warning(f"⚠️ Error checking duplicates in {schema_name}.{table_name}: {e}")
-                    dup_count = -1
-                    test_case_result = "FAILURE"
-
-                results.append({
-                    "Load Type": load_type,
-                    "Load Group": selected_load_group,
-                    "Environment": environment,
-                    "Database": selected_db,
-                    "Schema": schema_name,
-                    "Table": table_name,
-                    "DUP COUNT": dup_count,
-                    "Test Case": test_case_result
-                })
+def run_ingestion_suite(selected_db, selected_schema, load_type, selected_load_group, environment, source_db_type,
+                        max_concurrency=DEFAULT_MAX_CONCURRENCY, incremental=False):
+    """Run Count, Data and Duplicate validation together, one row per table"""
+    with st.spinner("🔄 Running all ingestion rules..."):
+        try:
+            tables = resolve_validation_tables(environment, selected_db, selected_schema, selected_load_group, load_type)
+            if not tables:
+                st.info("ℹ️ No tables found for the given criteria.")
+                return pd.DataFrame([])
+
+            # Skipped tables still exist in the target; only the rest of audit_recon is reported missing
+            known_tables = tables
+            tables, loads = incremental_tables("ALL INGESTION RULES", tables, selected_db, load_type, selected_load_group,
+                                               environment, incremental)
 
+            progress_bar = st.progress(0)
+            on_row, clear_live = live_results_view()
+            results = ingestion_suite_rows(session, tables, selected_db, load_type, selected_load_group, environment,
+                                           source_db_type, max_concurrency, selected_schema, known_tables,
+                                           on_progress=progress_bar.progress, on_warning=st.warning, on_row=on_row)
             progress_bar.empty()
+            clear_live()
+            if not results:
+                st.success("✅ No table has new loads since its last successful validation.")
+            record_watermarks("ALL INGESTION RULES", results, selected_db, load_type, selected_load_group, environment, loads)
             return pd.DataFrame(results)
         except Exception as e:
-            st.error(f"❌ Error during duplicate validation: {e}")
+            st.error(f"❌ Error during ingestion suite: {e}")
             return pd.DataFrame([])
 
 def style_dataframe(df):
@@ -566,6 +647,48 @@ def display_summary_metrics(df):
         </div>
         """, unsafe_allow_html=True)
 
+# Seconds between redraws of the live results while a validation runs
+LIVE_REFRESH_INTERVAL = 1.0
+
+def live_results_view():
+    """Placeholders that show summary metrics and failures while a validation is still running.
+
+    Returns (on_row, clear): pass on_row to the engine, call clear once the final results are shown.
+    """
+    rows = []
+    failures_table = [None]
+    failure_count = [0]
+    last_render = [0.0]
+    metrics_slot, caption_slot, failures_slot = st.empty(), st.empty(), st.empty()
+
+    def render():
+        last_render[0] = time.time()
+        with metrics_slot.container():
+            display_summary_metrics(pd.DataFrame(rows))
+        if failure_count[0]:
+            caption_slot.caption(f"❌ {failure_count[0]} failure(s) so far - export them now from the table toolbar")
+
+    def on_row(row):
+        rows.append(row)
+        # Failures are appended to the table as they arrive instead of re-sending it;
+        # the metrics are redrawn for the first failure and then at most once per interval
+        if row.get('Test Case') == 'FAILURE':
+            failure_count[0] += 1
+            if failures_table[0] is None:
+                failures_table[0] = failures_slot.dataframe(pd.DataFrame([row]), use_container_width=True)
+                render()
+                return
+            failures_table[0].add_rows(pd.DataFrame([row]))
+        if time.time() - last_render[0] >= LIVE_REFRESH_INTERVAL:
+            render()
+
+    def clear():
+        metrics_slot.empty()
+        caption_slot.empty()
+        failures_slot.empty()
+
+    return on_row, clear
+
 # Initialize session state
 if 'load_group' not in st.session_state:
     st.session_state['load_group'] = None
@@ -634,7 +757,7 @@ elif page == "📊 Data Ingestion DQ":
     with col1:
         environment = st.selectbox("🌍 Environment", ["DEV", "QA", "UAT", "PROD"])
     with col2:
-        rules = ["COUNT VALIDATION", "DATA VALIDATION", "DUPLICATE VALIDATION"]
+        rules = ["COUNT VALIDATION", "DATA VALIDATION", "DUPLICATE VALIDATION", "ALL INGESTION RULES"]
         dq_rule = st.selectbox("📋 Validation Rule", rules)
     with col3:
         source_db_types = fetch_source_db_types(environment)
@@ -655,6 +778,29 @@ elif page == "📊 Data Ingestion DQ":
     with col6:
         load_type_input = st.text_input("⚡ Load Type", "")
 
+    max_concurrency = DEFAULT_MAX_CONCURRENCY
+    compare_mode = DATA_COMPARE_MODES[0]
+    if dq_rule in ("DATA VALIDATION", "ALL INGESTION RULES"):
+        col7, col8 = st.columns([1, 1])
+        with col7:
+            if dq_rule == "DATA VALIDATION":
+                compare_mode = st.selectbox("🧮 Comparison Mode", DATA_COMPARE_MODES,
+                                            help="CDC WINDOW compares only rows whose _SNOWFLAKE_UPDATED_AT is newer "
+                                                 "than each table's last successful CDC validation")
+        with col8:
+            max_concurrency = st.slider("⚙️ Max Concurrent Queries", min_value=1, max_value=32,
+                                        value=DEFAULT_MAX_CONCURRENCY)
+
+    use_cache = incremental = False
+    if dq_rule in ("DATA VALIDATION", "DUPLICATE VALIDATION") and execution_target == "In App":
+        use_cache = st.checkbox("⚡ Reuse results for unchanged tables", value=True,
+                                help="Tables whose target, raw view and raw table metadata are unchanged since "
+                                     "their last validation are served from the local result cache")
+    if dq_rule != "COUNT VALIDATION" and execution_target == "In App":
+        incremental = st.checkbox("🔁 Incremental - only tables with new audit_recon loads",
+                                  help="Skips tables whose latest audit_recon load is the one they last passed "
+                                       "this rule at; failed and never-validated tables always run")
+
     load_groups = fetch_load_groups(environment)
     if st.session_state['load_group'] is None and load_groups:
         st.session_state['load_group'] = load_groups[0]
@@ -676,7 +822,40 @@ elif page == "📊 Data Ingestion DQ":
         else:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             
-            if dq_rule == "COUNT VALIDATION":
+            if execution_target == "Stored Procedure":
+                if dq_rule != "COUNT VALIDATION" and not selected_schema:
+                    st.error("❌ Please select a schema.")
+                else:
+                    df = run_validation_in_snowflake(dq_rule, {
+                        "environment": environment,
+                        "database": selected_db,
+                        "schema": selected_schema,
+                        "load_group": selected_load_group,
+                        "load_type": load_type_input.strip(),
+                        "source_db_type": source_db_type,
+                        "compare_mode": compare_mode,
+                        "cdc_since": [[schema_name, table_name, since] for (schema_name, table_name), since
+                                      in validation_watermarks(environment, "CDC WINDOW", selected_db,
+                                                               selected_load_group, load_type_input.strip()).items()]
+                                     if dq_rule == "DATA VALIDATION" and compare_mode == "CDC WINDOW" else [],
+                        "max_concurrency": max_concurrency
+                    })
+                    if dq_rule == "DATA VALIDATION" and compare_mode == "CDC WINDOW" and not df.empty:
+                        record_cdc_high_water(df.to_dict('records'), selected_db, load_type_input.strip(),
+                                              selected_load_group, environment)
+                    if not df.empty:
+                        st.markdown('<h3 class="sub-header">📈 Validation Results</h3>', unsafe_allow_html=True)
+                        display_summary_metrics(df)
+                        
+                        st.markdown("### 📋 Detailed Results")
+                        styled_df = style_dataframe(df)
+                        st.dataframe(styled_df, use_container_width=True)
+                        
+                        csv_data = df.to_csv(index=False).encode('utf-8')
+                        st.download_button("📥 Download Results", data=csv_data,
+                                         file_name=f"{dq_rule.lower().replace(' ', '_')}_{timestamp}.csv", mime="text/csv")
+
+            elif dq_rule == "COUNT VALIDATION":
                 df = run_count_validation(selected_load_group, load_type_input.strip(), source_db_type, environment)
                 if not df.empty:
                     st.markdown('<h3 class="sub-header">📈 Validation Results</h3>', unsafe_allow_html=True)
@@ -694,7 +873,8 @@ elif page == "📊 Data Ingestion DQ":
                 if not selected_schema:
                     st.error("❌ Please select a schema.")
                 else:
-                    df = run_data_validation(selected_db, selected_schema, load_type_input.strip(), selected_load_group, environment)
+                    df = run_data_validation(selected_db, selected_schema, load_type_input.strip(), selected_load_group, environment,
+                                             max_concurrency, compare_mode, use_cache, incremental)
                     if not df.empty:
                         st.markdown('<h3 class="sub-header">📈 Validation Results</h3>', unsafe_allow_html=True)
                         display_summary_metrics(df)
@@ -711,7 +891,8 @@ elif page == "📊 Data Ingestion DQ":
                 if not selected_schema:
                     st.error("❌ Please select a schema.")
                 else:
-                    df = run_duplicate_validation(selected_db, selected_schema, load_type_input.strip(), selected_load_group, environment)
+                    df = run_duplicate_validation(selected_db, selected_schema, load_type_input.strip(), selected_load_group, environment,
+                                                  use_cache, incremental)
                     if not df.empty:
                         st.markdown('<h3 class="sub-header">📈 Validation Results</h3>', unsafe_allow_html=True)
                         display_summary_metrics(df)
@@ -724,32 +905,34 @@ elif page == "📊 Data Ingestion DQ":
                         st.download_button("📥 Download Results", data=csv_data,
                                          file_name=f"duplicate_validation_{timestamp}.csv", mime="text/csv")
 
+            elif dq_rule == "ALL INGESTION RULES":
+                if not selected_schema:
+                    st.error("❌ Please select a schema.")
+                else:
+                    df = run_ingestion_suite(selected_db, selected_schema, load_type_input.strip(), selected_load_group,
+                                             environment, source_db_type, max_concurrency, incremental)
+                    if not df.empty:
+                        st.markdown('<h3 class="sub-header">📈 Validation Results</h3>', unsafe_allow_html=True)
+                        display_summary_metrics(df)
+                        
+                        st.markdown("### 📋 Detailed Results")
+                        styled_df = style_dataframe(df)
+                        st.dataframe(styled_df, use_container_width=True)
+                        
+                        csv_data = df.to_csv(index=False).encode('utf-8')
+                        st.download_button("📥 Download Results", data=csv_data,
+                                         file_name=f"ingestion_suite_{timestamp}.csv", mime="text/csv")
+
 elif page == "🎭 Masking DQ":
     st.markdown('<h1 class="main-header">🎭 Data Masking Quality</h1>', unsafe_allow_html=True)
     
     # Masking DQ functions
-    @st.cache_data(ttl=300)
     def get_databases(env_prefix):
-        db_prefix = f"{env_prefix}_"
-        db_query = f"""
-            SELECT DATABASE_NAME 
-            FROM INFORMATION_SCHEMA.DATABASES 
-            WHERE DATABASE_NAME LIKE '{db_prefix}%'
-        """
-        try:
-            rows = session.sql(db_query).collect()
-            return [row[0] for row in rows]
-        except:
-            return []
+        ensure_catalog()
+        return list_databases(prefix=f"{env_prefix}_")
 
-    @st.cache_data(ttl=300)
     def get_schemas(database):
-        schema_query = f"SELECT SCHEMA_NAME FROM {database}.INFORMATION_SCHEMA.SCHEMATA"
-        try:
-            rows = session.sql(schema_query).collect()
-            return [row[0] for row in rows]
-        except:
-            return []
+        return fetch_schemas(database)
 
     @st.cache_data(ttl=300)
     def get_classification_owners(env):
@@ -763,159 +946,63 @@ elif page == "🎭 Masking DQ":
         except:
             return []
 
-    def execute_validation_queries_tags(env, selected_database, selected_schema, classification_owner):
-        try:
-            production_database = selected_database.replace("DEV_", "PROD_").replace("QA_", "PROD_").replace("UAT_", "PROD_")
-            source_tags_query = f"""
-            SELECT COUNT(*) AS total_records
-            FROM {env}_DB_MANAGER.MASKING.CLASSIFICATION_DETAILS
-            WHERE "DATABASE" = '{production_database}'
-              AND "SCHEMA" = '{selected_schema}'
-              AND CLASSIFICATION_OWNER = '{classification_owner}'
-            """
-            target_tags_query = f"""
-            SELECT COUNT(*) AS TAG_COUNT
-            FROM {env}_DB_MANAGER.ACCOUNT_USAGE.TAG_REFERENCES
-            WHERE OBJECT_DATABASE = '{selected_database}_MASKED'
-              AND OBJECT_SCHEMA = '{selected_schema}'
-            """
-            source_count = session.sql(source_tags_query).collect()[0][0]
-            target_count = session.sql(target_tags_query).collect()[0][0]
-            return source_count, target_count
-        except Exception as e:
-            return None, str(e)
-
-    def execute_validation_queries_tables(env, selected_database, selected_schema):
-        try:
-            db_manager = f"{env}_DB_MANAGER"
-            count_tables_query = f"""
-            SELECT COUNT(TABLE_NAME) 
-            FROM {selected_database}.INFORMATION_SCHEMA.TABLES 
-            WHERE TABLE_CATALOG = '{selected_database}'
-              AND TABLE_SCHEMA = '{selected_schema}'
-              AND TABLE_TYPE = 'BASE TABLE'
-              AND TABLE_NAME NOT LIKE 'RAW_%'
-              AND TABLE_NAME NOT LIKE 'VW_%'
-            """
-            validation_query = f"""
-            SELECT COUNT(*) AS TABLE_COUNT
-            FROM {db_manager}.MASKING.MD_TABLE t
-            JOIN {db_manager}.MASKING.MD_SCHEMA s ON t.SCHEMA_ID = s.SCHEMA_ID
-            JOIN {db_manager}.MASKING.MD_DATABASE d ON s.DATABASE_ID = d.DATABASE_ID
-            WHERE d.DATABASE_NAME = '{selected_database}'
-              AND s.SCHEMA_NAME = '{selected_schema}'
-            """
-            table_count = session.sql(count_tables_query).collect()[0][0]
-            validation_count = session.sql(validation_query).collect()[0][0]
-            return table_count, validation_count
-        except Exception as e:
-            return None, str(e)
-
-    def execute_validation_queries_columns(env, selected_database, selected_schema):
-        try:
-            db_manager = f"{env}_DB_MANAGER"
-            count_columns_query = f"""
-            SELECT COUNT(c.COLUMN_NAME) AS COLUMN_COUNT
-            FROM {selected_database}.INFORMATION_SCHEMA.COLUMNS c
-            JOIN {selected_database}.INFORMATION_SCHEMA.TABLES t
-              ON c.TABLE_SCHEMA = t.TABLE_SCHEMA AND c.TABLE_NAME = t.TABLE_NAME
-            WHERE c.TABLE_SCHEMA = '{selected_schema}'
-              AND t.TABLE_TYPE = 'BASE TABLE'
-              AND c.TABLE_NAME NOT LIKE 'RAW_%'
-              AND c.TABLE_NAME NOT LIKE 'VW_%'
-            """
-            validation_query = f"""
-            SELECT COUNT(col.COLUMN_ID) AS COLUMN_COUNT
-            FROM {db_manager}.MASKING.MD_DATABASE db
-            JOIN {db_manager}.MASKING.MD_SCHEMA sc ON db.DATABASE_ID = sc.DATABASE_ID
-            JOIN {db_manager}.MASKING.MD_TABLE tb ON sc.SCHEMA_ID = tb.SCHEMA_ID
-            JOIN {db_manager}.MASKING.MD_COLUMN col ON tb.TABLE_ID = col.TABLE_ID
-            WHERE db.database_name='{selected_database}'
-              AND sc.schema_name='{selected_schema}'
-              AND db.IS_ACTIVE = TRUE
-              AND sc.IS_ACTIVE = TRUE
-              AND tb.IS_ACTIVE = TRUE
-              AND col.IS_ACTIVE = TRUE
-            """
-            column_count = session.sql(count_columns_query).collect()[0][0]
-            validation_count = session.sql(validation_query).collect()[0][0]
-            return column_count, validation_count
-        except Exception as e:
-            return None, str(e)
-
-    def execute_validation_queries_views(env, selected_database, selected_schema):
+    def get_data_set_index(env, databases):
+        """Latest DATA_SET output per schema from the local index, topped up with outputs written since the last run"""
         try:
-            count_tables_query = f"""
-            SELECT COUNT(TABLE_NAME) 
-            FROM {selected_database}.INFORMATION_SCHEMA.TABLES 
-            WHERE TABLE_CATALOG = '{selected_database}'
-              AND TABLE_SCHEMA = '{selected_schema}'
-              AND TABLE_TYPE = 'BASE TABLE'
-              AND TABLE_NAME NOT LIKE 'RAW_%'
-              AND TABLE_NAME NOT LIKE 'VW_%'
-            """
-            count_target_query = f"""
-            SELECT COUNT(TABLE_NAME) 
-            FROM {selected_database}_MASKED.INFORMATION_SCHEMA.VIEWS
-            WHERE TABLE_SCHEMA = '{selected_schema}'
-            """
-            table_count = session.sql(count_tables_query).collect()[0][0]
-            validation_count = session.sql(count_target_query).collect()[0][0]
-            return table_count, validation_count
+            refresh_data_set_index(session, env)
         except Exception as e:
-            return None, str(e)
-
-    def execute_validation_queries_data_set(env, selected_database, selected_schema):
+            st.warning(f"⚠️ Could not refresh the data set index, looking up the latest output in Snowflake: {e}")
+            return None
+        return data_set_index(env, databases)
+
+    def get_tag_references(tag_provider, databases, schema=None):
+        """Tagged masked-view columns from the local snapshot when the SNAPSHOT provider is chosen"""
+        if tag_provider != "SNAPSHOT":
+            return None
         try:
-            db_manager = f"{env}_DB_MANAGER"
-            count_columns_query = f"""
-            SELECT COUNT(col.COLUMN_ID) AS COLUMN_COUNT
-            FROM {db_manager}.MASKING.MD_DATABASE db
-            JOIN {db_manager}.MASKING.MD_SCHEMA sc ON db.DATABASE_ID = sc.DATABASE_ID
-            JOIN {db_manager}.MASKING.MD_TABLE tb ON sc.SCHEMA_ID = tb.SCHEMA_ID
-            JOIN {db_manager}.MASKING.MD_COLUMN col ON tb.TABLE_ID = col.TABLE_ID
-            WHERE db.database_name='{selected_database}'
-              AND sc.schema_name='{selected_schema}'
-              AND db.IS_ACTIVE = TRUE
-              AND sc.IS_ACTIVE = TRUE
-              AND tb.IS_ACTIVE = TRUE
-              AND col.IS_ACTIVE = TRUE
-            """
-            validation_query = f"""
-            SELECT COUNT(*) AS total_records
-            FROM (
-                SELECT DISTINCT
-                    ds.data_output_id,
-                    d.database_name,
-                    s.schema_name,
-                    t.table_name,
-                    c.column_name
-                FROM {db_manager}.MASKING.DATA_SET ds
-                INNER JOIN {db_manager}.MASKING.MD_DATABASE d ON ds.database_id = d.database_id
-                INNER JOIN {db_manager}.MASKING.MD_SCHEMA s ON ds.schema_id = s.schema_id
-                INNER JOIN {db_manager}.MASKING.MD_TABLE t ON ds.TABLE_ID = t.TABLE_ID
-                INNER JOIN {db_manager}.MASKING.MD_COLUMN c ON ds.COLUMN_ID = c.COLUMN_ID
-                WHERE d.database_name = '{selected_database}'
-                  AND s.schema_name = '{selected_schema}'
-                  AND ds.data_output_id = (
-                      SELECT MAX(ds1.data_output_id) 
-                      FROM {db_manager}.MASKING.DATA_SET ds1
-                      INNER JOIN {db_manager}.MASKING.MD_DATABASE d1 ON ds1.database_id = d1.database_id
-                      INNER JOIN {db_manager}.MASKING.MD_SCHEMA s1 ON ds1.schema_id = s1.schema_id
-                      WHERE d1.database_name = '{selected_database}'
-                        AND s1.schema_name = '{selected_schema}'
-                  )
-            ) AS subquery
-            """
-            column_count = session.sql(count_columns_query).collect()[0][0]
-            data_count = session.sql(validation_query).collect()[0][0]
-            return column_count, data_count
+            for database in databases:
+                for warning in refresh_tag_snapshot(session, database, schema):
+                    st.warning(warning)
         except Exception as e:
-            return None, str(e)
+            st.warning(f"⚠️ Could not refresh the tag snapshot, reading tags from ACCOUNT_USAGE: {e}")
+            return None
+        return tag_snapshot(databases, schema)
+
+    def get_procedure_tag_references(tag_references, schema=None):
+        """Tag references to pass to the stored procedure, warning about databases too large to inline"""
+        kept, fallen_back = procedure_tag_references(tag_references, schema)
+        if fallen_back:
+            st.warning(f"⚠️ Too many tagged columns to pass to {VALIDATION_PROCEDURE_NAME}; "
+                       f"reading tags from ACCOUNT_USAGE for {', '.join(fallen_back)}")
+        return kept
+
+    def get_sweep_databases(env_prefix):
+        """Databases covered by an All Databases sweep: those with a _MASKED copy, which are validated through their source.
+
+        Manager, data lake and other never-masked databases would only report missing masked views.
+        """
+        names = set(get_databases(env_prefix))
+        return sorted(name for name in names if f"{name}_MASKED" in names)
+
+    def masking_matrix(results_df):
+        """Pivot sweep results into one row per database and schema with a column per masking check"""
+        def count_label(value):
+            if pd.isna(value):
+                return "N/A"
+            return int(value) if isinstance(value, float) else value
+
+        cells = results_df.assign(Result=[
+            f"{'✅' if test_case == 'SUCCESS' else '❌'} {count_label(source)} / {count_label(target)}"
+            for test_case, source, target in zip(results_df["Test Case"], results_df["Source Count"], results_df["Target Count"])
+        ])
+        matrix = cells.pivot_table(index=["Database", "Schema"], columns="Validation", values="Result", aggfunc="first")
+        return matrix.reindex(columns=MASKING_VALIDATION_STEPS).reset_index()
 
     # UI Controls
     st.markdown('<h3 class="sub-header">🎛️ Control Panel</h3>', unsafe_allow_html=True)
     
+    masking_scope = st.radio("🔭 Scope", MASKING_SWEEP_SCOPES, horizontal=True, key="masking_scope")
+
     col1, col2, col3, col4 = st.columns(4)
     with col1:
         env = st.selectbox("🌍 Environment", ["DEV", "QA", "UAT", "PROD"])
@@ -929,87 +1016,167 @@ elif page == "🎭 Masking DQ":
         classification_owners = get_classification_owners(env)
         classification_owner = st.selectbox("👤 Classification Owner", classification_owners)
 
+    tag_provider = st.selectbox(
+        "🏷️ Tag Source", TAG_COVERAGE_PROVIDERS, key="masking_tag_provider",
+        help="ACCOUNT USAGE can lag by up to two hours; LIVE reads each masked view's tags now; "
+             "SNAPSHOT serves them from a local copy refreshed incrementally"
+    )
+
+    include_names = st.checkbox("🔎 Show missing / extra object names", key="masking_include_names")
+    name_limit, name_offset = MASKING_NAME_LIMIT, 0
+    if include_names:
+        name_col1, name_col2 = st.columns(2)
+        with name_col1:
+            name_limit = st.number_input("Names per page", min_value=10, max_value=1000, value=MASKING_NAME_LIMIT, step=10)
+        with name_col2:
+            name_page = st.number_input("Page", min_value=1, value=1, step=1)
+        name_offset = (name_page - 1) * name_limit
+
+    matrix_mode = verify_content = False
+    content_sampling_level = DEFAULT_SAMPLING_LEVEL
+    if masking_scope == "Selected Schema":
+        matrix_mode = st.checkbox(
+            "🌐 Run across all environments", key="masking_matrix_mode",
+            help="Runs the selected schema in DEV, QA, UAT and PROD at the same time and compares them side by side"
+        )
+    if masking_scope == "Selected Schema" and not matrix_mode:
+        verify_content = st.checkbox(
+            "🔬 Verify masked view content", key="masking_verify_content",
+            help="Samples every classified column from its base table and masked view and checks the values differ"
+        )
+    if verify_content:
+        content_sampling_level = st.select_slider(
+            "⚖️ Speed / Confidence", options=list(SAMPLING_LEVELS), value=DEFAULT_SAMPLING_LEVEL,
+            key="masking_sampling_level",
+            help="Sample size is derived from each table's row count. " + ", ".join(
+                f"{level}: {confidence:.0%} confidence of catching {defect_share:.1%} bad rows"
+                for level, (confidence, defect_share) in SAMPLING_LEVELS.items()
+            )
+        )
+
     if st.button("🚀 Run All Validations", type="primary"):
-        if not all([env, selected_database, selected_schema, classification_owner]):
+        required_fields = {
+            "Selected Schema": [env, selected_database, selected_schema, classification_owner],
+            "All Schemas": [env, selected_database, classification_owner],
+            "All Databases": [env, classification_owner]
+        }[masking_scope]
+        if not all(required_fields):
             st.error("❌ Please fill in all required fields")
+        elif masking_scope != "Selected Schema":
+            sweep_databases = [selected_database] if masking_scope == "All Schemas" else get_sweep_databases(env)
+            with st.spinner(f"🔄 Sweeping masking validations across {len(sweep_databases)} database(s)..."):
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+                sweep_data_set_index = get_data_set_index(env, sweep_databases)
+                sweep_tag_references = get_tag_references(tag_provider, sweep_databases)
+
+                if execution_target == "Stored Procedure":
+                    results_df = run_validation_in_snowflake("MASKING SWEEP", {
+                        "environment": env,
+                        "databases": sweep_databases,
+                        "classification_owner": classification_owner,
+                        "include_names": include_names,
+                        "name_limit": name_limit,
+                        "name_offset": name_offset,
+                        "data_set_index": sweep_data_set_index,
+                        "tag_provider": tag_provider,
+                        "tag_references": get_procedure_tag_references(sweep_tag_references)
+                    })
+                else:
+                    progress_bar = st.progress(0)
+                    on_row, clear_live = live_results_view()
+                    results_df = pd.DataFrame(masking_sweep_rows(session, env, sweep_databases, classification_owner,
+                                                                 include_names, name_limit, name_offset, sweep_data_set_index,
+                                                                 tag_provider, sweep_tag_references,
+                                                                 on_progress=progress_bar.progress, on_warning=st.warning,
+                                                                 on_row=on_row))
+                    progress_bar.empty()
+                    clear_live()
+
+                if results_df.empty:
+                    st.info("ℹ️ No schemas found to validate.")
+                else:
+                    st.markdown('<h3 class="sub-header">📈 Masking Sweep Results</h3>', unsafe_allow_html=True)
+                    display_summary_metrics(results_df)
+
+                    st.markdown("### 🧩 Schema Matrix")
+                    st.dataframe(masking_matrix(results_df), use_container_width=True)
+
+                    st.markdown("### 📋 Detailed Results")
+                    styled_df = style_dataframe(results_df)
+                    st.dataframe(styled_df, use_container_width=True)
+
+                    # Download button
+                    csv_bytes = results_df.to_csv(index=False).encode('utf-8')
+                    st.download_button(
+                        label="📥 Download Sweep Results",
+                        data=csv_bytes,
+                        file_name=f"masking_sweep_results_{timestamp}.csv",
+                        mime="text/csv"
+                    )
+        elif matrix_mode:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            matrix_databases = [to_environment_database(selected_database, environment) for environment in ENV_DB_MAP]
+            matrix_df = run_environment_matrix("MASKING VALIDATION", {
+                "database": selected_database,
+                "schema": selected_schema,
+                "classification_owner": classification_owner,
+                "include_names": include_names,
+                "name_limit": name_limit,
+                "name_offset": name_offset,
+                "tag_provider": tag_provider,
+                "tag_references": get_tag_references(tag_provider, matrix_databases, selected_schema)
+            })
+
+            if matrix_df.empty:
+                st.info("ℹ️ No results returned by any environment.")
+            else:
+                st.markdown('<h3 class="sub-header">📈 Masking Environment Matrix</h3>', unsafe_allow_html=True)
+                display_summary_metrics(matrix_df)
+
+                st.markdown("### 🌐 Environment Matrix")
+                st.dataframe(environment_matrix(matrix_df, ["Schema", "Validation"]), use_container_width=True)
+
+                st.markdown("### 📋 Detailed Results")
+                styled_df = style_dataframe(matrix_df)
+                st.dataframe(styled_df, use_container_width=True)
+
+                # Download button
+                csv_bytes = matrix_df.to_csv(index=False).encode('utf-8')
+                st.download_button(
+                    label="📥 Download Matrix Results",
+                    data=csv_bytes,
+                    file_name=f"masking_environment_matrix_{timestamp}.csv",
+                    mime="text/csv"
+                )
         else:
             with st.spinner("🔄 Running comprehensive masking validations..."):
-                results_for_csv = []
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 
-                # Progress tracking
-                validation_steps = ["MD Tables", "MD Columns", "Data Set", "Views", "Tags"]
-                progress_bar = st.progress(0)
-                
-                for idx, validation_type in enumerate(validation_steps):
-                    progress_bar.progress((idx + 1) / len(validation_steps))
-                    
-                    if validation_type == "MD Tables":
-                        table_count, table_validation_count = execute_validation_queries_tables(env, selected_database, selected_schema)
-                        test_case = "SUCCESS" if table_count == table_validation_count else "FAILURE"
-                        results_for_csv.append({
-                            "Environment": env,
-                            "Database": selected_database,
-                            "Schema": selected_schema,
-                            "Validation": "MD Tables",
-                            "Source Count": table_count,
-                            "Target Count": table_validation_count,
-                            "Test Case": test_case
-                        })
-                    
-                    elif validation_type == "MD Columns":
-                        column_count, column_validation_count = execute_validation_queries_columns(env, selected_database, selected_schema)
-                        test_case = "SUCCESS" if column_count == column_validation_count else "FAILURE"
-                        results_for_csv.append({
-                            "Environment": env,
-                            "Database": selected_database,
-                            "Schema": selected_schema,
-                            "Validation": "MD Columns",
-                            "Source Count": column_count,
-                            "Target Count": column_validation_count,
-                            "Test Case": test_case
-                        })
-                    
-                    elif validation_type == "Data Set":
-                        dataset_count, dataset_data_count = execute_validation_queries_data_set(env, selected_database, selected_schema)
-                        test_case = "SUCCESS" if dataset_count == dataset_data_count else "FAILURE"
-                        results_for_csv.append({
-                            "Environment": env,
-                            "Database": selected_database,
-                            "Schema": selected_schema,
-                            "Validation": "Data Set",
-                            "Source Count": dataset_count,
-                            "Target Count": dataset_data_count,
-                            "Test Case": test_case
-                        })
-                    
-                    elif validation_type == "Views":
-                        view_table_count, validation_count_views = execute_validation_queries_views(env, selected_database, selected_schema)
-                        test_case = "SUCCESS" if view_table_count == validation_count_views else "FAILURE"
-                        results_for_csv.append({
-                            "Environment": env,
-                            "Database": selected_database,
-                            "Schema": selected_schema,
-                            "Validation": "Views",
-                            "Source Count": view_table_count,
-                            "Target Count": validation_count_views,
-                            "Test Case": test_case
-                        })
-                    
-                    elif validation_type == "Tags":
-                        tags_source_count, tags_target_count = execute_validation_queries_tags(env, selected_database, selected_schema, classification_owner)
-                        test_case = "SUCCESS" if tags_source_count == tags_target_count else "FAILURE"
-                        results_for_csv.append({
-                            "Environment": env,
-                            "Database": selected_database,
-                            "Schema": selected_schema,
-                            "Validation": "Tags",
-                            "Source Count": tags_source_count,
-                            "Target Count": tags_target_count,
-                            "Test Case": test_case
-                        })
-
-                progress_bar.empty()
+                masking_data_set_index = get_data_set_index(env, [selected_database])
+                masking_tag_references = get_tag_references(tag_provider, [selected_database], selected_schema)
+
+                if execution_target == "Stored Procedure":
+                    results_for_csv = run_validation_in_snowflake("MASKING VALIDATION", {
+                        "environment": env,
+                        "database": selected_database,
+                        "schema": selected_schema,
+                        "classification_owner": classification_owner,
+                        "include_names": include_names,
+                        "name_limit": name_limit,
+                        "name_offset": name_offset,
+                        "data_set_index": masking_data_set_index,
+                        "tag_provider": tag_provider,
+                        "tag_references": get_procedure_tag_references(masking_tag_references, selected_schema)
+                    })
+                else:
+                    # Progress tracking
+                    progress_bar = st.progress(0)
+                    results_for_csv = masking_validation_rows(session, env, selected_database, selected_schema,
+                                                              classification_owner, include_names, name_limit, name_offset,
+                                                              masking_data_set_index, tag_provider, masking_tag_references,
+                                                              on_progress=progress_bar.progress, on_warning=st.warning)
+                    progress_bar.empty()
                 
                 # Display results
                 results_df = pd.DataFrame(results_for_csv)
@@ -1030,36 +1197,52 @@ elif page == "🎭 Masking DQ":
                     mime="text/csv"
                 )
 
+                if verify_content:
+                    if execution_target == "Stored Procedure":
+                        content_df = run_validation_in_snowflake("MASKED CONTENT", {
+                            "environment": env,
+                            "database": selected_database,
+                            "schema": selected_schema,
+                            "classification_owner": classification_owner,
+                            "sampling_level": content_sampling_level
+                        })
+                    else:
+                        progress_bar = st.progress(0)
+                        on_row, clear_live = live_results_view()
+                        content_df = pd.DataFrame(masked_content_rows(session, env, selected_database, selected_schema,
+                                                                      classification_owner, content_sampling_level,
+                                                                      on_progress=progress_bar.progress, on_row=on_row))
+                        progress_bar.empty()
+                        clear_live()
+
+                    st.markdown('<h3 class="sub-header">🔬 Masked Content Results</h3>', unsafe_allow_html=True)
+                    if content_df.empty:
+                        st.info("ℹ️ No classified columns found to verify.")
+                    else:
+                        display_summary_metrics(content_df)
+                        st.dataframe(style_dataframe(content_df), use_container_width=True)
+                        st.download_button(
+                            label="📥 Download Masked Content Results",
+                            data=content_df.to_csv(index=False).encode('utf-8'),
+                            file_name=f"masked_content_results_{timestamp}.csv",
+                            mime="text/csv"
+                        )
+
 elif page == "🔐 Encryption DQ":
     st.markdown('<h1 class="main-header">🔐 Encryption Quality</h1>', unsafe_allow_html=True)
     
     # Encryption DQ functions
-    @st.cache_data(ttl=300)
     def get_encryption_databases(env_prefix):
         """Get databases for encryption validation"""
-        db_prefix = f"{env_prefix}_"
-        db_query = f"""
-            SELECT DATABASE_NAME 
-            FROM INFORMATION_SCHEMA.DATABASES 
-            WHERE DATABASE_NAME LIKE '{db_prefix}%'
-            AND DATABASE_NAME NOT LIKE '%_ENCRYPT'
-            AND DATABASE_NAME NOT LIKE '%_MASKED%'
-        """
-        try:
-            rows = session.sql(db_query).collect()
-            return [row[0] for row in rows]
-        except:
-            return []
+        ensure_catalog()
+        return [
+            name for name in list_databases(prefix=f"{env_prefix}_")
+            if not name.endswith("_ENCRYPT") and "_MASKED" not in name
+        ]
 
-    @st.cache_data(ttl=300)
     def get_encryption_schemas(database):
         """Get schemas for encryption validation"""
-        schema_query = f"SELECT SCHEMA_NAME FROM {database}.INFORMATION_SCHEMA.SCHEMATA"
-        try:
-            rows = session.sql(schema_query).collect()
-            return [row[0] for row in rows]
-        except:
-            return []
+        return fetch_schemas(database)
 
     @st.cache_data(ttl=300)
     def get_encryption_classification_owners(env):
@@ -1074,244 +1257,46 @@ elif page == "🔐 Encryption DQ":
         except:
             return []
 
-    def get_tables_and_columns_from_classification(env, selected_database, selected_schema, classification_owner):
-        """Get tables and columns from classification details based on environment mapping"""
-        try:
-            # Convert selected database to PROD for classification lookup
-            prod_database = selected_database.replace("DEV_", "PROD_").replace("QA_", "PROD_").replace("UAT_", "PROD_")
-            
-            classification_query = f"""
-                SELECT DISTINCT 
-                    "TABLE" as table_name,
-                    "COLUMN" as column_name
-                FROM {env}_DB_MANAGER.MASKING.CLASSIFICATION_DETAILS
-                WHERE "DATABASE" = '{prod_database}'
-                AND "SCHEMA" = '{selected_schema}'
-                AND CLASSIFICATION_OWNER = '{classification_owner}'
-                ORDER BY "TABLE", "COLUMN"
-            """
-            
-            rows = session.sql(classification_query).collect()
-            return [(row['TABLE_NAME'], row['COLUMN_NAME']) for row in rows]
-        except Exception as e:
-            st.error(f"Error fetching classification data: {e}")
-            return []
-
-    def compare_column_data(original_db, encrypted_db, schema, table_name, column_name, sample_size=100):
-        """Compare data between original and encrypted columns"""
-        try:
-            # Get sample data from original database
-            original_query = f"""
-                SELECT {column_name}
-                FROM {original_db}.{schema}.{table_name}
-                WHERE {column_name} IS NOT NULL
-                LIMIT {sample_size}
-            """
-            
-            # Get sample data from encrypted database
-            encrypted_query = f"""
-                SELECT {column_name}
-                FROM {encrypted_db}.{schema}.{table_name}
-                WHERE {column_name} IS NOT NULL
-                LIMIT {sample_size}
-            """
-            
-            original_result = session.sql(original_query).collect()
-            encrypted_result = session.sql(encrypted_query).collect()
-            
-            if not original_result or not encrypted_result:
-                return False, "No data found in one or both databases", 0, 0
-            
-            # Extract values
-            original_values = [str(row[0]) for row in original_result if row[0] is not None]
-            encrypted_values = [str(row[0]) for row in encrypted_result if row[0] is not None]
-            
-            if not original_values or not encrypted_values:
-                return False, "No valid data to compare", 0, 0
-            
-            # Compare if data is different (encryption should make data different)
-            different_count = 0
-            min_length = min(len(original_values), len(encrypted_values))
-            
-            for i in range(min_length):
-                if original_values[i] != encrypted_values[i]:
-                    different_count += 1
-            
-            # Success if data is different (indicating encryption worked)
-            is_encrypted = different_count > 0
-            comparison_details = f"Compared {min_length} records, {different_count} different"
-            
-            return is_encrypted, comparison_details, len(original_values), len(encrypted_values)
-            
-        except Exception as e:
-            return False, f"Error comparing data: {str(e)}", 0, 0
-
-    def check_table_column_exists(database, schema, table_name, column_name):
-        """Check if table and column exist in database"""
-        try:
-            check_query = f"""
-                SELECT COUNT(*) as count
-                FROM {database}.INFORMATION_SCHEMA.COLUMNS
-                WHERE TABLE_SCHEMA = '{schema}'
-                AND TABLE_NAME = '{table_name}'
-                AND COLUMN_NAME = '{column_name}'
-            """
-            result = session.sql(check_query).collect()
-            return result[0]['COUNT'] > 0 if result else False
-        except:
-            return False
-
-    def run_encryption_data_validation(env, selected_database, selected_schema, classification_owner):
+    def run_encryption_data_validation(env, selected_database, selected_schema, classification_owner, compare_mode="SAMPLE",
+                                       sampling_level=DEFAULT_SAMPLING_LEVEL):
         """Run encryption validation by comparing actual data between original and encrypted databases"""
         with st.spinner("🔄 Running encryption data validation..."):
-            # Get encrypted database name
-            encrypt_database = f"{selected_database}_ENCRYPT"
-            
-            # Get tables and columns from classification
-            classification_data = get_tables_and_columns_from_classification(env, selected_database, selected_schema, classification_owner)
-            
-            if not classification_data:
-                st.warning("⚠️ No classification data found for the selected criteria.")
+            try:
+                progress_bar = st.progress(0)
+                on_row, clear_live = live_results_view()
+                results = encryption_validation_rows(session, env, selected_database, selected_schema, classification_owner,
+                                                     compare_mode, sampling_level, on_progress=progress_bar.progress,
+                                                     on_row=on_row)
+                progress_bar.empty()
+                clear_live()
+            except Exception as e:
+                st.error(f"Error fetching classification data: {e}")
                 return pd.DataFrame([])
 
-            results = []
-            progress_bar = st.progress(0)
-            
-            for idx, (table_name, column_name) in enumerate(classification_data):
-                progress_bar.progress((idx + 1) / len(classification_data))
-                
-                # Check if table and column exist in both databases
-                original_exists = check_table_column_exists(selected_database, selected_schema, table_name, column_name)
-                encrypted_exists = check_table_column_exists(encrypt_database, selected_schema, table_name, column_name)
-                
-                if not original_exists or not encrypted_exists:
-                    test_case = "FAILURE"
-                    details = f"Column missing - Original: {'Yes' if original_exists else 'No'}, Encrypted: {'Yes' if encrypted_exists else 'No'}"
-                    original_count = encrypted_count = 0
-                else:
-                    # Compare actual data
-                    is_encrypted, comparison_details, original_count, encrypted_count = compare_column_data(
-                        selected_database, encrypt_database, selected_schema, table_name, column_name
-                    )
-                    
-                    if is_encrypted:
-                        test_case = "SUCCESS"
-                        details = f"Data encrypted successfully - {comparison_details}"
-                    else:
-                        test_case = "FAILURE"
-                        details = f"Data not encrypted or identical - {comparison_details}"
-                
-                results.append({
-                    "Environment": env,
-                    "Original Database": selected_database,
-                    "Encrypted Database": encrypt_database,
-                    "Schema": selected_schema,
-                    "Table": table_name,
-                    "Column": column_name,
-                    "Classification Owner": classification_owner,
-                    "Original Count": original_count,
-                    "Encrypted Count": encrypted_count,
-                    "Original Exists": "Yes" if original_exists else "No",
-                    "Encrypted Exists": "Yes" if encrypted_exists else "No",
-                    "Test Case": test_case,
-                    "Details": details
-                })
-
-            progress_bar.empty()
+            if not results:
+                st.warning("⚠️ No classification data found for the selected criteria.")
             return pd.DataFrame(results)
 
-    def run_non_encryption_validation(env, selected_database, selected_schema, classification_owner):
+    def run_non_encryption_validation(env, selected_database, selected_schema, classification_owner, compare_mode="SAMPLE",
+                                      sampling_level=DEFAULT_SAMPLING_LEVEL):
         """Run validation for columns that should NOT be encrypted"""
         with st.spinner("🔄 Running non-encryption validation..."):
-            # Get encrypted database name
-            encrypt_database = f"{selected_database}_ENCRYPT"
-            
-            # Get all columns from the schema that are NOT in classification details
             try:
-                # Get all columns in the schema
-                all_columns_query = f"""
-                    SELECT DISTINCT TABLE_NAME, COLUMN_NAME
-                    FROM {selected_database}.INFORMATION_SCHEMA.COLUMNS
-                    WHERE TABLE_SCHEMA = '{selected_schema}'
-                    AND TABLE_NAME NOT LIKE 'RAW_%'
-                    AND TABLE_NAME NOT LIKE 'VW_%'
-                    AND COLUMN_NAME NOT LIKE 'ROW_%'
-                    ORDER BY TABLE_NAME, COLUMN_NAME
-                """
-                
-                all_columns_result = session.sql(all_columns_query).collect()
-                all_columns = [(row['TABLE_NAME'], row['COLUMN_NAME']) for row in all_columns_result]
-                
-                # Get classified columns (these should be encrypted)
-                prod_database = selected_database.replace("DEV_", "PROD_").replace("QA_", "PROD_").replace("UAT_", "PROD_")
-                classified_columns_query = f"""
-                    SELECT DISTINCT "TABLE" as table_name, "COLUMN" as column_name
-                    FROM {env}_DB_MANAGER.MASKING.CLASSIFICATION_DETAILS
-                    WHERE "DATABASE" = '{prod_database}'
-                    AND "SCHEMA" = '{selected_schema}'
-                    AND CLASSIFICATION_OWNER = '{classification_owner}'
-                """
-                
-                classified_result = session.sql(classified_columns_query).collect()
-                classified_columns = set((row['TABLE_NAME'], row['COLUMN_NAME']) for row in classified_result)
-                
-                # Get non-classified columns (these should NOT be encrypted)
-                non_classified_columns = [col for col in all_columns if col not in classified_columns]
-                
-                if not non_classified_columns:
-                    st.info("ℹ️ All columns in this schema are classified for encryption.")
-                    return pd.DataFrame([])
-                
-                results = []
                 progress_bar = st.progress(0)
-                
-                for idx, (table_name, column_name) in enumerate(non_classified_columns):
-                    progress_bar.progress((idx + 1) / len(non_classified_columns))
-                    
-                    # Check if table and column exist in both databases
-                    original_exists = check_table_column_exists(selected_database, selected_schema, table_name, column_name)
-                    encrypted_exists = check_table_column_exists(encrypt_database, selected_schema, table_name, column_name)
-                    
-                    if not original_exists or not encrypted_exists:
-                        test_case = "FAILURE"
-                        details = f"Column missing - Original: {'Yes' if original_exists else 'No'}, Encrypted: {'Yes' if encrypted_exists else 'No'}"
-                        original_count = encrypted_count = 0
-                    else:
-                        # Compare actual data - for non-encrypted columns, data should be identical
-                        is_different, comparison_details, original_count, encrypted_count = compare_column_data(
-                            selected_database, encrypt_database, selected_schema, table_name, column_name
-                        )
-                        
-                        if not is_different:
-                            test_case = "SUCCESS"
-                            details = f"Data identical (not encrypted) - {comparison_details}"
-                        else:
-                            test_case = "FAILURE"
-                            details = f"Data unexpectedly different - {comparison_details}"
-                    
-                    results.append({
-                        "Environment": env,
-                        "Original Database": selected_database,
-                        "Encrypted Database": encrypt_database,
-                        "Schema": selected_schema,
-                        "Table": table_name,
-                        "Column": column_name,
-                        "Classification": "Not Required",
-                        "Original Count": original_count,
-                        "Encrypted Count": encrypted_count,
-                        "Original Exists": "Yes" if original_exists else "No",
-                        "Encrypted Exists": "Yes" if encrypted_exists else "No",
-                        "Test Case": test_case,
-                        "Details": details
-                    })
-
+                on_row, clear_live = live_results_view()
+                results = non_encryption_validation_rows(session, env, selected_database, selected_schema, classification_owner,
+                                                         compare_mode, sampling_level, on_progress=progress_bar.progress,
+                                                         on_row=on_row)
                 progress_bar.empty()
-                return pd.DataFrame(results)
-                
+                clear_live()
             except Exception as e:
                 st.error(f"Error during non-encryption validation: {e}")
                 return pd.DataFrame([])
 
+            if not results:
+                st.info("ℹ️ All columns in this schema are classified for encryption.")
+            return pd.DataFrame(results)
+
     # UI Controls
     st.markdown('<h3 class="sub-header">🎛️ Control Panel</h3>', unsafe_allow_html=True)
     
@@ -1331,18 +1316,54 @@ elif page == "🔐 Encryption DQ":
     # Run validation automatically when all fields are selected
     if all([encrypt_env, encrypt_selected_database, encrypt_selected_schema, encrypt_classification_owner]):
         
+        encrypt_sampling_level = st.select_slider(
+            "⚖️ Speed / Confidence", options=list(SAMPLING_LEVELS), value=DEFAULT_SAMPLING_LEVEL, key="encrypt_sampling_level",
+            help="Sample size is derived from each table's row count. For tables with a primary key, " + ", ".join(
+                f"{level}: {confidence:.0%} confidence of catching {defect_share:.1%} bad rows"
+                for level, (confidence, defect_share) in SAMPLING_LEVELS.items()
+            ) + ". Tables without a usable primary key compare their smallest values instead, so no confidence applies."
+        )
+        encrypt_matrix_mode = st.checkbox(
+            "🌐 Run across all environments", key="encrypt_matrix_mode",
+            help="Runs the selected schema in DEV, QA, UAT and PROD at the same time and compares them side by side"
+        )
+
         # Two validation buttons
         col_btn1, col_btn2 = st.columns(2)
         
         with col_btn1:
+            encrypt_compare_mode = st.selectbox("🧮 Comparison Mode", ENCRYPTED_COMPARE_MODES, key="encrypt_compare_mode")
             if st.button("🔐 Validate Encrypted Columns", type="primary", key="encrypt_validate"):
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 
-                df = run_encryption_data_validation(encrypt_env, encrypt_selected_database, encrypt_selected_schema, encrypt_classification_owner)
+                if encrypt_matrix_mode:
+                    df = run_environment_matrix("ENCRYPTED COLUMNS", {
+                        "database": encrypt_selected_database,
+                        "schema": encrypt_selected_schema,
+                        "classification_owner": encrypt_classification_owner,
+                        "compare_mode": encrypt_compare_mode,
+                        "sampling_level": encrypt_sampling_level
+                    })
+                elif execution_target == "Stored Procedure":
+                    df = run_validation_in_snowflake("ENCRYPTED COLUMNS", {
+                        "environment": encrypt_env,
+                        "database": encrypt_selected_database,
+                        "schema": encrypt_selected_schema,
+                        "classification_owner": encrypt_classification_owner,
+                        "compare_mode": encrypt_compare_mode,
+                        "sampling_level": encrypt_sampling_level
+                    })
+                else:
+                    df = run_encryption_data_validation(encrypt_env, encrypt_selected_database, encrypt_selected_schema,
+                                                        encrypt_classification_owner, encrypt_compare_mode, encrypt_sampling_level)
                 
                 if not df.empty:
                     st.markdown('<h3 class="sub-header">🔐 Encrypted Columns Validation Results</h3>', unsafe_allow_html=True)
                     display_summary_metrics(df)
+
+                    if encrypt_matrix_mode:
+                        st.markdown("### 🌐 Environment Matrix")
+                        st.dataframe(environment_matrix(df, ["Table", "Column"]), use_container_width=True)
                     
                     st.markdown("### 📋 Detailed Results")
                     styled_df = style_dataframe(df)
@@ -1360,14 +1381,38 @@ elif page == "🔐 Encryption DQ":
                     st.info("ℹ️ No encrypted columns found for validation.")
         
         with col_btn2:
+            non_encrypt_compare_mode = st.selectbox("🧮 Comparison Mode", NON_ENCRYPTED_COMPARE_MODES, key="non_encrypt_compare_mode")
             if st.button("🔓 Validate Non-Encrypted Columns", type="secondary", key="non_encrypt_validate"):
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 
-                df = run_non_encryption_validation(encrypt_env, encrypt_selected_database, encrypt_selected_schema, encrypt_classification_owner)
+                if encrypt_matrix_mode:
+                    df = run_environment_matrix("NON-ENCRYPTED COLUMNS", {
+                        "database": encrypt_selected_database,
+                        "schema": encrypt_selected_schema,
+                        "classification_owner": encrypt_classification_owner,
+                        "compare_mode": non_encrypt_compare_mode,
+                        "sampling_level": encrypt_sampling_level
+                    })
+                elif execution_target == "Stored Procedure":
+                    df = run_validation_in_snowflake("NON-ENCRYPTED COLUMNS", {
+                        "environment": encrypt_env,
+                        "database": encrypt_selected_database,
+                        "schema": encrypt_selected_schema,
+                        "classification_owner": encrypt_classification_owner,
+                        "compare_mode": non_encrypt_compare_mode,
+                        "sampling_level": encrypt_sampling_level
+                    })
+                else:
+                    df = run_non_encryption_validation(encrypt_env, encrypt_selected_database, encrypt_selected_schema,
+                                                       encrypt_classification_owner, non_encrypt_compare_mode, encrypt_sampling_level)
                 
                 if not df.empty:
                     st.markdown('<h3 class="sub-header">🔓 Non-Encrypted Columns Validation Results</h3>', unsafe_allow_html=True)
                     display_summary_metrics(df)
+
+                    if encrypt_matrix_mode:
+                        st.markdown("### 🌐 Environment Matrix")
+                        st.dataframe(environment_matrix(df, ["Table", "Column"]), use_container_width=True)
                     
                     st.markdown("### 📋 Detailed Results")
                     styled_df = style_dataframe(df)
@@ -1392,7 +1437,7 @@ elif page == "🔐 Encryption DQ":
         <p><strong>🔓 Non-Encrypted Columns Validation:</strong> Validates that columns NOT in classification details remain unchanged. SUCCESS means data is identical (not encrypted).</p>
         <p><strong>Database Mapping:</strong> Encrypted database name is formed by adding '_ENCRYPT' suffix to the selected database.</p>
         <p><strong>Classification Mapping:</strong> Classification details are always stored with PROD database names and mapped to the selected environment.</p>
-        <p><strong>Data Comparison:</strong> Uses sample of 100 records to compare data between original and encrypted columns.</p>
+        <p><strong>Data Comparison:</strong> SAMPLE compares the same rows of each column on both sides, picked by a hash of the primary key and sized from the table's row count and the Speed / Confidence level; an encrypted column fails if any sampled row kept its clear value. Tables without a usable key compare their smallest values on each side, which proves an unchanged column is unchanged but carries no sampling confidence. KEYED JOIN joins the same seeded sample of original rows to the encrypted rows on the table's primary key and counts changed and unchanged values for every classified column of a table in one query; tables without a usable key are sampled. PROFILE compares length, character-class, entropy and distinct-ratio aggregates of each column on both sides without moving any values. FINGERPRINT checks non-encrypted columns exactly with a full-column HASH_AGG on each side, two queries per table.</p>
     </div>
     """, unsafe_allow_html=True)
 
@@ -0,0 +1,444 @@
+"""ZDQ local store.
+
+A SQLite file next to the app that keeps state between Streamlit sessions and
+app restarts. It holds the catalog snapshot (databases and schemas, reloaded in full once
+stale) that serves the control panel dropdowns, the latest masking
+DATA_SET output per database and schema, and a snapshot of the column tags on
+the masked views, per-table validation results keyed on the metadata of the
+objects they were computed from, and the audit_recon load each table last
+passed validation at.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+STORE_PATH = os.environ.get(
+    "ZDQ_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".zdq", "zdq_store.sqlite")
+)
+
+# catalog_refresh key for the account-level database list
+DATABASE_LIST_KEY = "*"
+
+# Tagging a column does not move the view's LAST_ALTERED, so snapshot entries
+# are also re-read once they are this many seconds old
+TAG_SNAPSHOT_MAX_AGE = 900
+
+SCHEMA_DDL = [
+    """CREATE TABLE IF NOT EXISTS catalog_databases (
+        database_name TEXT PRIMARY KEY
+    )""",
+    """CREATE TABLE IF NOT EXISTS catalog_schemas (
+        database_name TEXT,
+        schema_name TEXT,
+        PRIMARY KEY (database_name, schema_name)
+    )""",
+    """CREATE TABLE IF NOT EXISTS catalog_refresh (
+        database_name TEXT PRIMARY KEY,
+        refreshed_at REAL
+    )""",
+    """CREATE TABLE IF NOT EXISTS data_set_index (
+        env TEXT,
+        database_name TEXT,
+        schema_name TEXT,
+        database_id,
+        schema_id,
+        data_output_id,
+        PRIMARY KEY (env, database_name, schema_name)
+    )""",
+    """CREATE TABLE IF NOT EXISTS tag_snapshot_views (
+        database_name TEXT,
+        schema_name TEXT,
+        view_name TEXT,
+        last_altered TEXT,
+        refreshed_at REAL,
+        PRIMARY KEY (database_name, schema_name, view_name)
+    )""",
+    """CREATE TABLE IF NOT EXISTS tag_snapshot (
+        database_name TEXT,
+        schema_name TEXT,
+        view_name TEXT,
+        column_name TEXT
+    )""",
+    """CREATE INDEX IF NOT EXISTS tag_snapshot_view
+        ON tag_snapshot (database_name, schema_name, view_name)""",
+    """CREATE TABLE IF NOT EXISTS validation_cache (
+        rule TEXT,
+        target TEXT,
+        source TEXT,
+        version TEXT,
+        result TEXT,
+        cached_at REAL,
+        PRIMARY KEY (rule, target, source)
+    )""",
+    # Keyed on the load group and type too: a pass of one load group says nothing about
+    # another's loads. Replaces validation_watermarks, whose key could not be widened in place.
+    """CREATE TABLE IF NOT EXISTS load_watermarks (
+        env TEXT,
+        rule TEXT,
+        database_name TEXT,
+        load_group TEXT,
+        load_type TEXT,
+        schema_name TEXT,
+        table_name TEXT,
+        last_load TEXT,
+        validated_at REAL,
+        PRIMARY KEY (env, rule, database_name, load_group, load_type, schema_name, table_name)
+    )"""
+]
+
+_schema_ready = False
+_refresh_lock = threading.Lock()
+_refreshing = set()
+
+def connect():
+    """Open the local store, creating the file and tables on first use"""
+    global _schema_ready
+    os.makedirs(os.path.dirname(STORE_PATH), exist_ok=True)
+    conn = sqlite3.connect(STORE_PATH, timeout=30)
+    if not _schema_ready:
+        conn.execute("PRAGMA journal_mode=WAL")
+        for ddl in SCHEMA_DDL:
+            conn.execute(ddl)
+        conn.commit()
+        _schema_ready = True
+    return conn
+
+def _timestamp(value):
+    return value.isoformat() if value is not None else None
+
+# ---------------------------------------------------------------------------
+# Catalog snapshot
+# ---------------------------------------------------------------------------
+
+def _mark_refreshed(conn, key):
+    conn.execute("INSERT OR REPLACE INTO catalog_refresh VALUES (?, ?)", (key, time.time()))
+
+def catalog_age(database=None):
+    """Seconds since the database (or the database list) was last refreshed, None if never"""
+    conn = connect()
+    try:
+        row = conn.execute("SELECT refreshed_at FROM catalog_refresh WHERE database_name = ?",
+                           (database or DATABASE_LIST_KEY,)).fetchone()
+        return time.time() - row[0] if row else None
+    finally:
+        conn.close()
+
+def invalidate_catalog():
+    """Force every database and the database list to reload on next use"""
+    conn = connect()
+    try:
+        conn.execute("DELETE FROM catalog_refresh")
+        conn.commit()
+    finally:
+        conn.close()
+
+def refresh_database_list(session):
+    rows = session.sql("SELECT DATABASE_NAME FROM INFORMATION_SCHEMA.DATABASES").collect()
+    conn = connect()
+    try:
+        conn.execute("DELETE FROM catalog_databases")
+        # Named column so store files created with the old last_altered column still load
+        conn.executemany("INSERT INTO catalog_databases (database_name) VALUES (?)",
+                         [(r['DATABASE_NAME'],) for r in rows])
+        _mark_refreshed(conn, DATABASE_LIST_KEY)
+        conn.commit()
+    finally:
+        conn.close()
+
+def refresh_database_catalog(session, database):
+    """Refresh one database's schemas, reloaded in full so drops are picked up"""
+    schema_rows = session.sql(f"SELECT SCHEMA_NAME FROM {database}.INFORMATION_SCHEMA.SCHEMATA").collect()
+
+    conn = connect()
+    try:
+        conn.execute("DELETE FROM catalog_schemas WHERE database_name = ?", (database,))
+        conn.executemany("INSERT INTO catalog_schemas VALUES (?, ?)",
+                         [(database, r['SCHEMA_NAME']) for r in schema_rows])
+        _mark_refreshed(conn, database)
+        conn.commit()
+    finally:
+        conn.close()
+
+def refresh_catalog(session, database=None):
+    if database:
+        refresh_database_catalog(session, database)
+    else:
+        refresh_database_list(session)
+
+def refresh_catalog_in_background(session, database=None):
+    """Refresh without blocking the caller; at most one refresh per database runs at a time"""
+    key = database or DATABASE_LIST_KEY
+    with _refresh_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def worker():
+        try:
+            refresh_catalog(session, database)
+        except Exception:
+            pass
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=worker, daemon=True).start()
+
+def list_databases(prefix=""):
+    conn = connect()
+    try:
+        rows = conn.execute("SELECT database_name FROM catalog_databases ORDER BY database_name").fetchall()
+        return [r[0] for r in rows if r[0].startswith(prefix)]
+    finally:
+        conn.close()
+
+def list_schemas(database):
+    conn = connect()
+    try:
+        rows = conn.execute("SELECT schema_name FROM catalog_schemas WHERE database_name = ? ORDER BY schema_name",
+                            (database,)).fetchall()
+        return [r[0] for r in rows]
+    finally:
+        conn.close()
+
+# ---------------------------------------------------------------------------
+# Latest DATA_SET output index
+# ---------------------------------------------------------------------------
+
+def _literal(value):
+    return f"'{value}'" if isinstance(value, str) else str(value)
+
+def refresh_data_set_index(session, env):
+    """Pick up DATA_SET outputs written since the last refresh.
+
+    data_output_id only grows, so only rows past the highest id already indexed
+    are read, and any newer output replaces the indexed one for its schema.
+    """
+    conn = connect()
+    try:
+        watermark = conn.execute("SELECT MAX(data_output_id) FROM data_set_index WHERE env = ?", (env,)).fetchone()[0]
+    finally:
+        conn.close()
+
+    db_manager = f"{env}_DB_MANAGER"
+    new_outputs_filter = f"WHERE ds.data_output_id > {_literal(watermark)}" if watermark is not None else ""
+    rows = session.sql(f"""
+        SELECT d.database_name, s.schema_name, ds.database_id, ds.schema_id, MAX(ds.data_output_id) AS data_output_id
+        FROM {db_manager}.MASKING.DATA_SET ds
+        INNER JOIN {db_manager}.MASKING.MD_DATABASE d ON ds.database_id = d.database_id
+        INNER JOIN {db_manager}.MASKING.MD_SCHEMA s ON ds.schema_id = s.schema_id
+        {new_outputs_filter}
+        GROUP BY d.database_name, s.schema_name, ds.database_id, ds.schema_id
+    """).collect()
+
+    conn = connect()
+    try:
+        conn.executemany("""
+            INSERT INTO data_set_index VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (env, database_name, schema_name) DO UPDATE SET
+                database_id = excluded.database_id,
+                schema_id = excluded.schema_id,
+                data_output_id = excluded.data_output_id
+            WHERE excluded.data_output_id > data_set_index.data_output_id
+        """, [
+            (env, r['DATABASE_NAME'], r['SCHEMA_NAME'], r['DATABASE_ID'], r['SCHEMA_ID'], r['DATA_OUTPUT_ID'])
+            for r in rows
+        ])
+        conn.commit()
+    finally:
+        conn.close()
+
+def invalidate_data_set_index():
+    """Drop the index so the next refresh rebuilds it from the full DATA_SET table"""
+    conn = connect()
+    try:
+        conn.execute("DELETE FROM data_set_index")
+        conn.commit()
+    finally:
+        conn.close()
+
+def data_set_index(env, databases):
+    """Latest output per schema as {database: {schema: [database_id, schema_id, data_output_id]}}"""
+    conn = connect()
+    try:
+        index = {database: {} for database in databases}
+        for row in conn.execute("""
+            SELECT database_name, schema_name, database_id, schema_id, data_output_id
+            FROM data_set_index WHERE env = ?
+        """, (env,)):
+            if row[0] in index:
+                index[row[0]][row[1]] = [row[2], row[3], row[4]]
+        return index
+    finally:
+        conn.close()
+
+# ---------------------------------------------------------------------------
+# Tag snapshot
+# ---------------------------------------------------------------------------
+
+def refresh_tag_snapshot(session, database, schema=None, max_concurrency=None):
+    """Bring the tag snapshot of a database's masked views up to date.
+
+    Only views that are new, altered, or older than TAG_SNAPSHOT_MAX_AGE are
+    re-read; dropped views leave the snapshot. Returns the per-view warnings.
+    """
+    from validation_engine import DEFAULT_MAX_CONCURRENCY, fetch_masked_views, fetch_tag_references_live
+
+    views = fetch_masked_views(session, database, schema)
+
+    conn = connect()
+    try:
+        snapshot = {
+            (r[0], r[1]): (r[2], r[3])
+            for r in conn.execute("""
+                SELECT schema_name, view_name, last_altered, refreshed_at
+                FROM tag_snapshot_views WHERE database_name = ? AND (? IS NULL OR schema_name = ?)
+            """, (database, schema, schema))
+        }
+    finally:
+        conn.close()
+
+    now = time.time()
+    current = {(schema_name, view_name): _timestamp(last_altered) for schema_name, view_name, last_altered in views}
+    stale = [
+        view_key for view_key, last_altered in sorted(current.items())
+        if view_key not in snapshot
+        or snapshot[view_key][0] != last_altered
+        or now - snapshot[view_key][1] > TAG_SNAPSHOT_MAX_AGE
+    ]
+    dropped = [view_key for view_key in snapshot if view_key not in current]
+
+    warnings = []
+    references = fetch_tag_references_live(session, database, stale,
+                                           max_concurrency or DEFAULT_MAX_CONCURRENCY, warnings.append)
+
+    conn = connect()
+    try:
+        for schema_name, view_name in dropped + list(references):
+            conn.execute("DELETE FROM tag_snapshot WHERE database_name = ? AND schema_name = ? AND view_name = ?",
+                         (database, schema_name, view_name))
+            conn.execute("DELETE FROM tag_snapshot_views WHERE database_name = ? AND schema_name = ? AND view_name = ?",
+                         (database, schema_name, view_name))
+        conn.executemany("INSERT INTO tag_snapshot VALUES (?, ?, ?, ?)", [
+            (database, schema_name, view_name, column_name)
+            for (schema_name, view_name), columns in references.items()
+            for column_name in columns
+        ])
+        conn.executemany("INSERT INTO tag_snapshot_views VALUES (?, ?, ?, ?, ?)", [
+            (database, schema_name, view_name, current[(schema_name, view_name)], now)
+            for schema_name, view_name in references
+        ])
+        conn.commit()
+    finally:
+        conn.close()
+    return warnings
+
+def invalidate_tag_snapshot():
+    """Drop the snapshot so the next refresh re-reads every masked view's tags"""
+    conn = connect()
+    try:
+        conn.execute("DELETE FROM tag_snapshot")
+        conn.execute("DELETE FROM tag_snapshot_views")
+        conn.commit()
+    finally:
+        conn.close()
+
+def tag_snapshot(databases, schema=None):
+    """Snapshot tags as {database: {schema: [[view, column], ...]}}"""
+    conn = connect()
+    try:
+        snapshot = {database: {} for database in databases}
+        for row in conn.execute("""
+            SELECT database_name, schema_name, view_name, column_name
+            FROM tag_snapshot WHERE ? IS NULL OR schema_name = ?
+            ORDER BY database_name, schema_name, view_name, column_name
+        """, (schema, schema)):
+            if row[0] in snapshot:
+                snapshot[row[0]].setdefault(row[1], []).append([row[2], row[3]])
+        return snapshot
+    finally:
+        conn.close()
+
+# ---------------------------------------------------------------------------
+# Validation result cache
+# ---------------------------------------------------------------------------
+
+def cached_validation_results(rule, versions):
+    """Stored result rows still valid for the current object versions.
+
+    versions maps (target, source) -> version; returns (target, source) -> row for
+    every pair whose result was stored under the same version.
+    """
+    conn = connect()
+    try:
+        cached = {}
+        for target, source, version, result in conn.execute(
+                "SELECT target, source, version, result FROM validation_cache WHERE rule = ?", (rule,)):
+            if versions.get((target, source)) == version:
+                cached[(target, source)] = json.loads(result)
+        return cached
+    finally:
+        conn.close()
+
+def store_validation_results(rule, entries):
+    """Remember result rows given as (target, source, version, row)"""
+    conn = connect()
+    try:
+        conn.executemany("INSERT OR REPLACE INTO validation_cache VALUES (?, ?, ?, ?, ?, ?)", [
+            (rule, target, source, version, json.dumps(row, default=str), time.time())
+            for target, source, version, row in entries
+        ])
+        conn.commit()
+    finally:
+        conn.close()
+
+def invalidate_validation_cache():
+    """Forget every cached validation result"""
+    conn = connect()
+    try:
+        conn.execute("DELETE FROM validation_cache")
+        conn.commit()
+    finally:
+        conn.close()
+
+# ---------------------------------------------------------------------------
+# Validation watermarks
+# ---------------------------------------------------------------------------
+
+def validation_watermarks(env, rule, database, load_group, load_type):
+    """audit_recon load each table last passed the rule at for the load group and type, as {(schema, table): last_load}"""
+    conn = connect()
+    try:
+        return {
+            (r[0], r[1]): r[2]
+            for r in conn.execute("""
+                SELECT schema_name, table_name, last_load FROM load_watermarks
+                WHERE env = ? AND rule = ? AND database_name = ? AND load_group = ? AND load_type = ?
+            """, (env, rule, database, load_group, load_type))
+        }
+    finally:
+        conn.close()
+
+def store_validation_watermarks(env, rule, database, load_group, load_type, entries):
+    """Record (schema, table, last_load) entries for tables that passed the rule under the load group and type"""
+    conn = connect()
+    try:
+        conn.executemany("INSERT OR REPLACE INTO load_watermarks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+            (env, rule, database, load_group, load_type, schema_name, table_name, last_load, time.time())
+            for schema_name, table_name, last_load in entries
+        ])
+        conn.commit()
+    finally:
+        conn.close()
+
+def invalidate_validation_watermarks():
+    """Forget every watermark so the next incremental run validates all tables"""
+    conn = connect()
+    try:
+        conn.execute("DELETE FROM load_watermarks")
+        conn.commit()
+    finally:
+        conn.close()
@@ -6,6 +6,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import time
+from validation_engine import fetch_column_index, fetch_table_index
 
 # Page configuration
 st.set_page_config(
@@ -1098,36 +1099,6 @@ elif page == "🔐 Encryption DQ":
             st.error(f"Error fetching classification data: {e}")
             return []
 
-    def check_table_column_exists_in_actual(database, schema, table_name, column_name):
-        """Check if table and column exist in actual database"""
-        try:
-            check_query = f"""
-                SELECT COUNT(*) as count
-                FROM {database}.INFORMATION_SCHEMA.COLUMNS
-                WHERE TABLE_SCHEMA = '{schema}'
-                AND TABLE_NAME = '{table_name}'
-                AND COLUMN_NAME = '{column_name}'
-            """
-            result = session.sql(check_query).collect()
-            return result[0]['COUNT'] > 0 if result else False
-        except:
-            return False
-
-    def check_table_column_exists_in_encrypted(encrypt_database, schema, table_name, column_name):
-        """Check if table and column exist in encrypted database"""
-        try:
-            check_query = f"""
-                SELECT COUNT(*) as count
-                FROM {encrypt_database}.INFORMATION_SCHEMA.COLUMNS
-                WHERE TABLE_SCHEMA = '{schema}'
-                AND TABLE_NAME = '{table_name}'
-                AND COLUMN_NAME = '{column_name}'
-            """
-            result = session.sql(check_query).collect()
-            return result[0]['COUNT'] > 0 if result else False
-        except:
-            return False
-
     def run_encryption_validation(env, selected_database, selected_schema, classification_owner):
         """Run encryption validation comparing actual vs encrypted data"""
         with st.spinner("🔄 Running encryption validation..."):
@@ -1141,6 +1112,10 @@ elif page == "🔐 Encryption DQ":
                 st.warning("⚠️ No classification data found for the selected criteria.")
                 return pd.DataFrame([])
 
+            # One column inventory per database answers every existence check
+            actual_columns = fetch_column_index(session, selected_database, selected_schema)
+            encrypted_columns = fetch_column_index(session, encrypt_database, selected_schema)
+
             results = []
             progress_bar = st.progress(0)
             
@@ -1148,10 +1123,10 @@ elif page == "🔐 Encryption DQ":
                 progress_bar.progress((idx + 1) / len(classification_data))
                 
                 # Check if table and column exist in actual database
-                actual_exists = check_table_column_exists_in_actual(selected_database, selected_schema, table_name, column_name)
+                actual_exists = (table_name, column_name) in actual_columns
                 
                 # Check if table and column exist in encrypted database
-                encrypted_exists = check_table_column_exists_in_encrypted(encrypt_database, selected_schema, table_name, column_name)
+                encrypted_exists = (table_name, column_name) in encrypted_columns
                 
                 # Determine test case result
                 if actual_exists and encrypted_exists:
@@ -1189,59 +1164,29 @@ elif page == "🔐 Encryption DQ":
         with st.spinner("🔄 Running table-level encryption validation..."):
             encrypt_database = f"{selected_database}_ENCRYPT"
             
-            # Get unique tables from classification
+            # Unique classified tables; rows are emitted in sorted order so reruns line up
             classification_data = get_tables_and_columns_from_classification(env, selected_database, selected_schema, classification_owner)
-            unique_tables = list(set([table for table, _ in classification_data]))
+            classified_tables = {table for table, _ in classification_data}
             
-            if not unique_tables:
+            if not classified_tables:
                 st.warning("⚠️ No tables found in classification data.")
                 return pd.DataFrame([])
 
+            # One table inventory per database; presence on each side is a set operation
+            actual_tables = classified_tables & fetch_table_index(session, selected_database, selected_schema)
+            encrypted_tables = classified_tables & fetch_table_index(session, encrypt_database, selected_schema)
+            outcomes = {
+                "Table exists in both actual and encrypted databases": actual_tables & encrypted_tables,
+                "Table exists in actual but missing in encrypted database": actual_tables - encrypted_tables,
+                "Table exists in encrypted but missing in actual database": encrypted_tables - actual_tables,
+                "Table missing in both actual and encrypted databases": classified_tables - actual_tables - encrypted_tables
+            }
+            table_details = {table: details for details, tables in outcomes.items() for table in tables}
+
             results = []
-            progress_bar = st.progress(0)
-            
-            for idx, table_name in enumerate(unique_tables):
-                progress_bar.progress((idx + 1) / len(unique_tables))
-                
-                # Check if table exists in actual database
-                try:
-                    actual_table_query = f"""
-                        SELECT COUNT(*) as count
-                        FROM {selected_database}.INFORMATION_SCHEMA.TABLES
-                        WHERE TABLE_SCHEMA = '{selected_schema}'
-                        AND TABLE_NAME = '{table_name}'
-                    """
-                    actual_result = session.sql(actual_table_query).collect()
-                    actual_table_exists = actual_result[0]['COUNT'] > 0 if actual_result else False
-                except:
-                    actual_table_exists = False
-                
-                # Check if table exists in encrypted database
-                try:
-                    encrypted_table_query = f"""
-                        SELECT COUNT(*) as count
-                        FROM {encrypt_database}.INFORMATION_SCHEMA.TABLES
-                        WHERE TABLE_SCHEMA = '{selected_schema}'
-                        AND TABLE_NAME = '{table_name}'
-                    """
-                    encrypted_result = session.sql(encrypted_table_query).collect()
-                    encrypted_table_exists = encrypted_result[0]['COUNT'] > 0 if encrypted_result else False
-                except:
-                    encrypted_table_exists = False
-                
-                # Determine test case result
-                if actual_table_exists and encrypted_table_exists:
-                    test_case = "SUCCESS"
-                    details = "Table exists in both actual and encrypted databases"
-                elif actual_table_exists and not encrypted_table_exists:
-                    test_case = "FAILURE"
-                    details = "Table exists in actual but missing in encrypted database"
-                elif not actual_table_exists and encrypted_table_exists:
-                    test_case = "FAILURE"
-                    details = "Table exists in encrypted but missing in actual database"
-                else:
-                    test_case = "FAILURE"
-                    details = "Table missing in both actual and encrypted databases"
+            for table_name in sorted(classified_tables):
+                actual_table_exists = table_name in actual_tables
+                encrypted_table_exists = table_name in encrypted_tables
                 
                 results.append({
                     "Environment": env,
@@ -1252,11 +1197,10 @@ elif page == "🔐 Encryption DQ":
                     "Classification Owner": classification_owner,
                     "Actual DB Table Exists": "Yes" if actual_table_exists else "No",
                     "Encrypted DB Table Exists": "Yes" if encrypted_table_exists else "No",
-                    "Test Case": test_case,
-                    "Details": details
+                    "Test Case": "SUCCESS" if actual_table_exists and encrypted_table_exists else "FAILURE",
+                    "Details": table_details[table_name]
                 })
 
-            progress_bar.empty()
             return pd.DataFrame(results)
 
     # UI Controls
@@ -0,0 +1,65 @@
+"""Local Snowpark session stand-in for exercising the validation engines without Snowflake."""
+import pandas as pd
+
+
+class FakeAsyncJob:
+    def __init__(self, rows=None, error=None):
+        self.rows, self.error = rows, error
+
+    def is_done(self):
+        return True
+
+    def result(self):
+        if self.error is not None:
+            raise self.error
+        return self.rows
+
+
+class FakeDataFrame:
+    def __init__(self, session, query):
+        self.session, self.query = session, query
+
+    def collect(self):
+        self.session.queries.append(self.query)
+        return self.session.respond(self.query)
+
+    def collect_nowait(self):
+        try:
+            return FakeAsyncJob(self.collect())
+        except Exception as e:
+            return FakeAsyncJob(error=e)
+
+
+class FakeSproc:
+    def __init__(self):
+        self.registered = []
+
+    def register(self, func, **kwargs):
+        self.registered.append((func, kwargs))
+
+
+class FakeSession:
+    """Answers session.sql() with the rows of the first rule whose marker occurs in the query.
+
+    A rule's rows may be an exception, which the query then raises. Every query is
+    recorded in queries so tests can assert on the generated SQL.
+    """
+
+    def __init__(self, rules=()):
+        self.rules = list(rules)
+        self.queries = []
+        self.sproc = FakeSproc()
+
+    def sql(self, query):
+        return FakeDataFrame(self, query)
+
+    def respond(self, query):
+        for marker, rows in self.rules:
+            if marker in query:
+                if isinstance(rows, Exception):
+                    raise rows
+                return rows
+        raise AssertionError(f"Unexpected query: {query}")
+
+    def create_dataframe(self, data, schema=None):
+        return data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
@@ -0,0 +1,17 @@
+import local_store
+
+
+def test_validation_watermarks_are_kept_per_load_group_and_type(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_store, "STORE_PATH", str(tmp_path / "zdq_store.sqlite"))
+    monkeypatch.setattr(local_store, "_schema_ready", False)
+
+    local_store.store_validation_watermarks("DEV", "DATA VALIDATION", "DB", "G1", "FULL", [("S", "T1", "7")])
+    local_store.store_validation_watermarks("DEV", "DATA VALIDATION", "DB", "G2", "FULL", [("S", "T1", "9")])
+
+    assert local_store.validation_watermarks("DEV", "DATA VALIDATION", "DB", "G1", "FULL") == {("S", "T1"): "7"}
+    assert local_store.validation_watermarks("DEV", "DATA VALIDATION", "DB", "G2", "FULL") == {("S", "T1"): "9"}
+    assert local_store.validation_watermarks("DEV", "DATA VALIDATION", "DB", "G1", "INCREMENTAL") == {}
+
+    local_store.invalidate_validation_watermarks()
+
+    assert local_store.validation_watermarks("DEV", "DATA VALIDATION", "DB", "G1", "FULL") == {}
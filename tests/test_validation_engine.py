@@ -0,0 +1,406 @@
+import pytest
+from snowflake.snowpark import Row
+
+import validation_engine as ve
+from fakes import FakeSession
+
+PARAMS = {
+    "environment": "DEV",
+    "database": "DB",
+    "schema": "S",
+    "load_group": "G",
+    "load_type": "FULL",
+    "source_db_type": "SQLSERVER",
+}
+
+TABLES = ("TABLE_TYPE = 'BASE TABLE'", [Row(TABLE_SCHEMA="S", TABLE_NAME="T1"), Row(TABLE_SCHEMA="S", TABLE_NAME="T2")])
+
+RECON = ("FULL OUTER JOIN", [
+    Row(SOURCE_TABLE="T1", SOURCE_ROWS=10, TARGET_TABLE="T1", TARGET_ROWS=10),
+    Row(SOURCE_TABLE="T2", SOURCE_ROWS=10, TARGET_TABLE="T2", TARGET_ROWS=8),
+    Row(SOURCE_TABLE="T3", SOURCE_ROWS=5, TARGET_TABLE=None, TARGET_ROWS=None),
+])
+
+
+def results_by_table(rows):
+    return {row["Table"]: row for row in rows}
+
+
+def test_count_validation_evaluates_each_pair():
+    session = FakeSession([RECON])
+
+    rows = {row["SOURCE_TABLE"]: row for row in ve.run_validation_rule(session, "COUNT VALIDATION", PARAMS)}
+
+    assert rows["T1"]["Test Case"] == "SUCCESS"
+    assert rows["T2"]["Details"] == "Source count is greater than target count"
+    assert rows["T3"]["Details"] == "Table missing in target"
+
+
+@pytest.mark.parametrize("compare_mode, responses", [
+    ("MINUS DIFF", [("VW_RAW_T1", [Row(DIFF_COUNT=0)]), ("VW_RAW_T2", [Row(DIFF_COUNT=3)])]),
+    ("FINGERPRINT", [
+        ("VW_RAW_T1", [Row(TARGET_HASH=1, TARGET_ROWS=10, VIEW_HASH=1, VIEW_ROWS=10)]),
+        ("HASH_AGG", [Row(TARGET_HASH=1, TARGET_ROWS=10, VIEW_HASH=2, VIEW_ROWS=10)]),
+        ("VW_RAW_T2", [Row(DIFF_COUNT=3)]),
+    ]),
+    ("SINGLE SCAN", [
+        ("VW_RAW_T1", [Row(T2V_DIFF=0, V2T_DIFF=0, DUP_COUNT=0)]),
+        ("VW_RAW_T2", [Row(T2V_DIFF=3, V2T_DIFF=3, DUP_COUNT=0)]),
+    ]),
+])
+def test_data_validation_compare_modes_agree(compare_mode, responses):
+    session = FakeSession([TABLES] + responses)
+
+    rows = results_by_table(ve.run_validation_rule(session, "DATA VALIDATION", dict(PARAMS, compare_mode=compare_mode)))
+
+    assert rows["T1"]["Test Case"] == "SUCCESS"
+    assert (rows["T2"]["Test Case"], rows["T2"]["TARGET VS VIEW"], rows["T2"]["VIEW VS TARGET"]) == ("FAILURE", 3, 3)
+
+
+def test_data_validation_reports_query_errors_as_failures():
+    session = FakeSession([TABLES, ("VW_RAW_T1", RuntimeError("warehouse suspended")), ("VW_RAW_T2", [Row(DIFF_COUNT=0)])])
+    warnings = []
+
+    rows = results_by_table(ve.data_validation_rows(session, [("S", "T1"), ("S", "T2")], "DB", "FULL", "G", "DEV",
+                                                    on_warning=warnings.append))
+
+    assert (rows["T1"]["Test Case"], rows["T1"]["TARGET VS VIEW"]) == ("FAILURE", -1)
+    assert rows["T2"]["Test Case"] == "SUCCESS"
+    assert len(warnings) == 1
+
+
+def test_cdc_window_filters_on_watermark_and_checks_soft_deletes():
+    session = FakeSession([
+        ("UNAPPLIED_DELETES", [Row(UNAPPLIED_DELETES=1)]),
+        ("VW_RAW_T1", [Row(T2V_DIFF=0, V2T_DIFF=0, CHANGED_ROWS=4, DELETED_ROWS=0, HIGH_WATER="2026-10-02 00:00:00")]),
+        ("VW_RAW_T2", [Row(T2V_DIFF=0, V2T_DIFF=0, CHANGED_ROWS=2, DELETED_ROWS=1, HIGH_WATER="2026-10-03 00:00:00")]),
+    ])
+
+    rows = results_by_table(ve.data_validation_rows(
+        session, [("S", "T1"), ("S", "T2")], "DB", "FULL", "G", "DEV", compare_mode="CDC WINDOW",
+        cdc_since={("S", "T1"): "2026-10-01 00:00:00"}))
+
+    t1_query = next(q for q in session.queries if "DB.S.T1" in q)
+    assert "_SNOWFLAKE_UPDATED_AT > '2026-10-01 00:00:00'" in t1_query
+    assert f"DATEADD(minute, -{ve.CDC_SAFETY_LAG_MINUTES}, MAX(_SNOWFLAKE_UPDATED_AT))" in t1_query
+    assert (rows["T1"]["Test Case"], rows["T1"]["High Water"]) == ("SUCCESS", "2026-10-02 00:00:00")
+    assert rows["T2"]["Window Start"] == "FULL TABLE"
+    assert (rows["T2"]["Test Case"], rows["T2"]["Unapplied Deletes"]) == ("FAILURE", 1)
+    assert sum("UNAPPLIED_DELETES" in q for q in session.queries) == 1
+
+
+def test_duplicate_validation_counts_duplicate_groups():
+    session = FakeSession([TABLES, ("DB.S.T1", [Row(DUP_COUNT=0)]), ("DB.S.T2", [Row(DUP_COUNT=2)])])
+
+    rows = results_by_table(ve.run_validation_rule(session, "DUPLICATE VALIDATION", PARAMS))
+
+    assert rows["T1"]["Test Case"] == "SUCCESS"
+    assert (rows["T2"]["Test Case"], rows["T2"]["DUP COUNT"]) == ("FAILURE", 2)
+
+
+def test_ingestion_suite_combines_counts_scans_and_missing_tables():
+    session = FakeSession([
+        TABLES, RECON,
+        ("VW_RAW_T1", [Row(T2V_DIFF=0, V2T_DIFF=0, DUP_COUNT=0)]),
+        ("VW_RAW_T2", [Row(T2V_DIFF=0, V2T_DIFF=0, DUP_COUNT=1)]),
+    ])
+
+    rows = results_by_table(ve.run_validation_rule(session, "ALL INGESTION RULES", PARAMS))
+
+    assert rows["T1"]["Test Case"] == "SUCCESS"
+    assert rows["T2"]["Details"] == "Source count is greater than target count; Duplicate rows in target"
+    assert (rows["T3"]["Schema"], rows["T3"]["Test Case"], rows["T3"]["Details"]) == ("S", "FAILURE", "Table missing in target")
+
+
+def test_run_validation_procedure_keeps_mixed_columns_as_text_and_nulls_as_nulls():
+    session = FakeSession([
+        TABLES,
+        ("VW_RAW_T1", [Row(T2V_DIFF=0, V2T_DIFF=0, CHANGED_ROWS=0, DELETED_ROWS=0, HIGH_WATER=None)]),
+        ("VW_RAW_T2", [Row(T2V_DIFF=0, V2T_DIFF=0, CHANGED_ROWS=1, DELETED_ROWS=0, HIGH_WATER="2026-10-03 00:00:00")]),
+    ])
+
+    frame = ve.run_validation_procedure(session, "DATA VALIDATION", dict(PARAMS, compare_mode="CDC WINDOW"))
+
+    assert frame["High Water"].tolist() == [None, "2026-10-03 00:00:00"]
+    assert frame["Window Start"].tolist() == ["FULL TABLE", "FULL TABLE"]
+
+
+def test_run_validation_procedure_returns_empty_frame_without_rows():
+    session = FakeSession([("TABLE_TYPE = 'BASE TABLE'", [])])
+
+    frame = ve.run_validation_procedure(session, "DUPLICATE VALIDATION", PARAMS)
+
+    assert frame.empty
+
+
+def test_register_validation_procedure_ships_the_engine_module():
+    session = FakeSession()
+
+    name = ve.register_validation_procedure(session)
+
+    (handler, options), = session.sproc.registered
+    assert handler is ve.run_validation_procedure
+    assert name == options["name"] == ve.VALIDATION_PROCEDURE_NAME
+    assert options["is_permanent"] is False
+    assert options["imports"][0].endswith("validation_engine.py")
+
+
+class StagingSession(FakeSession):
+    """FakeSession whose create_dataframe(...).write.save_as_table records the tables it creates"""
+
+    def __init__(self, rules=()):
+        super().__init__(rules)
+        self.saved_tables = {}
+
+    def create_dataframe(self, data, schema=None):
+        session = self
+
+        class Writer:
+            def save_as_table(self, table_name, mode=None, table_type=None):
+                session.saved_tables[table_name] = (len(data), table_type)
+
+        return type("StagedFrame", (), {"write": Writer()})()
+
+
+def test_masking_sweep_stages_large_tag_sets_in_a_temporary_table(monkeypatch):
+    monkeypatch.setattr(ve, "TAG_REFERENCES_INLINE_LIMIT", 2)
+    session = StagingSession([("DROP TABLE", []), ("tag_references AS", [])])
+    tag_references = {
+        "BIG": {"S": [["V1", "A"], ["V1", "B"], ["V2", "C"]]},
+        "SMALL": {"S": [["V1", "A"]]},
+    }
+
+    ve.masking_sweep_rows(session, "DEV", ["BIG", "SMALL"], "OWNER", tag_provider="SNAPSHOT",
+                          tag_references=tag_references)
+
+    (table_name, (row_count, table_type)), = session.saved_tables.items()
+    assert (row_count, table_type) == (3, "temporary")
+    big_query = next(q for q in session.queries if "BIG_MASKED" in q)
+    small_query = next(q for q in session.queries if "SMALL_MASKED" in q)
+    assert f"FROM {table_name}" in big_query and "FROM VALUES" not in big_query
+    assert "FROM VALUES ('S', 'V1', 'A')" in small_query
+    assert f"DROP TABLE IF EXISTS {table_name}" in session.queries
+
+
+def test_procedure_tag_references_sends_large_databases_to_account_usage(monkeypatch):
+    monkeypatch.setattr(ve, "TAG_REFERENCES_INLINE_LIMIT", 2)
+    tag_references = {
+        "BIG": {"S": [["V1", "A"], ["V1", "B"], ["V2", "C"]]},
+        "SMALL": {"S": [["V1", "A"]]},
+    }
+
+    kept, fallen_back = ve.procedure_tag_references(tag_references)
+
+    assert kept == {"BIG": None, "SMALL": {"S": [["V1", "A"]]}}
+    assert fallen_back == ["BIG"]
+    assert ve.procedure_tag_references(None) == (None, [])
+
+
+def test_account_usage_tag_references_skip_view_level_tags():
+    query = ve.build_masking_validation_query("DEV", "DB", "S", "OWNER")
+
+    tag_cte = query[query.index("tag_references AS"):]
+    assert "COLUMN_NAME IS NOT NULL" in tag_cte[:tag_cte.index("),")]
+
+
+MASKING_PARAMS = dict(PARAMS, classification_owner="OWNER")
+
+MASKING_COUNTS = dict(TABLE_COUNT=2, MD_TABLE_COUNT=2, COLUMN_COUNT=5, MD_COLUMN_COUNT=5, DATA_SET_COUNT=5,
+                      VIEW_COUNT=2, CLASSIFIED_COUNT=3, TAG_COUNT=2)
+
+
+def results_by_validation(rows):
+    return {row["Validation"]: row for row in rows}
+
+
+def test_masking_validation_reads_every_check_from_the_fused_query():
+    session = FakeSession([("check_items", [Row(SCHEMA_NAME="S", **MASKING_COUNTS)])])
+
+    rows = results_by_validation(ve.run_validation_rule(session, "MASKING VALIDATION", MASKING_PARAMS))
+
+    assert list(rows) == ve.MASKING_VALIDATION_STEPS
+    assert rows["MD Columns"]["Test Case"] == "SUCCESS"
+    assert (rows["Tags"]["Source Count"], rows["Tags"]["Target Count"], rows["Tags"]["Test Case"]) == (3, 2, "FAILURE")
+    assert len(session.queries) == 1
+
+
+def test_masking_validation_falls_back_to_per_check_queries_with_a_warning():
+    session = FakeSession([
+        ("check_items", RuntimeError("Database 'DB_MASKED' does not exist")),
+        ("DB_MASKED.INFORMATION_SCHEMA.VIEWS", RuntimeError("Database 'DB_MASKED' does not exist")),
+        ("ACCOUNT_USAGE.TAG_REFERENCES", [Row(TAG_COUNT=0)]),
+        ("CLASSIFICATION_DETAILS", [Row(TOTAL_RECORDS=3)]),
+        ("MASKING.DATA_SET", [Row(TOTAL_RECORDS=5)]),
+        ("MASKING.MD_COLUMN", [Row(COLUMN_COUNT=5)]),
+        ("COUNT(*) AS TABLE_COUNT", [Row(TABLE_COUNT=2)]),
+        ("INFORMATION_SCHEMA.COLUMNS", [Row(COLUMN_COUNT=5)]),
+        ("INFORMATION_SCHEMA.TABLES", [Row(TABLE_COUNT=2)]),
+    ])
+    warnings = []
+
+    rows = results_by_validation(ve.masking_validation_rows(session, "DEV", "DB", "S", "OWNER",
+                                                            on_warning=warnings.append))
+
+    assert all(rows[check]["Test Case"] == "SUCCESS" for check in ("MD Tables", "MD Columns", "Data Set"))
+    assert rows["Views"]["Source Count"] is None
+    assert "does not exist" in rows["Views"]["Target Count"]
+    assert (rows["Tags"]["Source Count"], rows["Tags"]["Target Count"]) == (3, 0)
+    (warning,) = warnings
+    assert "running the checks one by one" in warning
+
+
+def test_masking_sweep_reports_each_schema_and_fails_unreachable_databases():
+    session = FakeSession([
+        ("DB1_MASKED", [Row(SCHEMA_NAME="S1", **MASKING_COUNTS), Row(SCHEMA_NAME="S2", **dict(MASKING_COUNTS, TAG_COUNT=3))]),
+        ("DB2_MASKED", RuntimeError("Database 'DB2_MASKED' does not exist")),
+    ])
+
+    rows = ve.run_validation_rule(session, "MASKING SWEEP", dict(MASKING_PARAMS, databases=["DB1", "DB2"]))
+
+    tags = {(row["Database"], row["Schema"]): row["Test Case"] for row in rows if row["Validation"] == "Tags"}
+    assert tags == {("DB1", "S1"): "FAILURE", ("DB1", "S2"): "SUCCESS", ("DB2", ve.MASKING_ALL_SCHEMAS): "FAILURE"}
+    db2_rows = [row for row in rows if row["Database"] == "DB2"]
+    assert len(db2_rows) == len(ve.MASKING_VALIDATION_STEPS)
+    assert all("does not exist" in row["Target Count"] for row in db2_rows)
+
+
+def test_compare_masked_values_counts_unchanged_values_per_column():
+    rows = [("a", "x", "b", "b"), ("c", None, None, None)]
+
+    compared, unchanged = ve.compare_masked_values(rows, 2)
+
+    assert compared.tolist() == [2, 1]
+    assert unchanged.tolist() == [0, 1]
+
+
+def test_masked_content_pairs_rows_on_the_key_or_passthrough_columns():
+    session = FakeSession([
+        ("CLASSIFICATION_DETAILS", [Row(TABLE_NAME="T1", COLUMN_NAME="SSN"), Row(TABLE_NAME="T2", COLUMN_NAME="EMAIL")]),
+        ("SHOW PRIMARY KEYS", [Row(table_name="T1", key_sequence=1, column_name="ID")]),
+        ("TABLE_NAME, ROW_COUNT", []),
+        ("INFORMATION_SCHEMA.COLUMNS", [Row(TABLE_NAME="T1", COLUMN_NAME="ID"), Row(TABLE_NAME="T1", COLUMN_NAME="SSN"),
+                                        Row(TABLE_NAME="T2", COLUMN_NAME="CITY"), Row(TABLE_NAME="T2", COLUMN_NAME="EMAIL")]),
+        ("DB_MASKED.S.T1", [Row(CLEAR_0="123", MASKED_0="***"), Row(CLEAR_0="456", MASKED_0="***")]),
+        ("DB_MASKED.S.T2", RuntimeError("Insufficient privileges")),
+    ])
+
+    rows = results_by_table(ve.run_validation_rule(session, "MASKED CONTENT", MASKING_PARAMS))
+
+    assert (rows["T1"]["Test Case"], rows["T1"]["Sampled Rows"], rows["T1"]["Unchanged Rows"]) == ("SUCCESS", 2, 0)
+    assert "joined on ID" in rows["T1"]["Details"]
+    assert "HASH(o.CITY) = HASH(m.CITY)" in next(q for q in session.queries if "DB_MASKED.S.T2" in q)
+    assert rows["T2"]["Test Case"] == "FAILURE"
+    assert "Insufficient privileges" in rows["T2"]["Details"]
+
+
+ENCRYPTION_CATALOG = [
+    ("SHOW PRIMARY KEYS", [Row(table_name=table, key_sequence=1, column_name="ID") for table in ("T1", "T2", "T3")]),
+    ("TABLE_NAME, ROW_COUNT", []),
+    ("DB_ENCRYPT.INFORMATION_SCHEMA.COLUMNS", [Row(TABLE_NAME="T1", COLUMN_NAME="SSN"), Row(TABLE_NAME="T2", COLUMN_NAME="NAME")]),
+    ("DB.INFORMATION_SCHEMA.COLUMNS", [Row(TABLE_NAME="T1", COLUMN_NAME="SSN"), Row(TABLE_NAME="T2", COLUMN_NAME="NAME"),
+                                       Row(TABLE_NAME="T3", COLUMN_NAME="EMAIL")]),
+]
+
+ENCRYPTION_CLASSIFICATION = ("CLASSIFICATION_DETAILS", [
+    Row(TABLE_NAME="T1", COLUMN_NAME="SSN"), Row(TABLE_NAME="T2", COLUMN_NAME="NAME"), Row(TABLE_NAME="T3", COLUMN_NAME="EMAIL"),
+])
+
+
+def test_encrypted_columns_sample_fails_a_column_with_one_row_left_in_clear():
+    session = FakeSession([ENCRYPTION_CLASSIFICATION] + ENCRYPTION_CATALOG + [
+        ("DB.S.T1", [Row(ROW_KEY=1, SSN="111"), Row(ROW_KEY=2, SSN="222")]),
+        ("DB_ENCRYPT.S.T1", [Row(ROW_KEY=1, SSN="x9Qa"), Row(ROW_KEY=2, SSN="pL3z")]),
+        ("DB.S.T2", [Row(ROW_KEY=1, NAME="ann"), Row(ROW_KEY=2, NAME="bob")]),
+        ("DB_ENCRYPT.S.T2", [Row(ROW_KEY=1, NAME="Zk2w"), Row(ROW_KEY=2, NAME="bob")]),
+    ])
+
+    rows = results_by_table(ve.run_validation_rule(session, "ENCRYPTED COLUMNS", MASKING_PARAMS))
+
+    assert rows["T1"]["Test Case"] == "SUCCESS"
+    assert (rows["T2"]["Test Case"], rows["T2"]["Details"]) == (
+        "FAILURE", "Data not encrypted or identical - Compared 2 records, 1 different, 1 unchanged")
+    assert (rows["T3"]["Test Case"], rows["T3"]["Details"]) == ("FAILURE", "Column missing - Original: Yes, Encrypted: No")
+
+
+def test_encrypted_columns_keyed_join_compares_each_table_in_one_statement():
+    session = FakeSession([ENCRYPTION_CLASSIFICATION] + ENCRYPTION_CATALOG + [
+        ("JOIN DB_ENCRYPT.S.T1 e", [Row(MATCHED_ROWS=2, COMPARED_0=2, EQUAL_0=0)]),
+        ("JOIN DB_ENCRYPT.S.T2 e", RuntimeError("warehouse suspended")),
+    ])
+
+    rows = results_by_table(ve.run_validation_rule(session, "ENCRYPTED COLUMNS",
+                                                   dict(MASKING_PARAMS, compare_mode="KEYED JOIN")))
+
+    assert (rows["T1"]["Test Case"], rows["T1"]["Original Count"]) == ("SUCCESS", 2)
+    assert rows["T2"]["Test Case"] == "FAILURE"
+    assert "warehouse suspended" in rows["T2"]["Details"]
+    assert sum("JOIN DB_ENCRYPT" in q for q in session.queries) == 2
+
+
+def ciphertext_profile(original, encrypted):
+    """Profile row for one column: each side is (avg length, DIGIT, UPPER, LOWER shares)"""
+    profile = {"E_PLAIN_LEN_0": 0.0}
+    for prefix, (length, digit, upper, lower) in (("O", original), ("E", encrypted)):
+        profile.update({f"{prefix}_NONNULL_0": 100, f"{prefix}_DISTINCT_0": 100, f"{prefix}_AVG_LEN_0": length,
+                        f"{prefix}_DIGIT_0": digit, f"{prefix}_UPPER_0": upper, f"{prefix}_LOWER_0": lower})
+    return Row(**profile)
+
+
+def test_encrypted_columns_profile_flags_unchanged_profiles():
+    session = FakeSession([ENCRYPTION_CLASSIFICATION] + ENCRYPTION_CATALOG + [
+        ("DB_ENCRYPT.S.T1", [ciphertext_profile((9, 1.0, 0, 0), (44, 0.1, 0.45, 0.45))]),
+        ("DB_ENCRYPT.S.T2", [ciphertext_profile((6, 0, 0.2, 0.8), (6, 0, 0.2, 0.8))]),
+    ])
+
+    rows = results_by_table(ve.run_validation_rule(session, "ENCRYPTED COLUMNS",
+                                                   dict(MASKING_PARAMS, compare_mode="PROFILE")))
+
+    assert rows["T1"]["Test Case"] == "SUCCESS"
+    assert rows["T2"]["Test Case"] == "FAILURE"
+    assert "Profile unchanged" in rows["T2"]["Details"]
+
+
+NON_ENCRYPTION_CATALOG = [
+    ("COLUMN_NAME NOT LIKE 'ROW_%'", [Row(TABLE_NAME="T1", COLUMN_NAME="ID"), Row(TABLE_NAME="T1", COLUMN_NAME="SSN"),
+                                      Row(TABLE_NAME="T2", COLUMN_NAME="CITY")]),
+    ("CLASSIFICATION_DETAILS", [Row(TABLE_NAME="T1", COLUMN_NAME="SSN")]),
+    ("SHOW PRIMARY KEYS", [Row(table_name="T1", key_sequence=1, column_name="ID")]),
+    ("TABLE_NAME, ROW_COUNT", []),
+    ("INFORMATION_SCHEMA.COLUMNS", [Row(TABLE_NAME="T1", COLUMN_NAME="ID"), Row(TABLE_NAME="T1", COLUMN_NAME="SSN"),
+                                    Row(TABLE_NAME="T2", COLUMN_NAME="CITY")]),
+]
+
+
+def test_non_encrypted_columns_sample_by_key_and_by_smallest_values():
+    session = FakeSession(NON_ENCRYPTION_CATALOG + [
+        ("DB.S.T1", [Row(ROW_KEY=11, ID=1), Row(ROW_KEY=22, ID=2)]),
+        ("DB_ENCRYPT.S.T1", [Row(ROW_KEY=22, ID=2), Row(ROW_KEY=11, ID=1)]),
+        ("DB.S.T2", [Row(ROW_KEY=None, CITY="Austin"), Row(ROW_KEY=None, CITY="Boston")]),
+        ("DB_ENCRYPT.S.T2", [Row(ROW_KEY=None, CITY="Austin"), Row(ROW_KEY=None, CITY="q8Xz")]),
+    ])
+
+    rows = results_by_table(ve.run_validation_rule(session, "NON-ENCRYPTED COLUMNS", MASKING_PARAMS))
+
+    assert set(rows) == {"T1", "T2"}
+    assert rows["T1"]["Test Case"] == "SUCCESS"
+    assert "HASH(ID) AS ROW_KEY" in next(q for q in session.queries if "DB.S.T1" in q)
+    assert (rows["T2"]["Test Case"], rows["T2"]["Details"]) == (
+        "FAILURE", "Data unexpectedly different - Compared 2 records, 1 different, 1 unchanged")
+
+
+def test_non_encrypted_columns_fingerprint_compares_whole_columns():
+    session = FakeSession(NON_ENCRYPTION_CATALOG + [
+        ("DB.S.T1", [Row(ROW_COUNT=2, HASH_0=7)]),
+        ("DB_ENCRYPT.S.T1", [Row(ROW_COUNT=2, HASH_0=7)]),
+        ("DB.S.T2", [Row(ROW_COUNT=2, HASH_0=8)]),
+        ("DB_ENCRYPT.S.T2", RuntimeError("Object 'DB_ENCRYPT.S.T2' does not exist")),
+    ])
+
+    rows = results_by_table(ve.run_validation_rule(session, "NON-ENCRYPTED COLUMNS",
+                                                   dict(MASKING_PARAMS, compare_mode="FINGERPRINT")))
+
+    assert (rows["T1"]["Test Case"], rows["T1"]["Details"]) == (
+        "SUCCESS", "Data identical (not encrypted) - Full-column fingerprint matches (2 original rows, 2 encrypted rows)")
+    assert rows["T2"]["Test Case"] == "FAILURE"
+    assert "does not exist" in rows["T2"]["Details"]
+    assert sum("HASH_AGG" in q for q in session.queries) == 4
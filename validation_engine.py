@@ -0,0 +1,2150 @@
+"""ZDQ validation engines.
+
+SQL builders and validation runners shared by the Streamlit pages and the
+ZDQ_RUN_VALIDATION stored procedure. Every function takes the Snowpark session
+explicitly and nothing here imports streamlit, so this module can be shipped
+as a stored procedure import and run entirely inside Snowflake.
+"""
+import json
+import math
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+from snowflake.snowpark.types import StringType, StructField, StructType, VariantType
+
+# Environment to database mapping
+ENV_DB_MAP = {
+    "DEV": "dev_db_manager",
+    "QA": "qa_db_manager",
+    "UAT": "uat_db_manager",
+    "PROD": "prod_db_manager"
+}
+
+# Environment to raw data lake mapping
+ENV_DATALAKE_MAP = {
+    "DEV": "dev_datalake",
+    "QA": "qa_datalake",
+    "UAT": "uat_datalake",
+    "PROD": "prod_datalake"
+}
+
+# Audit columns left out of target vs raw view comparisons
+TARGET_EXCLUDE_COLUMNS = "ROW_CRE_DT, ROW_MOD_DT, ROW_CRE_USR_ID, ROW_MOD_USR_ID, RAW_ROW_CRE_DT"
+VIEW_EXCLUDE_COLUMNS = "RAW_ROW_CRE_DT"
+
+# Change tracking columns stamped by the Openflow ingestion flows
+CDC_COLUMNS = "_SNOWFLAKE_INSERTED_AT, _SNOWFLAKE_UPDATED_AT, _SNOWFLAKE_DELETED"
+# Openflow stamps _SNOWFLAKE_UPDATED_AT before the row is committed, so a row can land
+# after a run with a stamp older than the newest one that run saw. Each window's high
+# water is held back this many minutes, and the next window re-reads that overlap.
+CDC_SAFETY_LAG_MINUTES = 15
+
+# Data validation comparison modes
+DATA_COMPARE_MODES = ["MINUS DIFF", "FINGERPRINT", "SINGLE SCAN", "CDC WINDOW"]
+
+# Async query execution settings
+DEFAULT_MAX_CONCURRENCY = 8
+ASYNC_POLL_INTERVAL = 0.25
+
+# Encrypted column comparison modes
+ENCRYPTED_COMPARE_MODES = ["SAMPLE", "KEYED JOIN", "PROFILE"]
+NON_ENCRYPTED_COMPARE_MODES = ["SAMPLE", "FINGERPRINT"]
+
+# Ciphertext profile: character classes with their alphabet sizes, and the
+# thresholds that decide whether an encrypted column's profile really moved
+PROFILE_CHARACTER_CLASSES = {"DIGIT": ("0-9", 10), "UPPER": ("A-Z", 26), "LOWER": ("a-z", 26)}
+PROFILE_OTHER_CLASS_SIZE = 33
+PROFILE_MIN_LENGTH_SHIFT = 1.0
+PROFILE_MIN_CLASS_SHIFT = 0.1
+PROFILE_MIN_ENTROPY_SHIFT = 0.5
+PROFILE_MIN_DISTINCT_KEPT = 0.9
+PROFILE_PARTIAL_SHARE = 0.2
+
+# Encryption sampling levels: (confidence, smallest share of bad rows that must be caught)
+SAMPLING_LEVELS = {
+    "Quick": (0.90, 0.05),
+    "Standard": (0.95, 0.01),
+    "Sign-off": (0.99, 0.001)
+}
+DEFAULT_SAMPLING_LEVEL = "Standard"
+SAMPLE_SEED = 20240101
+# Key-hash sampling: rows fall into SAMPLE_BUCKETS buckets by a hash of their key,
+# and a few more buckets than the sample needs are read to absorb uneven buckets
+SAMPLE_BUCKETS = 10000
+SAMPLE_BUCKET_MARGIN = 1.2
+
+# Masking checks in the order they are run and reported
+MASKING_VALIDATION_STEPS = ["MD Tables", "MD Columns", "Data Set", "Views", "Tags"]
+MASKING_SWEEP_SCOPES = ["Selected Schema", "All Schemas", "All Databases"]
+MASKING_ALL_SCHEMAS = "(all schemas)"
+
+# Name-level masking diffs: check -> (source CTE, target CTE, object name expression)
+MASKING_NAME_CHECKS = {
+    "MD Tables": ("base_tables", "md_tables", "TABLE_NAME"),
+    "MD Columns": ("base_columns", "md_columns", "TABLE_NAME || '.' || COLUMN_NAME"),
+    "Data Set": ("md_columns", "data_set", "TABLE_NAME || '.' || COLUMN_NAME"),
+    "Views": ("base_tables", "masked_views", "TABLE_NAME"),
+    "Tags": ("classified_columns", "tag_references", "TABLE_NAME || '.' || COLUMN_NAME")
+}
+MASKING_NAME_LIMIT = 50
+
+# Where the Tags check reads tag assignments from
+TAG_COVERAGE_PROVIDERS = ["ACCOUNT USAGE", "LIVE", "SNAPSHOT"]
+# Provider rows are inlined as VALUES up to this many; above it they are staged in a
+# temporary table so the statement stays well inside Snowflake's SQL text limit
+TAG_REFERENCES_INLINE_LIMIT = 5000
+
+# Stored procedure wrapping run_validation_rule
+VALIDATION_PROCEDURE_NAME = "ZDQ_RUN_VALIDATION"
+VALIDATION_PROCEDURE_RULES = [
+    "COUNT VALIDATION", "DATA VALIDATION", "DUPLICATE VALIDATION", "ALL INGESTION RULES",
+    "MASKING VALIDATION", "MASKING SWEEP", "MASKED CONTENT", "ENCRYPTED COLUMNS", "NON-ENCRYPTED COLUMNS"
+]
+
+def _noop(*args):
+    pass
+
+def to_prod_database(selected_database):
+    """Classification details are always stored with PROD database names"""
+    return selected_database.replace("DEV_", "PROD_").replace("QA_", "PROD_").replace("UAT_", "PROD_")
+
+def to_environment_database(selected_database, environment):
+    """The same database in another environment, e.g. DEV_SALES -> QA_SALES"""
+    return to_prod_database(selected_database).replace("PROD_", f"{environment}_")
+
+# ---------------------------------------------------------------------------
+# Data ingestion
+# ---------------------------------------------------------------------------
+
+def execute_async_queries(session, queries, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+    """Run queries as Snowpark async jobs, at most max_concurrency at a time.
+
+    queries is a dict of key -> SQL. Yields (key, rows, error) as each job finishes.
+    """
+    pending = list(queries.items())
+    running = {}
+
+    while pending or running:
+        while pending and len(running) < max_concurrency:
+            key, query = pending.pop(0)
+            try:
+                running[key] = session.sql(query).collect_nowait()
+            except Exception as e:
+                yield key, None, e
+
+        finished = [key for key, job in running.items() if job.is_done()]
+        if not finished:
+            time.sleep(ASYNC_POLL_INTERVAL)
+            continue
+
+        for key in finished:
+            job = running.pop(key)
+            try:
+                yield key, job.result(), None
+            except Exception as e:
+                yield key, None, e
+
+def get_count_reconciliation(session, load_group, load_type, source_db_type, environment):
+    """Pair source and SNOWFLAKE audit_recon rows by table name in a single FULL OUTER JOIN"""
+    db_name = ENV_DB_MAP.get(environment)
+    if not db_name: return []
+
+    query = f"""
+        WITH recon AS (
+            SELECT upper(table_name) as table_name, db_type, row_count FROM {db_name}.public.audit_recon
+            WHERE LOAD_GROUP IN ('{load_group}') AND LOAD_TYPE IN ('{load_type}')
+            AND db_type IN ('{source_db_type}', 'SNOWFLAKE')
+            QUALIFY ROW_NUMBER() OVER (PARTITION BY db_type, TABLE_NAME ORDER BY ROW_CRE_DT) = 1
+        ),
+        src AS (SELECT table_name, row_count FROM recon WHERE db_type = '{source_db_type}'),
+        tgt AS (SELECT table_name, row_count FROM recon WHERE db_type = 'SNOWFLAKE')
+        SELECT s.table_name AS source_table, s.row_count AS source_rows,
+               t.table_name AS target_table, t.row_count AS target_rows
+        FROM src s
+        FULL OUTER JOIN tgt t ON s.table_name = t.table_name
+        ORDER BY COALESCE(s.table_name, t.table_name)
+    """
+
+    rows = session.sql(query).collect()
+    return [{
+        'source_table': r['SOURCE_TABLE'],
+        'source_rows': r['SOURCE_ROWS'],
+        'target_table': r['TARGET_TABLE'],
+        'target_rows': r['TARGET_ROWS']
+    } for r in rows]
+
+def fetch_validation_tables(session, environment, selected_db, selected_schema, load_group, load_type):
+    """Base tables of a schema with audit_recon entries for the load group and load type, as (schema, table) pairs"""
+    query = f"""
+        SELECT TABLE_SCHEMA, TABLE_NAME
+        FROM {selected_db}.INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = '{selected_schema}'
+        AND TABLE_TYPE = 'BASE TABLE'
+        AND TABLE_NAME IN (
+            SELECT DISTINCT UPPER(TABLE_NAME)
+            FROM {ENV_DB_MAP[environment]}.public.audit_recon
+            WHERE LOAD_GROUP IN ('{load_group}')
+            AND LOAD_TYPE IN ('{load_type}')
+        )
+        ORDER BY TABLE_NAME
+    """
+    return [(row['TABLE_SCHEMA'], row['TABLE_NAME']) for row in session.sql(query).collect()]
+
+def fetch_load_watermarks(session, environment, load_group, load_type):
+    """Latest audit_recon ROW_CRE_DT per table for the load group and load type, as text keyed by upper-case table name"""
+    query = f"""
+        SELECT UPPER(TABLE_NAME) AS TABLE_NAME, MAX(ROW_CRE_DT) AS LAST_LOAD
+        FROM {ENV_DB_MAP[environment]}.public.audit_recon
+        WHERE LOAD_GROUP IN ('{load_group}')
+        AND LOAD_TYPE IN ('{load_type}')
+        GROUP BY UPPER(TABLE_NAME)
+    """
+    return {row['TABLE_NAME']: str(row['LAST_LOAD']) for row in session.sql(query).collect() if row['LAST_LOAD'] is not None}
+
+def evaluate_count_pair(pair):
+    """Return (test result, details) for one reconciled source/target count pair"""
+    if pair['target_table'] is None:
+        return "FAILURE", "Table missing in target"
+    if pair['source_table'] is None:
+        return "FAILURE", "Table missing in source"
+    if pair['source_rows'] == pair['target_rows']:
+        return "SUCCESS", ""
+    if (pair['source_rows'] or 0) > (pair['target_rows'] or 0):
+        return "FAILURE", "Source count is greater than target count"
+    return "FAILURE", "Target count is greater than source count"
+
+def build_minus_diff_queries(selected_db, source_db_name, schema_name, table_name):
+    """Build the target vs view and view vs target MINUS diff count queries for a table"""
+    target_rows = f"""
+        SELECT * EXCLUDE ({TARGET_EXCLUDE_COLUMNS})
+        FROM {selected_db}.{schema_name}.{table_name}
+    """
+    view_rows = f"""
+        SELECT DISTINCT * EXCLUDE ({VIEW_EXCLUDE_COLUMNS})
+        FROM {source_db_name}.{schema_name}.VW_RAW_{table_name}
+    """
+    return {
+        "T2V": f"SELECT COUNT(*) AS DIFF_COUNT FROM ({target_rows} MINUS {view_rows})",
+        "V2T": f"SELECT COUNT(*) AS DIFF_COUNT FROM ({view_rows} MINUS {target_rows})"
+    }
+
+def build_fingerprint_query(selected_db, source_db_name, schema_name, table_name):
+    """Build an order-independent HASH_AGG and COUNT fingerprint of the distinct target and view rows.
+
+    Both sides are de-duplicated so matching fingerprints mean both MINUS diffs are empty.
+    """
+    return f"""
+        WITH tgt AS (
+            SELECT HASH_AGG(*) AS ROW_HASH, COUNT(*) AS ROW_COUNT FROM (
+                SELECT DISTINCT * EXCLUDE ({TARGET_EXCLUDE_COLUMNS})
+                FROM {selected_db}.{schema_name}.{table_name}
+            )
+        ),
+        vw AS (
+            SELECT HASH_AGG(*) AS ROW_HASH, COUNT(*) AS ROW_COUNT FROM (
+                SELECT DISTINCT * EXCLUDE ({VIEW_EXCLUDE_COLUMNS})
+                FROM {source_db_name}.{schema_name}.VW_RAW_{table_name}
+            )
+        )
+        SELECT tgt.ROW_HASH AS TARGET_HASH, tgt.ROW_COUNT AS TARGET_ROWS,
+               vw.ROW_HASH AS VIEW_HASH, vw.ROW_COUNT AS VIEW_ROWS
+        FROM tgt, vw
+    """
+
+def build_single_scan_diff_query(selected_db, source_db_name, schema_name, table_name):
+    """Build one query returning both directional diff counts from a single scan of the target and view.
+
+    Rows from both sides are hashed and grouped, so a hash seen on only one side is a difference.
+    The same grouping yields DUP_COUNT, the number of target rows that occur more than once.
+    """
+    return f"""
+        SELECT
+            COUNT_IF(TARGET_CNT > 0 AND VIEW_CNT = 0) AS T2V_DIFF,
+            COUNT_IF(VIEW_CNT > 0 AND TARGET_CNT = 0) AS V2T_DIFF,
+            COUNT_IF(TARGET_CNT > 1) AS DUP_COUNT
+        FROM (
+            SELECT ROW_HASH, COUNT_IF(SIDE = 'T') AS TARGET_CNT, COUNT_IF(SIDE = 'V') AS VIEW_CNT
+            FROM (
+                SELECT HASH(*) AS ROW_HASH, 'T' AS SIDE FROM (
+                    SELECT * EXCLUDE ({TARGET_EXCLUDE_COLUMNS})
+                    FROM {selected_db}.{schema_name}.{table_name}
+                )
+                UNION ALL
+                SELECT HASH(*) AS ROW_HASH, 'V' AS SIDE FROM (
+                    SELECT * EXCLUDE ({VIEW_EXCLUDE_COLUMNS})
+                    FROM {source_db_name}.{schema_name}.VW_RAW_{table_name}
+                )
+            )
+            GROUP BY ROW_HASH
+        )
+    """
+
+def _cdc_window(since):
+    return "TRUE" if since is None else f"_SNOWFLAKE_UPDATED_AT > {_sql_literal(since)}"
+
+def build_cdc_window_query(selected_db, source_db_name, schema_name, table_name, since=None):
+    """Build one query diffing only the target and view rows changed after since.
+
+    Both sides are filtered on _SNOWFLAKE_UPDATED_AT, so the scan follows the change
+    volume rather than the table size; soft-deleted rows are left out of the diff and
+    counted instead. HIGH_WATER is the newest change seen in the view window less
+    CDC_SAFETY_LAG_MINUTES, so rows committed late are still inside the next window;
+    an empty window keeps since. A since of None compares the whole table.
+    """
+    window = _cdc_window(since)
+    high_water = f"DATEADD(minute, -{CDC_SAFETY_LAG_MINUTES}, MAX(_SNOWFLAKE_UPDATED_AT))"
+    return f"""
+        WITH tgt AS (
+            SELECT * EXCLUDE ({TARGET_EXCLUDE_COLUMNS})
+            FROM {selected_db}.{schema_name}.{table_name}
+            WHERE {window}
+        ),
+        vw AS (
+            SELECT DISTINCT * EXCLUDE ({VIEW_EXCLUDE_COLUMNS})
+            FROM {source_db_name}.{schema_name}.VW_RAW_{table_name}
+            WHERE {window}
+        ),
+        live_tgt AS (SELECT * FROM tgt WHERE NOT COALESCE(_SNOWFLAKE_DELETED, FALSE)),
+        live_vw AS (SELECT * FROM vw WHERE NOT COALESCE(_SNOWFLAKE_DELETED, FALSE))
+        SELECT
+            (SELECT COUNT(*) FROM (SELECT * FROM live_tgt MINUS SELECT * FROM live_vw)) AS T2V_DIFF,
+            (SELECT COUNT(*) FROM (SELECT * FROM live_vw MINUS SELECT * FROM live_tgt)) AS V2T_DIFF,
+            (SELECT COUNT(*) FROM vw) AS CHANGED_ROWS,
+            (SELECT COUNT_IF(_SNOWFLAKE_DELETED) FROM vw) AS DELETED_ROWS,
+            (SELECT {high_water} FROM vw) AS HIGH_WATER
+    """
+
+def build_cdc_delete_query(selected_db, source_db_name, schema_name, table_name, since=None):
+    """Build a count of rows soft-deleted in the view window that are still live in the target.
+
+    Rows are matched on a hash of their content without the audit and change tracking
+    columns, so it holds whether the target keeps deleted rows flagged or drops them.
+    """
+    return f"""
+        SELECT COUNT(*) AS UNAPPLIED_DELETES FROM (
+            SELECT HASH(*) AS ROW_HASH FROM (
+                SELECT * EXCLUDE ({VIEW_EXCLUDE_COLUMNS}, {CDC_COLUMNS})
+                FROM {source_db_name}.{schema_name}.VW_RAW_{table_name}
+                WHERE {_cdc_window(since)} AND _SNOWFLAKE_DELETED
+            )
+        )
+        WHERE ROW_HASH IN (
+            SELECT HASH(*) FROM (
+                SELECT * EXCLUDE ({TARGET_EXCLUDE_COLUMNS}, {CDC_COLUMNS})
+                FROM {selected_db}.{schema_name}.{table_name}
+                WHERE NOT COALESCE(_SNOWFLAKE_DELETED, FALSE)
+            )
+        )
+    """
+
+def fetch_object_versions(session, database, schemas):
+    """LAST_ALTERED and ROW_COUNT of every table and view in the given schemas from one INFORMATION_SCHEMA.TABLES query"""
+    schema_list = ", ".join(f"'{schema}'" for schema in schemas)
+    try:
+        rows = session.sql(f"""
+            SELECT TABLE_SCHEMA, TABLE_NAME, LAST_ALTERED, ROW_COUNT
+            FROM {database}.INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA IN ({schema_list})
+        """).collect()
+    except:
+        return {}
+    return {
+        (row['TABLE_SCHEMA'], row['TABLE_NAME']): f"{row['LAST_ALTERED']}|{row['ROW_COUNT']}"
+        for row in rows if row['LAST_ALTERED'] is not None
+    }
+
+def ingestion_table_versions(session, tables, selected_db, environment):
+    """Target table, raw view and version of each (schema, table), for caching results per table.
+
+    The version joins the metadata of the target table, its VW_RAW_ view and the
+    view's RAW_ table; it is None when any of them is unknown, so that table is
+    always validated.
+    """
+    source_db_name = ENV_DATALAKE_MAP.get(environment, f"{selected_db}_RAW")
+    schemas = sorted({schema_name for schema_name, _ in tables})
+    if not schemas:
+        return {}
+    target_versions = fetch_object_versions(session, selected_db, schemas)
+    source_versions = fetch_object_versions(session, source_db_name, schemas)
+
+    versions = {}
+    for schema_name, table_name in tables:
+        parts = [
+            target_versions.get((schema_name, table_name)),
+            source_versions.get((schema_name, f"VW_RAW_{table_name}")),
+            source_versions.get((schema_name, f"RAW_{table_name}"))
+        ]
+        versions[(schema_name, table_name)] = (
+            f"{selected_db}.{schema_name}.{table_name}",
+            f"{source_db_name}.{schema_name}.VW_RAW_{table_name}",
+            " / ".join(parts) if all(parts) else None
+        )
+    return versions
+
+def count_validation_rows(session, selected_load_group, load_type, source_db_type, environment):
+    rows = []
+    for p in get_count_reconciliation(session, selected_load_group, load_type, source_db_type, environment):
+        test_result, detail_msg = evaluate_count_pair(p)
+
+        rows.append({
+            "Load Type": load_type,
+            "Load Group": selected_load_group,
+            "Environment": environment,
+            "SOURCE_TABLE": p['source_table'] or 'N/A',
+            "SOURCE_ROWS": p['source_rows'] if p['source_rows'] is not None else 0,
+            "TARGET_TABLE": p['target_table'] or 'N/A',
+            "TARGET_ROWS": p['target_rows'] if p['target_rows'] is not None else 0,
+            "Test Case": test_result,
+            "Details": detail_msg
+        })
+    return rows
+
+def data_validation_rows(session, tables, selected_db, load_type, selected_load_group, environment,
+                         max_concurrency=DEFAULT_MAX_CONCURRENCY, compare_mode="MINUS DIFF", cdc_since=None,
+                         on_progress=_noop, on_warning=_noop, on_row=_noop):
+    """Target vs raw view diff per table; on_row receives each table's row as soon as it is known.
+
+    In CDC WINDOW mode only rows changed after cdc_since[(schema, table)] are compared,
+    and each row carries the window's change counts and the High Water to resume from.
+    """
+    source_db_name = ENV_DATALAKE_MAP.get(environment, f"{selected_db}_RAW")
+    cdc_since = cdc_since or {}
+
+    diffs = {}
+    completed = 0
+
+    def table_row(schema_name, table_name):
+        table_diffs = diffs.get((schema_name, table_name), {})
+        if "ERROR" in table_diffs:
+            t2v_diff = v2t_diff = -1
+        else:
+            t2v_diff = table_diffs.get("T2V", -1)
+            v2t_diff = table_diffs.get("V2T", -1)
+
+        unapplied_deletes = -1 if "ERROR" in table_diffs else table_diffs.get("UNAPPLIED", 0)
+
+        test_case_result = "SUCCESS" if t2v_diff == 0 and v2t_diff == 0 and unapplied_deletes == 0 else "FAILURE"
+
+        row = {
+            "Load Type": load_type,
+            "Load Group": selected_load_group,
+            "Environment": environment,
+            "Database": selected_db,
+            "Schema": schema_name,
+            "Table": table_name,
+            "TARGET VS VIEW": t2v_diff,
+            "VIEW VS TARGET": v2t_diff,
+            "Test Case": test_case_result
+        }
+        if compare_mode == "CDC WINDOW":
+            since = cdc_since.get((schema_name, table_name))
+            high_water = table_diffs.get("HIGH_WATER")
+            row.update({
+                "Window Start": since or "FULL TABLE",
+                "Changed Rows": table_diffs.get("CHANGED", -1),
+                "Deleted Rows": table_diffs.get("DELETED", -1),
+                "Unapplied Deletes": unapplied_deletes,
+                "High Water": str(high_water) if high_water is not None else since
+            })
+        return row
+
+    # Fingerprint fast path: only tables whose fingerprints differ pay for the MINUS diff
+    diff_tables = tables
+    if compare_mode == "FINGERPRINT":
+        fingerprint_queries = {
+            (schema_name, table_name): build_fingerprint_query(selected_db, source_db_name, schema_name, table_name)
+            for schema_name, table_name in tables
+        }
+        diff_tables = []
+        for table_key, rows, error in execute_async_queries(session, fingerprint_queries, max_concurrency):
+            fingerprint = rows[0] if rows else None
+            if (error is None and fingerprint is not None
+                    and fingerprint['TARGET_HASH'] == fingerprint['VIEW_HASH']
+                    and fingerprint['TARGET_ROWS'] == fingerprint['VIEW_ROWS']):
+                diffs[table_key] = {"T2V": 0, "V2T": 0}
+                completed += 1
+                on_progress(completed / len(tables))
+                on_row(table_row(*table_key))
+            else:
+                diff_tables.append(table_key)
+
+    queries = {}
+    for schema_name, table_name in diff_tables:
+        if compare_mode == "SINGLE SCAN":
+            queries[(schema_name, table_name, "BOTH")] = build_single_scan_diff_query(
+                selected_db, source_db_name, schema_name, table_name)
+        elif compare_mode == "CDC WINDOW":
+            queries[(schema_name, table_name, "CDC")] = build_cdc_window_query(
+                selected_db, source_db_name, schema_name, table_name, cdc_since.get((schema_name, table_name)))
+        else:
+            for direction, query in build_minus_diff_queries(selected_db, source_db_name, schema_name, table_name).items():
+                queries[(schema_name, table_name, direction)] = query
+
+    for (schema_name, table_name, direction), rows, error in execute_async_queries(session, queries, max_concurrency):
+        table_diffs = diffs.setdefault((schema_name, table_name), {})
+        if error is not None:
+            if "ERROR" not in table_diffs:
+                on_warning(f"⚠️ Error comparing {schema_name}.{table_name}: {error}")
+            table_diffs["ERROR"] = error
+            for key in (("T2V", "V2T") if direction in ("BOTH", "CDC") else (direction,)):
+                table_diffs[key] = -1
+        elif direction in ("BOTH", "CDC"):
+            table_diffs["T2V"] = rows[0]['T2V_DIFF'] if rows else 0
+            table_diffs["V2T"] = rows[0]['V2T_DIFF'] if rows else 0
+            if direction == "CDC" and rows:
+                table_diffs["CHANGED"] = rows[0]['CHANGED_ROWS']
+                table_diffs["DELETED"] = rows[0]['DELETED_ROWS'] or 0
+                table_diffs["HIGH_WATER"] = rows[0]['HIGH_WATER']
+        else:
+            table_diffs[direction] = rows[0]['DIFF_COUNT'] if rows else 0
+        # Tables with soft deletes in their window wait for the delete check below
+        if "T2V" in table_diffs and "V2T" in table_diffs and not table_diffs.get("DELETED"):
+            completed += 1
+            on_progress(completed / len(tables))
+            on_row(table_row(schema_name, table_name))
+
+    # Soft deletes: only tables that saw deletes in their window scan the target for rows still live
+    delete_queries = {
+        table_key: build_cdc_delete_query(selected_db, source_db_name, *table_key, cdc_since.get(table_key))
+        for table_key, table_diffs in diffs.items() if table_diffs.get("DELETED")
+    }
+    for table_key, rows, error in execute_async_queries(session, delete_queries, max_concurrency):
+        if error is not None:
+            on_warning(f"⚠️ Error checking deletes for {table_key[0]}.{table_key[1]}: {error}")
+            diffs[table_key]["ERROR"] = error
+        else:
+            diffs[table_key]["UNAPPLIED"] = rows[0]['UNAPPLIED_DELETES'] if rows else 0
+        completed += 1
+        on_progress(completed / len(tables))
+        on_row(table_row(*table_key))
+
+    return [table_row(schema_name, table_name) for schema_name, table_name in tables]
+
+def duplicate_validation_rows(session, tables, selected_db, load_type, selected_load_group, environment,
+                              on_progress=_noop, on_warning=_noop, on_row=_noop):
+    results = []
+    for idx, (schema_name, table_name) in enumerate(tables):
+        on_progress((idx + 1) / len(tables))
+
+        try:
+            dup_query = f"""
+                SELECT COUNT(*) AS DUP_COUNT FROM (
+                    SELECT * EXCLUDE ({TARGET_EXCLUDE_COLUMNS})
+                    FROM {selected_db}.{schema_name}.{table_name}
+                    GROUP BY ALL
+                    HAVING COUNT(*) > 1
+                )
+            """
+            result = session.sql(dup_query).collect()
+            dup_count = result[0]['DUP_COUNT'] if result else 0
+            test_case_result = "SUCCESS" if dup_count == 0 else "FAILURE"
+        except Exception as e:
+            on_warning(f"⚠️ Error checking duplicates in {schema_name}.{table_name}: {e}")
+            dup_count = -1
+            test_case_result = "FAILURE"
+
+        results.append({
+            "Load Type": load_type,
+            "Load Group": selected_load_group,
+            "Environment": environment,
+            "Database": selected_db,
+            "Schema": schema_name,
+            "Table": table_name,
+            "DUP COUNT": dup_count,
+            "Test Case": test_case_result
+        })
+        on_row(results[-1])
+    return results
+
+def ingestion_suite_rows(session, tables, selected_db, load_type, selected_load_group, environment, source_db_type,
+                         max_concurrency=DEFAULT_MAX_CONCURRENCY, selected_schema=None, known_tables=None,
+                         on_progress=_noop, on_warning=_noop, on_row=_noop):
+    """Count, Data and Duplicate validation together, one row per table.
+
+    Counts come from one audit_recon reconciliation query; the diff and duplicate
+    counts come from one single-scan statement per table. on_row receives each
+    table's row as its statement finishes. Reconciliation pairs for tables outside
+    known_tables (default: tables), which have no target table to scan, are
+    reported as failures with their count details, as COUNT VALIDATION does.
+    """
+    count_pairs = {
+        p['target_table'] or p['source_table']: p
+        for p in get_count_reconciliation(session, selected_load_group, load_type, source_db_type, environment)
+    }
+    source_db_name = ENV_DATALAKE_MAP.get(environment, f"{selected_db}_RAW")
+    queries = {
+        (schema_name, table_name): build_single_scan_diff_query(selected_db, source_db_name, schema_name, table_name)
+        for schema_name, table_name in tables
+    }
+
+    def table_row(schema_name, table_name):
+        pair = count_pairs.get(table_name, {
+            'source_table': None, 'source_rows': None, 'target_table': None, 'target_rows': None
+        })
+        count_result, count_details = evaluate_count_pair(pair)
+        scan = scans[(schema_name, table_name)]
+
+        details = []
+        if count_result == "FAILURE":
+            details.append(count_details)
+        if scan['T2V_DIFF'] != 0 or scan['V2T_DIFF'] != 0:
+            details.append("Target and view data differ")
+        if scan['DUP_COUNT'] != 0:
+            details.append("Duplicate rows in target")
+
+        return {
+            "Load Type": load_type,
+            "Load Group": selected_load_group,
+            "Environment": environment,
+            "Database": selected_db,
+            "Schema": schema_name,
+            "Table": table_name,
+            "SOURCE_ROWS": pair['source_rows'] if pair['source_rows'] is not None else 0,
+            "TARGET_ROWS": pair['target_rows'] if pair['target_rows'] is not None else 0,
+            "TARGET VS VIEW": scan['T2V_DIFF'],
+            "VIEW VS TARGET": scan['V2T_DIFF'],
+            "DUP COUNT": scan['DUP_COUNT'],
+            "Test Case": "FAILURE" if details else "SUCCESS",
+            "Details": "; ".join(details)
+        }
+
+    scans = {}
+    for table_key, rows, error in execute_async_queries(session, queries, max_concurrency):
+        if error is not None:
+            on_warning(f"⚠️ Error validating {table_key[0]}.{table_key[1]}: {error}")
+            scans[table_key] = {'T2V_DIFF': -1, 'V2T_DIFF': -1, 'DUP_COUNT': -1}
+        else:
+            scans[table_key] = rows[0].as_dict() if rows else {'T2V_DIFF': 0, 'V2T_DIFF': 0, 'DUP_COUNT': 0}
+        on_progress(len(scans) / len(tables))
+        on_row(table_row(*table_key))
+
+    known_names = {table_name for _, table_name in (tables if known_tables is None else known_tables)}
+    unscanned = []
+    for table_name, pair in sorted(count_pairs.items()):
+        if table_name in known_names:
+            continue
+        count_result, count_details = evaluate_count_pair(pair)
+        unscanned.append({
+            "Load Type": load_type,
+            "Load Group": selected_load_group,
+            "Environment": environment,
+            "Database": selected_db,
+            "Schema": selected_schema,
+            "Table": table_name,
+            "SOURCE_ROWS": pair['source_rows'] if pair['source_rows'] is not None else 0,
+            "TARGET_ROWS": pair['target_rows'] if pair['target_rows'] is not None else 0,
+            "TARGET VS VIEW": -1,
+            "VIEW VS TARGET": -1,
+            "DUP COUNT": -1,
+            "Test Case": "FAILURE",
+            "Details": count_details if count_result == "FAILURE" else "Table missing in target schema"
+        })
+        on_row(unscanned[-1])
+
+    return [table_row(schema_name, table_name) for schema_name, table_name in tables] + unscanned
+
+# ---------------------------------------------------------------------------
+# Masking
+# ---------------------------------------------------------------------------
+
+def execute_validation_queries_tags(session, env, selected_database, selected_schema, classification_owner):
+    try:
+        production_database = to_prod_database(selected_database)
+        source_tags_query = f"""
+        SELECT COUNT(*) AS total_records
+        FROM {env}_DB_MANAGER.MASKING.CLASSIFICATION_DETAILS
+        WHERE "DATABASE" = '{production_database}'
+          AND "SCHEMA" = '{selected_schema}'
+          AND CLASSIFICATION_OWNER = '{classification_owner}'
+        """
+        target_tags_query = f"""
+        SELECT COUNT(*) AS TAG_COUNT
+        FROM {env}_DB_MANAGER.ACCOUNT_USAGE.TAG_REFERENCES
+        WHERE OBJECT_DATABASE = '{selected_database}_MASKED'
+          AND OBJECT_SCHEMA = '{selected_schema}'
+          AND COLUMN_NAME IS NOT NULL
+        """
+        source_count = session.sql(source_tags_query).collect()[0][0]
+        target_count = session.sql(target_tags_query).collect()[0][0]
+        return source_count, target_count
+    except Exception as e:
+        return None, str(e)
+
+def execute_validation_queries_tables(session, env, selected_database, selected_schema):
+    try:
+        db_manager = f"{env}_DB_MANAGER"
+        count_tables_query = f"""
+        SELECT COUNT(TABLE_NAME)
+        FROM {selected_database}.INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_CATALOG = '{selected_database}'
+          AND TABLE_SCHEMA = '{selected_schema}'
+          AND TABLE_TYPE = 'BASE TABLE'
+          AND TABLE_NAME NOT LIKE 'RAW_%'
+          AND TABLE_NAME NOT LIKE 'VW_%'
+        """
+        validation_query = f"""
+        SELECT COUNT(*) AS TABLE_COUNT
+        FROM {db_manager}.MASKING.MD_TABLE t
+        JOIN {db_manager}.MASKING.MD_SCHEMA s ON t.SCHEMA_ID = s.SCHEMA_ID
+        JOIN {db_manager}.MASKING.MD_DATABASE d ON s.DATABASE_ID = d.DATABASE_ID
+        WHERE d.DATABASE_NAME = '{selected_database}'
+          AND s.SCHEMA_NAME = '{selected_schema}'
+        """
+        table_count = session.sql(count_tables_query).collect()[0][0]
+        validation_count = session.sql(validation_query).collect()[0][0]
+        return table_count, validation_count
+    except Exception as e:
+        return None, str(e)
+
+def execute_validation_queries_columns(session, env, selected_database, selected_schema):
+    try:
+        db_manager = f"{env}_DB_MANAGER"
+        count_columns_query = f"""
+        SELECT COUNT(c.COLUMN_NAME) AS COLUMN_COUNT
+        FROM {selected_database}.INFORMATION_SCHEMA.COLUMNS c
+        JOIN {selected_database}.INFORMATION_SCHEMA.TABLES t
+          ON c.TABLE_SCHEMA = t.TABLE_SCHEMA AND c.TABLE_NAME = t.TABLE_NAME
+        WHERE c.TABLE_SCHEMA = '{selected_schema}'
+          AND t.TABLE_TYPE = 'BASE TABLE'
+          AND c.TABLE_NAME NOT LIKE 'RAW_%'
+          AND c.TABLE_NAME NOT LIKE 'VW_%'
+        """
+        validation_query = f"""
+        SELECT COUNT(col.COLUMN_ID) AS COLUMN_COUNT
+        FROM {db_manager}.MASKING.MD_DATABASE db
+        JOIN {db_manager}.MASKING.MD_SCHEMA sc ON db.DATABASE_ID = sc.DATABASE_ID
+        JOIN {db_manager}.MASKING.MD_TABLE tb ON sc.SCHEMA_ID = tb.SCHEMA_ID
+        JOIN {db_manager}.MASKING.MD_COLUMN col ON tb.TABLE_ID = col.TABLE_ID
+        WHERE db.database_name='{selected_database}'
+          AND sc.schema_name='{selected_schema}'
+          AND db.IS_ACTIVE = TRUE
+          AND sc.IS_ACTIVE = TRUE
+          AND tb.IS_ACTIVE = TRUE
+          AND col.IS_ACTIVE = TRUE
+        """
+        column_count = session.sql(count_columns_query).collect()[0][0]
+        validation_count = session.sql(validation_query).collect()[0][0]
+        return column_count, validation_count
+    except Exception as e:
+        return None, str(e)
+
+def execute_validation_queries_views(session, env, selected_database, selected_schema):
+    try:
+        count_tables_query = f"""
+        SELECT COUNT(TABLE_NAME)
+        FROM {selected_database}.INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_CATALOG = '{selected_database}'
+          AND TABLE_SCHEMA = '{selected_schema}'
+          AND TABLE_TYPE = 'BASE TABLE'
+          AND TABLE_NAME NOT LIKE 'RAW_%'
+          AND TABLE_NAME NOT LIKE 'VW_%'
+        """
+        count_target_query = f"""
+        SELECT COUNT(TABLE_NAME)
+        FROM {selected_database}_MASKED.INFORMATION_SCHEMA.VIEWS
+        WHERE TABLE_SCHEMA = '{selected_schema}'
+        """
+        table_count = session.sql(count_tables_query).collect()[0][0]
+        validation_count = session.sql(count_target_query).collect()[0][0]
+        return table_count, validation_count
+    except Exception as e:
+        return None, str(e)
+
+def execute_validation_queries_data_set(session, env, selected_database, selected_schema):
+    try:
+        db_manager = f"{env}_DB_MANAGER"
+        count_columns_query = f"""
+        SELECT COUNT(col.COLUMN_ID) AS COLUMN_COUNT
+        FROM {db_manager}.MASKING.MD_DATABASE db
+        JOIN {db_manager}.MASKING.MD_SCHEMA sc ON db.DATABASE_ID = sc.DATABASE_ID
+        JOIN {db_manager}.MASKING.MD_TABLE tb ON sc.SCHEMA_ID = tb.SCHEMA_ID
+        JOIN {db_manager}.MASKING.MD_COLUMN col ON tb.TABLE_ID = col.TABLE_ID
+        WHERE db.database_name='{selected_database}'
+          AND sc.schema_name='{selected_schema}'
+          AND db.IS_ACTIVE = TRUE
+          AND sc.IS_ACTIVE = TRUE
+          AND tb.IS_ACTIVE = TRUE
+          AND col.IS_ACTIVE = TRUE
+        """
+        validation_query = f"""
+        SELECT COUNT(*) AS total_records
+        FROM (
+            SELECT DISTINCT
+                ds.data_output_id,
+                d.database_name,
+                s.schema_name,
+                t.table_name,
+                c.column_name
+            FROM {db_manager}.MASKING.DATA_SET ds
+            INNER JOIN {db_manager}.MASKING.MD_DATABASE d ON ds.database_id = d.database_id
+            INNER JOIN {db_manager}.MASKING.MD_SCHEMA s ON ds.schema_id = s.schema_id
+            INNER JOIN {db_manager}.MASKING.MD_TABLE t ON ds.TABLE_ID = t.TABLE_ID
+            INNER JOIN {db_manager}.MASKING.MD_COLUMN c ON ds.COLUMN_ID = c.COLUMN_ID
+            WHERE d.database_name = '{selected_database}'
+              AND s.schema_name = '{selected_schema}'
+              AND ds.data_output_id = (
+                  SELECT MAX(ds1.data_output_id)
+                  FROM {db_manager}.MASKING.DATA_SET ds1
+                  INNER JOIN {db_manager}.MASKING.MD_DATABASE d1 ON ds1.database_id = d1.database_id
+                  INNER JOIN {db_manager}.MASKING.MD_SCHEMA s1 ON ds1.schema_id = s1.schema_id
+                  WHERE d1.database_name = '{selected_database}'
+                    AND s1.schema_name = '{selected_schema}'
+              )
+        ) AS subquery
+        """
+        column_count = session.sql(count_columns_query).collect()[0][0]
+        data_count = session.sql(validation_query).collect()[0][0]
+        return column_count, data_count
+    except Exception as e:
+        return None, str(e)
+
+def _schema_filter(column, selected_schema):
+    """Restrict to one schema, or to every schema except INFORMATION_SCHEMA when sweeping"""
+    if selected_schema:
+        return f"AND {column} = '{selected_schema}'"
+    return f"AND {column} <> 'INFORMATION_SCHEMA'"
+
+def _name_diff_items(validation_type, direction, source_cte, target_cte, name_expr):
+    """Anti-join yielding the objects of source_cte that target_cte lacks, as check_items rows"""
+    return f"""
+            UNION ALL
+            SELECT s.SCHEMA_NAME, '{validation_type}|{direction}', s.NAME
+            FROM (SELECT DISTINCT SCHEMA_NAME, {name_expr} AS NAME FROM {source_cte}) s
+            WHERE NOT EXISTS (
+                SELECT 1 FROM (SELECT SCHEMA_NAME, {name_expr} AS NAME FROM {target_cte}) t
+                WHERE t.SCHEMA_NAME = s.SCHEMA_NAME AND t.NAME = s.NAME
+            )"""
+
+def _sql_literal(value):
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(value)
+
+def _values_rows(columns, rows):
+    """SELECT over an inline VALUES list with the given column names; no rows yields an empty result"""
+    if not rows:
+        return "SELECT " + ", ".join(f"NULL AS {column}" for column in columns) + " WHERE FALSE"
+    aliases = ", ".join(f"column{i + 1} AS {column}" for i, column in enumerate(columns))
+    values = ", ".join("(" + ", ".join(_sql_literal(value) for value in row) + ")" for row in rows)
+    return f"SELECT {aliases} FROM VALUES {values}"
+
+def _latest_data_output_cte(db_manager, selected_database, selected_schema, latest_data_outputs):
+    """latest_data_output and data_set CTEs.
+
+    latest_data_outputs maps schema -> [database_id, schema_id, data_output_id] from
+    the local DATA_SET index; the data set check is then a point lookup on those ids.
+    Without it the latest output is found with a MAX over DATA_SET.
+    """
+    if latest_data_outputs is None:
+        return f"""latest_data_output AS (
+            SELECT s.schema_name AS SCHEMA_NAME, MAX(ds.data_output_id) AS data_output_id
+            FROM {db_manager}.MASKING.DATA_SET ds
+            INNER JOIN {db_manager}.MASKING.MD_DATABASE d ON ds.database_id = d.database_id
+            INNER JOIN {db_manager}.MASKING.MD_SCHEMA s ON ds.schema_id = s.schema_id
+            WHERE d.database_name = '{selected_database}'
+              {_schema_filter("s.schema_name", selected_schema)}
+            GROUP BY s.schema_name
+        ),
+        data_set AS (
+            SELECT DISTINCT s.schema_name AS SCHEMA_NAME, ds.data_output_id, t.table_name, c.column_name
+            FROM {db_manager}.MASKING.DATA_SET ds
+            INNER JOIN {db_manager}.MASKING.MD_DATABASE d ON ds.database_id = d.database_id
+            INNER JOIN {db_manager}.MASKING.MD_SCHEMA s ON ds.schema_id = s.schema_id
+            INNER JOIN latest_data_output l
+              ON l.SCHEMA_NAME = s.schema_name AND ds.data_output_id = l.data_output_id
+            INNER JOIN {db_manager}.MASKING.MD_TABLE t ON ds.TABLE_ID = t.TABLE_ID
+            INNER JOIN {db_manager}.MASKING.MD_COLUMN c ON ds.COLUMN_ID = c.COLUMN_ID
+            WHERE d.database_name = '{selected_database}'
+        ),"""
+
+    outputs = [
+        [schema_name, database_id, schema_id, data_output_id]
+        for schema_name, (database_id, schema_id, data_output_id) in sorted(latest_data_outputs.items())
+        if not selected_schema or schema_name == selected_schema
+    ]
+    return f"""latest_data_output AS (
+            {_values_rows(["SCHEMA_NAME", "database_id", "schema_id", "data_output_id"], outputs)}
+        ),
+        data_set AS (
+            SELECT DISTINCT l.SCHEMA_NAME, ds.data_output_id, t.table_name, c.column_name
+            FROM latest_data_output l
+            INNER JOIN {db_manager}.MASKING.DATA_SET ds
+              ON ds.data_output_id = l.data_output_id AND ds.database_id = l.database_id AND ds.schema_id = l.schema_id
+            INNER JOIN {db_manager}.MASKING.MD_TABLE t ON ds.TABLE_ID = t.TABLE_ID
+            INNER JOIN {db_manager}.MASKING.MD_COLUMN c ON ds.COLUMN_ID = c.COLUMN_ID
+        ),"""
+
+def _tag_reference_rows(tag_references, selected_schema=None):
+    return [
+        [schema_name, table_name, column_name]
+        for schema_name, references in sorted(tag_references.items())
+        if not selected_schema or schema_name == selected_schema
+        for table_name, column_name in references
+    ]
+
+def _tag_references_cte(db_manager, selected_database, selected_schema, tag_references):
+    """tag_references CTE: ACCOUNT_USAGE.TAG_REFERENCES, or the rows of a faster tag provider.
+
+    tag_references maps schema -> [[view, column], ...] as returned by group_tag_references,
+    or is the name of the table stage_tag_references put them in.
+    """
+    if tag_references is None:
+        return f"""tag_references AS (
+            SELECT OBJECT_SCHEMA AS SCHEMA_NAME, OBJECT_NAME AS TABLE_NAME, COLUMN_NAME
+            FROM {db_manager}.ACCOUNT_USAGE.TAG_REFERENCES
+            WHERE OBJECT_DATABASE = '{selected_database}_MASKED'
+              AND COLUMN_NAME IS NOT NULL
+              {_schema_filter("OBJECT_SCHEMA", selected_schema)}
+        ),"""
+
+    if isinstance(tag_references, str):
+        return f"""tag_references AS (
+            SELECT SCHEMA_NAME, TABLE_NAME, COLUMN_NAME
+            FROM {tag_references}
+            WHERE TRUE {_schema_filter("SCHEMA_NAME", selected_schema)}
+        ),"""
+
+    rows = _tag_reference_rows(tag_references, selected_schema)
+    return f"""tag_references AS (
+            {_values_rows(["SCHEMA_NAME", "TABLE_NAME", "COLUMN_NAME"], rows)}
+        ),"""
+
+def stage_tag_references(session, tag_references, selected_schema=None):
+    """One database's provider tag rows as build_masking_validation_query should take them.
+
+    Up to TAG_REFERENCES_INLINE_LIMIT rows they stay inline; larger sets are written to
+    a temporary table whose name is returned instead. drop_staged_tag_references removes it.
+    """
+    if tag_references is None:
+        return None
+    rows = _tag_reference_rows(tag_references, selected_schema)
+    if len(rows) <= TAG_REFERENCES_INLINE_LIMIT:
+        return tag_references
+    table_name = f"ZDQ_TAG_REFERENCES_{uuid.uuid4().hex[:12].upper()}"
+    session.create_dataframe(rows, schema=["SCHEMA_NAME", "TABLE_NAME", "COLUMN_NAME"]).write.save_as_table(
+        table_name, mode="overwrite", table_type="temporary")
+    return table_name
+
+def procedure_tag_references(tag_references, selected_schema=None):
+    """Provider tag rows small enough to pass as a stored procedure argument.
+
+    Databases are kept while the rows passed in total stay within
+    TAG_REFERENCES_INLINE_LIMIT; the rest map to None, so the procedure reads their
+    tags from ACCOUNT_USAGE. Returns the references and the databases that fell back.
+    """
+    if tag_references is None:
+        return None, []
+    kept, fallen_back, total = {}, [], 0
+    for database, references in sorted(tag_references.items()):
+        rows = len(_tag_reference_rows(references or {}, selected_schema))
+        if total + rows <= TAG_REFERENCES_INLINE_LIMIT:
+            kept[database] = references
+            total += rows
+        else:
+            kept[database] = None
+            fallen_back.append(database)
+    return kept, fallen_back
+
+def drop_staged_tag_references(session, staged):
+    if isinstance(staged, str):
+        try:
+            session.sql(f"DROP TABLE IF EXISTS {staged}").collect()
+        except:
+            pass
+
+def _name_column(validation_type, direction):
+    return f"{validation_type.upper().replace(' ', '_')}_{direction}"
+
+def build_masking_validation_query(env, selected_database, selected_schema, classification_owner,
+                                   include_names=False, name_limit=MASKING_NAME_LIMIT, name_offset=0,
+                                   latest_data_outputs=None, tag_references=None):
+    """Build one statement computing the source and target counts of all five masking checks.
+
+    Returns one row per schema; with selected_schema=None every schema of the
+    database is covered by the same GROUP BY. The base table list and the active
+    MD columns are each read once and shared: base tables feed both MD Tables and
+    Views, MD columns feed both MD Columns and Data Set.
+
+    With include_names, anti-joins in the same statement add, per check, the
+    sorted MISSING (source only) and EXTRA (target only) object names, sliced to
+    name_limit names from name_offset, and their full counts.
+
+    latest_data_outputs is the database's entry of the local DATA_SET index and
+    tag_references the database's tagged columns from a tag provider; see
+    _latest_data_output_cte and _tag_references_cte.
+    """
+    name_diffs = ""
+    name_columns = ""
+    if include_names:
+        for validation_type, (source_cte, target_cte, name_expr) in MASKING_NAME_CHECKS.items():
+            name_diffs += _name_diff_items(validation_type, "MISSING", source_cte, target_cte, name_expr)
+            name_diffs += _name_diff_items(validation_type, "EXTRA", target_cte, source_cte, name_expr)
+            for direction in ("MISSING", "EXTRA"):
+                item = f"{validation_type}|{direction}"
+                column = _name_column(validation_type, direction)
+                name_columns += f""",
+               COUNT_IF(ITEM = '{item}') AS {column}_COUNT,
+               ARRAY_SLICE(ARRAY_AGG(IFF(ITEM = '{item}', NAME, NULL)) WITHIN GROUP (ORDER BY NAME),
+                           {name_offset}, {name_offset + name_limit}) AS {column}"""
+
+    db_manager = f"{env}_DB_MANAGER"
+    production_database = to_prod_database(selected_database)
+    return f"""
+        WITH base_tables AS (
+            SELECT TABLE_SCHEMA AS SCHEMA_NAME, TABLE_NAME
+            FROM {selected_database}.INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_CATALOG = '{selected_database}'
+              {_schema_filter("TABLE_SCHEMA", selected_schema)}
+              AND TABLE_TYPE = 'BASE TABLE'
+              AND TABLE_NAME NOT LIKE 'RAW_%'
+              AND TABLE_NAME NOT LIKE 'VW_%'
+        ),
+        base_columns AS (
+            SELECT c.TABLE_SCHEMA AS SCHEMA_NAME, c.TABLE_NAME, c.COLUMN_NAME
+            FROM {selected_database}.INFORMATION_SCHEMA.COLUMNS c
+            JOIN {selected_database}.INFORMATION_SCHEMA.TABLES t
+              ON c.TABLE_SCHEMA = t.TABLE_SCHEMA AND c.TABLE_NAME = t.TABLE_NAME
+            WHERE t.TABLE_TYPE = 'BASE TABLE'
+              {_schema_filter("c.TABLE_SCHEMA", selected_schema)}
+              AND c.TABLE_NAME NOT LIKE 'RAW_%'
+              AND c.TABLE_NAME NOT LIKE 'VW_%'
+        ),
+        md_tables AS (
+            SELECT s.SCHEMA_NAME, t.TABLE_NAME
+            FROM {db_manager}.MASKING.MD_TABLE t
+            JOIN {db_manager}.MASKING.MD_SCHEMA s ON t.SCHEMA_ID = s.SCHEMA_ID
+            JOIN {db_manager}.MASKING.MD_DATABASE d ON s.DATABASE_ID = d.DATABASE_ID
+            WHERE d.DATABASE_NAME = '{selected_database}'
+              {_schema_filter("s.SCHEMA_NAME", selected_schema)}
+        ),
+        md_columns AS (
+            SELECT sc.SCHEMA_NAME, tb.TABLE_NAME, col.COLUMN_NAME
+            FROM {db_manager}.MASKING.MD_DATABASE db
+            JOIN {db_manager}.MASKING.MD_SCHEMA sc ON db.DATABASE_ID = sc.DATABASE_ID
+            JOIN {db_manager}.MASKING.MD_TABLE tb ON sc.SCHEMA_ID = tb.SCHEMA_ID
+            JOIN {db_manager}.MASKING.MD_COLUMN col ON tb.TABLE_ID = col.TABLE_ID
+            WHERE db.database_name = '{selected_database}'
+              {_schema_filter("sc.schema_name", selected_schema)}
+              AND db.IS_ACTIVE = TRUE
+              AND sc.IS_ACTIVE = TRUE
+              AND tb.IS_ACTIVE = TRUE
+              AND col.IS_ACTIVE = TRUE
+        ),
+        {_latest_data_output_cte(db_manager, selected_database, selected_schema, latest_data_outputs)}
+        masked_views AS (
+            SELECT TABLE_SCHEMA AS SCHEMA_NAME, TABLE_NAME
+            FROM {selected_database}_MASKED.INFORMATION_SCHEMA.VIEWS
+            WHERE TRUE {_schema_filter("TABLE_SCHEMA", selected_schema)}
+        ),
+        classified_columns AS (
+            SELECT "SCHEMA" AS SCHEMA_NAME, "TABLE" AS TABLE_NAME, "COLUMN" AS COLUMN_NAME
+            FROM {db_manager}.MASKING.CLASSIFICATION_DETAILS
+            WHERE "DATABASE" = '{production_database}'
+              {_schema_filter('"SCHEMA"', selected_schema)}
+              AND CLASSIFICATION_OWNER = '{classification_owner}'
+        ),
+        {_tag_references_cte(db_manager, selected_database, selected_schema, tag_references)}
+        check_items AS (
+            SELECT SCHEMA_NAME, 'TABLE' AS ITEM, NULL AS NAME FROM base_tables
+            UNION ALL SELECT SCHEMA_NAME, 'MD_TABLE', NULL FROM md_tables
+            UNION ALL SELECT SCHEMA_NAME, 'COLUMN', NULL FROM base_columns
+            UNION ALL SELECT SCHEMA_NAME, 'MD_COLUMN', NULL FROM md_columns
+            UNION ALL SELECT SCHEMA_NAME, 'DATA_SET', NULL FROM data_set
+            UNION ALL SELECT SCHEMA_NAME, 'VIEW', NULL FROM masked_views
+            UNION ALL SELECT SCHEMA_NAME, 'CLASSIFIED', NULL FROM classified_columns
+            UNION ALL SELECT SCHEMA_NAME, 'TAG', NULL FROM tag_references{name_diffs}
+        )
+        SELECT SCHEMA_NAME,
+               COUNT_IF(ITEM = 'TABLE') AS TABLE_COUNT,
+               COUNT_IF(ITEM = 'MD_TABLE') AS MD_TABLE_COUNT,
+               COUNT_IF(ITEM = 'COLUMN') AS COLUMN_COUNT,
+               COUNT_IF(ITEM = 'MD_COLUMN') AS MD_COLUMN_COUNT,
+               COUNT_IF(ITEM = 'DATA_SET') AS DATA_SET_COUNT,
+               COUNT_IF(ITEM = 'VIEW') AS VIEW_COUNT,
+               COUNT_IF(ITEM = 'CLASSIFIED') AS CLASSIFIED_COUNT,
+               COUNT_IF(ITEM = 'TAG') AS TAG_COUNT{name_columns}
+        FROM check_items
+        GROUP BY SCHEMA_NAME
+        ORDER BY SCHEMA_NAME
+    """
+
+def masking_check_counts(row):
+    """Map a build_masking_validation_query row to (source count, target count) per masking check"""
+    row = row or {}
+    return {
+        "MD Tables": (row.get('TABLE_COUNT', 0), row.get('MD_TABLE_COUNT', 0)),
+        "MD Columns": (row.get('COLUMN_COUNT', 0), row.get('MD_COLUMN_COUNT', 0)),
+        "Data Set": (row.get('MD_COLUMN_COUNT', 0), row.get('DATA_SET_COUNT', 0)),
+        "Views": (row.get('TABLE_COUNT', 0), row.get('VIEW_COUNT', 0)),
+        "Tags": (row.get('CLASSIFIED_COUNT', 0), row.get('TAG_COUNT', 0))
+    }
+
+def masking_check_names(row, name_offset=0):
+    """Map a build_masking_validation_query row with names to (missing, extra) labels per masking check.
+
+    A label lists the page of names and, when there are more, which slice of the total it is.
+    """
+    row = row or {}
+
+    def label(column):
+        # Snowpark returns ARRAY columns as JSON text
+        names = row.get(column) or []
+        if isinstance(names, str):
+            names = json.loads(names)
+        total = row.get(f"{column}_COUNT") or 0
+        if total > len(names):
+            return f"{', '.join(names)} ({name_offset + 1}-{name_offset + len(names)} of {total})"
+        return ", ".join(names)
+
+    return {
+        validation_type: (label(_name_column(validation_type, "MISSING")), label(_name_column(validation_type, "EXTRA")))
+        for validation_type in MASKING_VALIDATION_STEPS
+    }
+
+def masking_result_rows(env, selected_database, selected_schema, counts, names=None):
+    """One result row per masking check, in MASKING_VALIDATION_STEPS order"""
+    results = []
+    for validation_type in MASKING_VALIDATION_STEPS:
+        source_count, target_count = counts[validation_type]
+        result = {
+            "Environment": env,
+            "Database": selected_database,
+            "Schema": selected_schema,
+            "Validation": validation_type,
+            "Source Count": source_count,
+            "Target Count": target_count,
+            "Test Case": "SUCCESS" if source_count == target_count else "FAILURE"
+        }
+        if names is not None:
+            result["Missing In Target"], result["Extra In Target"] = names[validation_type]
+        results.append(result)
+    return results
+
+def fetch_masked_views(session, selected_database, selected_schema=None):
+    """Views of the _MASKED copy as (schema, view, last altered) triples"""
+    rows = session.sql(f"""
+        SELECT TABLE_SCHEMA, TABLE_NAME, LAST_ALTERED
+        FROM {selected_database}_MASKED.INFORMATION_SCHEMA.VIEWS
+        WHERE TRUE {_schema_filter("TABLE_SCHEMA", selected_schema)}
+    """).collect()
+    return [(row['TABLE_SCHEMA'], row['TABLE_NAME'], row['LAST_ALTERED']) for row in rows]
+
+def fetch_tag_references_live(session, selected_database, views, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                              on_warning=_noop):
+    """Column-level tags of each (schema, view) of the _MASKED copy, read now rather than from ACCOUNT_USAGE.
+
+    One TAG_REFERENCES_ALL_COLUMNS call per view, run concurrently. Returns
+    (schema, view) -> [column, ...] with one entry per tag, like TAG_REFERENCES rows.
+    """
+    masked_database = f"{selected_database}_MASKED"
+    queries = {
+        (schema_name, view_name): f"""
+            SELECT COLUMN_NAME
+            FROM TABLE({masked_database}.INFORMATION_SCHEMA.TAG_REFERENCES_ALL_COLUMNS(
+                '{masked_database}.{schema_name}.{view_name}', 'table'))
+            WHERE LEVEL = 'COLUMN'
+        """
+        for schema_name, view_name in views
+    }
+
+    references = {}
+    for view_key, rows, error in execute_async_queries(session, queries, max_concurrency):
+        if error is not None:
+            on_warning(f"⚠️ Error reading tags of {view_key[0]}.{view_key[1]}: {error}")
+            continue
+        references[view_key] = [row['COLUMN_NAME'] for row in rows]
+    return references
+
+def group_tag_references(references):
+    """(schema, view) -> [column, ...] regrouped as schema -> [[view, column], ...]"""
+    grouped = {}
+    for (schema_name, view_name), columns in sorted(references.items()):
+        grouped.setdefault(schema_name, []).extend([view_name, column_name] for column_name in columns)
+    return grouped
+
+def live_tag_references(session, databases, selected_schema=None, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                        on_warning=_noop):
+    """LIVE tag provider: database -> schema -> [[view, column], ...] for every view of each _MASKED copy"""
+    tag_references = {}
+    for database in databases:
+        try:
+            views = [(schema_name, view_name) for schema_name, view_name, _ in
+                     fetch_masked_views(session, database, selected_schema)]
+        except Exception as e:
+            on_warning(f"⚠️ Error listing views of {database}_MASKED: {e}")
+            continue
+        tag_references[database] = group_tag_references(
+            fetch_tag_references_live(session, database, views, max_concurrency, on_warning))
+    return tag_references
+
+def masking_validation_rows(session, env, selected_database, selected_schema, classification_owner,
+                            include_names=False, name_limit=MASKING_NAME_LIMIT, name_offset=0,
+                            data_set_index=None, tag_provider="ACCOUNT USAGE", tag_references=None,
+                            on_progress=_noop, on_warning=_noop):
+    """All five masking checks in one round trip.
+
+    With include_names each row also lists the missing and extra object names.
+    Tags come from ACCOUNT_USAGE, from the LIVE provider, or from tag_references
+    (database -> schema -> [[view, column], ...]) supplied by the caller.
+    If the fused statement fails, for example because the _MASKED database does not
+    exist yet, the error goes to on_warning and the checks are rerun one by one so
+    it is reported on the check it belongs to; names are not available then.
+    """
+    names = None
+    if tag_references is None and tag_provider == "LIVE":
+        tag_references = live_tag_references(session, [selected_database], selected_schema, on_warning=on_warning)
+    staged = None
+    try:
+        staged = stage_tag_references(session, tag_references.get(selected_database) if tag_references else None,
+                                      selected_schema)
+        query = build_masking_validation_query(env, selected_database, selected_schema, classification_owner,
+                                               include_names, name_limit, name_offset,
+                                               data_set_index.get(selected_database, {}) if data_set_index else None,
+                                               staged)
+        rows = session.sql(query).collect()
+        row = rows[0].as_dict() if rows else None
+        counts = masking_check_counts(row)
+        if include_names:
+            names = masking_check_names(row, name_offset)
+        on_progress(1.0)
+    except Exception as e:
+        on_warning(f"⚠️ Combined masking query failed for {selected_database}, running the checks one by one"
+                   f"{' without object names' if include_names else ''}: {e}")
+        checks = {
+            "MD Tables": lambda: execute_validation_queries_tables(session, env, selected_database, selected_schema),
+            "MD Columns": lambda: execute_validation_queries_columns(session, env, selected_database, selected_schema),
+            "Data Set": lambda: execute_validation_queries_data_set(session, env, selected_database, selected_schema),
+            "Views": lambda: execute_validation_queries_views(session, env, selected_database, selected_schema),
+            "Tags": lambda: execute_validation_queries_tags(session, env, selected_database, selected_schema, classification_owner)
+        }
+        counts = {}
+        for idx, validation_type in enumerate(MASKING_VALIDATION_STEPS):
+            on_progress((idx + 1) / len(MASKING_VALIDATION_STEPS))
+            counts[validation_type] = checks[validation_type]()
+    finally:
+        drop_staged_tag_references(session, staged)
+
+    return masking_result_rows(env, selected_database, selected_schema, counts, names)
+
+def masking_sweep_rows(session, env, databases, classification_owner, include_names=False,
+                       name_limit=MASKING_NAME_LIMIT, name_offset=0, data_set_index=None,
+                       tag_provider="ACCOUNT USAGE", tag_references=None,
+                       max_concurrency=DEFAULT_MAX_CONCURRENCY, on_progress=_noop, on_warning=_noop,
+                       on_row=_noop):
+    """All five masking checks for every schema of every database.
+
+    One schema-grouped statement per database, run concurrently. A database whose
+    statement fails gets one FAILURE row per check carrying the error.
+    data_set_index maps database -> schema -> latest DATA_SET output ids;
+    tags are sourced as in masking_validation_rows. on_row receives each
+    database's rows as its statement finishes.
+    """
+    if tag_references is None and tag_provider == "LIVE":
+        tag_references = live_tag_references(session, databases, max_concurrency=max_concurrency, on_warning=on_warning)
+
+    # Large tag sets go through temporary tables, dropped once every statement has run
+    staged = {}
+    swept = {}
+    try:
+        for database in databases:
+            try:
+                staged[database] = stage_tag_references(session, tag_references.get(database, {}) if tag_references else None)
+            except Exception as e:
+                on_warning(f"⚠️ Could not stage tag references for {database}, reading ACCOUNT_USAGE instead: {e}")
+                staged[database] = None
+        queries = {
+            database: build_masking_validation_query(env, database, None, classification_owner,
+                                                     include_names, name_limit, name_offset,
+                                                     data_set_index.get(database, {}) if data_set_index else None,
+                                                     staged[database])
+            for database in databases
+        }
+        for done, (database, rows, error) in enumerate(execute_async_queries(session, queries, max_concurrency), 1):
+            on_progress(done / len(queries))
+            if error is not None:
+                on_warning(f"⚠️ Error sweeping {database}: {error}")
+                swept[database] = masking_result_rows(env, database, MASKING_ALL_SCHEMAS, {
+                    validation_type: (None, str(error)) for validation_type in MASKING_VALIDATION_STEPS
+                })
+            else:
+                swept[database] = []
+                for row in rows:
+                    row = row.as_dict()
+                    names = masking_check_names(row, name_offset) if include_names else None
+                    swept[database].extend(masking_result_rows(env, database, row['SCHEMA_NAME'],
+                                                               masking_check_counts(row), names))
+            for result_row in swept[database]:
+                on_row(result_row)
+    finally:
+        for staged_references in staged.values():
+            drop_staged_tag_references(session, staged_references)
+
+    return [row for database in databases for row in swept[database]]
+
+def build_masked_content_query(selected_database, selected_schema, table_name, columns, key_columns=None,
+                               align_columns=None, sample="", sample_size=100):
+    """Build one query pairing clear and masked values of a table's classified columns.
+
+    The base table is sampled and joined to its masked view on the primary key or,
+    without one, on a hash of the unclassified columns the view passes through.
+    Column i comes back as CLEAR_i and MASKED_i on the same row.
+    """
+    if key_columns:
+        join_condition = " AND ".join(f"o.{key} = m.{key}" for key in key_columns)
+    else:
+        join_condition = f"HASH({', '.join(f'o.{c}' for c in align_columns)}) = " \
+                         f"HASH({', '.join(f'm.{c}' for c in align_columns)})"
+    value_pairs = ",\n               ".join(
+        f"o.{column}::VARCHAR AS CLEAR_{i}, m.{column}::VARCHAR AS MASKED_{i}" for i, column in enumerate(columns)
+    )
+    return f"""
+        SELECT {value_pairs}
+        FROM {selected_database}.{selected_schema}.{table_name} o {sample}
+        JOIN {selected_database}_MASKED.{selected_schema}.{table_name} m ON {join_condition}
+        LIMIT {sample_size}
+    """
+
+def compare_masked_values(rows, column_count):
+    """Vectorized clear-versus-masked comparison of a build_masked_content_query result.
+
+    Returns per column the rows with a clear value and how many of them the view
+    returned unchanged, as two NumPy arrays.
+    """
+    frame = pd.DataFrame.from_records(rows, columns=[
+        f"{side}_{i}" for i in range(column_count) for side in ("CLEAR", "MASKED")
+    ])
+    clear = frame.iloc[:, 0::2].to_numpy(dtype=object)
+    masked = frame.iloc[:, 1::2].to_numpy(dtype=object)
+    compared = pd.notna(clear)
+    unchanged = compared & pd.notna(masked) & (clear == masked)
+    return compared.sum(axis=0), unchanged.sum(axis=0)
+
+def masked_content_rows(session, env, selected_database, selected_schema, classification_owner,
+                        sampling_level=DEFAULT_SAMPLING_LEVEL, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                        on_progress=_noop, on_row=_noop):
+    """Check that the masked views actually change the values of classified columns.
+
+    One aligned sample per table, run concurrently; the values are compared for all
+    columns of a table at once. The view is read with the caller's role, so a role
+    the policies let see clear values will see FAILURE rows.
+    """
+    masked_database = f"{selected_database}_MASKED"
+    classification_data = get_tables_and_columns_from_classification(session, env, selected_database, selected_schema,
+                                                                     classification_owner)
+    base_columns = fetch_column_index(session, selected_database, selected_schema)
+    view_columns = fetch_column_index(session, masked_database, selected_schema)
+    primary_keys = fetch_primary_keys(session, selected_database, selected_schema)
+    row_counts = fetch_table_row_counts(session, selected_database, selected_schema)
+    classified = set(classification_data)
+
+    table_columns = {}
+    for table_name, column_name in classification_data:
+        if (table_name, column_name) in base_columns and (table_name, column_name) in view_columns:
+            table_columns.setdefault(table_name, []).append(column_name)
+
+    # Unclassified columns the view passes through unchanged can align rows when there is no usable key
+    passthrough_columns = {}
+    for table_name, column_name in sorted(base_columns & view_columns - classified):
+        passthrough_columns.setdefault(table_name, []).append(column_name)
+
+    queries, alignments = {}, {}
+    for table_name, columns in table_columns.items():
+        key_columns = primary_keys.get(table_name)
+        if key_columns and any((table_name, key_column) in classified for key_column in key_columns):
+            key_columns = None
+        align_columns = passthrough_columns.get(table_name, [])
+        if not key_columns and not align_columns:
+            alignments[table_name] = None
+            continue
+        alignments[table_name] = ", ".join(key_columns) if key_columns else f"{len(align_columns)} unclassified columns"
+
+        row_count = row_counts.get(table_name)
+        sample_size = sample_size_for(row_count, sampling_level)
+        queries[table_name] = build_masked_content_query(selected_database, selected_schema, table_name, columns,
+                                                         key_columns, align_columns,
+                                                         sample_clause(row_count, sample_size), sample_size)
+
+    comparisons = {}
+
+    def column_row(table_name, column_name):
+        sampled = unchanged = 0
+        if (table_name, column_name) not in base_columns or (table_name, column_name) not in view_columns:
+            test_case = "FAILURE"
+            details = f"Column missing - Base Table: {'Yes' if (table_name, column_name) in base_columns else 'No'}, " \
+                      f"Masked View: {'Yes' if (table_name, column_name) in view_columns else 'No'}"
+        elif alignments[table_name] is None:
+            test_case = "FAILURE"
+            details = "No primary key or unclassified column to align base and masked rows"
+        elif isinstance(comparisons[table_name], Exception):
+            test_case = "FAILURE"
+            details = f"Error comparing data: {str(comparisons[table_name])}"
+        else:
+            i = table_columns[table_name].index(column_name)
+            sampled, unchanged = int(comparisons[table_name][0][i]), int(comparisons[table_name][1][i])
+            if not sampled:
+                test_case = "FAILURE"
+                details = f"No aligned non-null rows to compare (joined on {alignments[table_name]})"
+            else:
+                test_case = "SUCCESS" if unchanged == 0 else "FAILURE"
+                details = f"Compared {sampled} rows joined on {alignments[table_name]}, " \
+                          f"{sampled - unchanged} masked, {unchanged} returned in clear"
+
+        return {
+            "Environment": env,
+            "Database": selected_database,
+            "Masked Database": masked_database,
+            "Schema": selected_schema,
+            "Table": table_name,
+            "Column": column_name,
+            "Classification Owner": classification_owner,
+            "Sampled Rows": sampled,
+            "Unchanged Rows": unchanged,
+            "Test Case": test_case,
+            "Details": details
+        }
+
+    results = {}
+    for done, (table_name, rows, error) in enumerate(execute_async_queries(session, queries, max_concurrency), 1):
+        on_progress(done / len(queries))
+        if error is not None:
+            comparisons[table_name] = error
+        else:
+            comparisons[table_name] = compare_masked_values(rows, len(table_columns[table_name]))
+        for column_name in table_columns[table_name]:
+            results[(table_name, column_name)] = column_row(table_name, column_name)
+            on_row(results[(table_name, column_name)])
+
+    # Missing columns and tables without an alignment never ran a query
+    for table_name, column_name in classification_data:
+        if (table_name, column_name) not in results:
+            results[(table_name, column_name)] = column_row(table_name, column_name)
+            on_row(results[(table_name, column_name)])
+    return [results[(table_name, column_name)] for table_name, column_name in classification_data]
+
+# ---------------------------------------------------------------------------
+# Encryption
+# ---------------------------------------------------------------------------
+
+def get_tables_and_columns_from_classification(session, env, selected_database, selected_schema, classification_owner):
+    """Get tables and columns from classification details based on environment mapping"""
+    # Convert selected database to PROD for classification lookup
+    prod_database = to_prod_database(selected_database)
+
+    classification_query = f"""
+        SELECT DISTINCT
+            "TABLE" as table_name,
+            "COLUMN" as column_name
+        FROM {env}_DB_MANAGER.MASKING.CLASSIFICATION_DETAILS
+        WHERE "DATABASE" = '{prod_database}'
+        AND "SCHEMA" = '{selected_schema}'
+        AND CLASSIFICATION_OWNER = '{classification_owner}'
+        ORDER BY "TABLE", "COLUMN"
+    """
+
+    rows = session.sql(classification_query).collect()
+    return [(row['TABLE_NAME'], row['COLUMN_NAME']) for row in rows]
+
+def sample_size_for(row_count, sampling_level=DEFAULT_SAMPLING_LEVEL):
+    """Rows to sample so that, at the level's confidence, at least one bad row is seen
+    whenever the level's defect share of the table is bad.
+
+    n = ln(1 - confidence) / ln(1 - defect share), with a finite population
+    correction so small tables are not oversampled; never more than row_count.
+    """
+    confidence, defect_share = SAMPLING_LEVELS[sampling_level]
+    sample_size = math.ceil(math.log(1 - confidence) / math.log(1 - defect_share))
+    if row_count:
+        sample_size = min(row_count, math.ceil(sample_size / (1 + (sample_size - 1) / row_count)))
+    return sample_size
+
+def sample_clause(row_count, sample_size, seed=SAMPLE_SEED):
+    """Seeded row SAMPLE clause returning about sample_size rows, empty when the whole table is needed"""
+    if not row_count or sample_size >= row_count:
+        return ""
+    probability = max(100.0 * sample_size / row_count, 0.000001)
+    return f"SAMPLE BERNOULLI ({probability:.6f}) SEED ({seed})"
+
+def key_sample_filter(key_columns, row_count, sample_size):
+    """Predicate keeping about sample_size rows chosen by a hash of the key, empty when the whole table is needed.
+
+    The same key values always fall in the same buckets, so the predicate picks the
+    same rows from a table and from any copy of it.
+    """
+    if not row_count or sample_size >= row_count:
+        return ""
+    buckets = min(SAMPLE_BUCKETS, math.ceil(SAMPLE_BUCKETS * SAMPLE_BUCKET_MARGIN * sample_size / row_count))
+    return f"AND MOD(ABS(HASH({', '.join(key_columns)})), {SAMPLE_BUCKETS}) < {buckets}"
+
+def fetch_table_row_counts(session, database, schema):
+    """ROW_COUNT of every table in a schema from one INFORMATION_SCHEMA.TABLES query"""
+    try:
+        rows = session.sql(f"""
+            SELECT TABLE_NAME, ROW_COUNT
+            FROM {database}.INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA = '{schema}'
+        """).collect()
+        return {row['TABLE_NAME']: row['ROW_COUNT'] for row in rows}
+    except:
+        return {}
+
+def compare_column_data(session, original_db, encrypted_db, schema, table_name, column_name, sample_size=100,
+                        row_count=None, key_columns=None, expect_encrypted=False):
+    """Compare data between original and encrypted columns.
+
+    With key_columns both sides read the rows picked by key_sample_filter and values
+    are compared by key. Without a key both sides read the sample_size smallest
+    values, which are the same rows' values whenever the column is unchanged.
+    The first value returned is True when the column looks encrypted: with
+    expect_encrypted and a key that means no sampled row kept its clear value,
+    otherwise that at least one compared value differs.
+    """
+    try:
+        sample = key_sample_filter(key_columns, row_count, sample_size) if key_columns else ""
+        row_key = f"HASH({', '.join(key_columns)})" if key_columns else "NULL"
+        order_by = "ROW_KEY" if key_columns else column_name
+
+        def sample_query(database):
+            return f"""
+                SELECT {row_key} AS ROW_KEY, {column_name}
+                FROM {database}.{schema}.{table_name}
+                WHERE {column_name} IS NOT NULL {sample}
+                ORDER BY {order_by}
+                LIMIT {sample_size}
+            """
+
+        original_result = session.sql(sample_query(original_db)).collect()
+        encrypted_result = session.sql(sample_query(encrypted_db)).collect()
+
+        if not original_result or not encrypted_result:
+            return False, "No data found in one or both databases", 0, 0
+
+        # Extract values
+        original_values = [(row[0], str(row[1])) for row in original_result if row[1] is not None]
+        encrypted_values = [(row[0], str(row[1])) for row in encrypted_result if row[1] is not None]
+
+        if not original_values or not encrypted_values:
+            return False, "No valid data to compare", 0, 0
+
+        # Keyed samples pair rows by key; unkeyed ones pair the ordered values by position
+        if key_columns:
+            encrypted_by_key = dict(encrypted_values)
+            pairs = [(value, encrypted_by_key[key]) for key, value in original_values if key in encrypted_by_key]
+        else:
+            pairs = [(original[1], encrypted[1]) for original, encrypted in zip(original_values, encrypted_values)]
+
+        if not pairs:
+            return False, "No matching keys to compare", len(original_values), len(encrypted_values)
+
+        # Compare if data is different (encryption should make data different)
+        different_count = sum(1 for original, encrypted in pairs if original != encrypted)
+        unchanged_count = len(pairs) - different_count
+
+        # Keyed pairs are the same rows, so a single unchanged one is a row left in clear text
+        if expect_encrypted and key_columns:
+            is_encrypted = unchanged_count == 0
+        else:
+            is_encrypted = different_count > 0
+        comparison_details = f"Compared {len(pairs)} records, {different_count} different, {unchanged_count} unchanged"
+        if sample:
+            comparison_details += f" (key-hash sample from {row_count} rows)"
+
+        return is_encrypted, comparison_details, len(original_values), len(encrypted_values)
+
+    except Exception as e:
+        return False, f"Error comparing data: {str(e)}", 0, 0
+
+def fetch_column_index(session, database, schema):
+    """Every (table, column) pair of a schema from one INFORMATION_SCHEMA.COLUMNS query.
+
+    Existence checks become set lookups; a missing database yields an empty index.
+    """
+    try:
+        index_query = f"""
+            SELECT TABLE_NAME, COLUMN_NAME
+            FROM {database}.INFORMATION_SCHEMA.COLUMNS
+            WHERE TABLE_SCHEMA = '{schema}'
+        """
+        return {(row['TABLE_NAME'], row['COLUMN_NAME']) for row in session.sql(index_query).collect()}
+    except:
+        return set()
+
+def fetch_table_index(session, database, schema):
+    """Every table name of a schema from one INFORMATION_SCHEMA.TABLES query; a missing database yields an empty set"""
+    try:
+        rows = session.sql(f"""
+            SELECT TABLE_NAME
+            FROM {database}.INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA = '{schema}'
+        """).collect()
+        return {row['TABLE_NAME'] for row in rows}
+    except:
+        return set()
+
+def fetch_primary_keys(session, database, schema):
+    """Primary key columns of every table in a schema, in key order, from one SHOW PRIMARY KEYS"""
+    try:
+        rows = session.sql(f"SHOW PRIMARY KEYS IN SCHEMA {database}.{schema}").collect()
+    except:
+        return {}
+
+    keys = {}
+    for row in sorted(rows, key=lambda r: (r['table_name'], r['key_sequence'])):
+        keys.setdefault(row['table_name'], []).append(row['column_name'])
+    return keys
+
+def build_keyed_encryption_query(original_db, encrypted_db, schema, table_name, key_columns, columns, sample=""):
+    """Build one query joining original and encrypted rows on the table key.
+
+    For column i it returns COMPARED_i (rows non-null on both sides) and EQUAL_i
+    (rows whose value is unchanged), so every classified column of the table is
+    checked in a single statement. A sample clause applies to the original side;
+    the join then picks the same rows from the encrypted copy.
+    """
+    join_condition = " AND ".join(f"o.{key} = e.{key}" for key in key_columns)
+    column_counts = ",\n               ".join(
+        f"COUNT_IF(o.{column} IS NOT NULL AND e.{column} IS NOT NULL) AS COMPARED_{i},\n               "
+        f"COUNT_IF(o.{column}::VARCHAR = e.{column}::VARCHAR) AS EQUAL_{i}"
+        for i, column in enumerate(columns)
+    )
+    return f"""
+        SELECT COUNT(*) AS MATCHED_ROWS,
+               {column_counts}
+        FROM {original_db}.{schema}.{table_name} o {sample}
+        JOIN {encrypted_db}.{schema}.{table_name} e ON {join_condition}
+    """
+
+def keyed_encryption_comparisons(session, original_db, encrypted_db, schema, table_columns, key_columns,
+                                 row_counts=None, sampling_level=DEFAULT_SAMPLING_LEVEL,
+                                 max_concurrency=DEFAULT_MAX_CONCURRENCY, on_progress=_noop, on_compared=_noop):
+    """Compare the classified columns of each keyed table in one statement per table.
+
+    table_columns maps table -> classified columns and key_columns maps table -> key.
+    Tables with a known row count are sampled to the sampling level's size.
+    Returns (table, column) -> (is_encrypted, details, original_count, encrypted_count),
+    the same shape compare_column_data returns; on_compared gets each table's share
+    of it as the table finishes.
+    """
+    row_counts = row_counts or {}
+    queries = {}
+    for table_name, columns in table_columns.items():
+        row_count = row_counts.get(table_name)
+        sample = sample_clause(row_count, sample_size_for(row_count, sampling_level))
+        queries[table_name] = build_keyed_encryption_query(original_db, encrypted_db, schema, table_name,
+                                                           key_columns[table_name], columns, sample)
+
+    comparisons = {}
+    for done, (table_name, rows, error) in enumerate(execute_async_queries(session, queries, max_concurrency), 1):
+        on_progress(done / len(queries))
+        for i, column_name in enumerate(table_columns[table_name]):
+            if error is not None:
+                comparisons[(table_name, column_name)] = (False, f"Error comparing data: {str(error)}", 0, 0)
+                continue
+
+            counts = rows[0]
+            compared, equal = counts[f'COMPARED_{i}'], counts[f'EQUAL_{i}']
+            details = f"Joined {counts['MATCHED_ROWS']} rows on {', '.join(key_columns[table_name])}, " \
+                      f"{compared - equal} different, {equal} unchanged"
+            if not compared:
+                comparisons[(table_name, column_name)] = (False, "No matching non-null rows to compare", 0, 0)
+            else:
+                comparisons[(table_name, column_name)] = (equal == 0, details, compared, compared)
+        on_compared({(table_name, c): comparisons[(table_name, c)] for c in table_columns[table_name]})
+    return comparisons
+
+def build_column_fingerprint_query(database, schema, table_name, columns):
+    """Build one query returning ROW_COUNT and an order-independent HASH_AGG_i for every column i of a table"""
+    column_hashes = ",\n               ".join(f"HASH_AGG({column}) AS HASH_{i}" for i, column in enumerate(columns))
+    return f"""
+        SELECT COUNT(*) AS ROW_COUNT,
+               {column_hashes}
+        FROM {database}.{schema}.{table_name}
+    """
+
+def fingerprint_column_comparisons(session, original_db, encrypted_db, schema, table_columns,
+                                   max_concurrency=DEFAULT_MAX_CONCURRENCY, on_progress=_noop, on_compared=_noop):
+    """Compare full-column HASH_AGG fingerprints of the original and encrypted copy of each table.
+
+    Two statements per table, one per side. Returns (table, column) -> (is_different,
+    details, original_count, encrypted_count), the same shape compare_column_data returns;
+    on_compared gets each table's share of it once both sides are in.
+    """
+    queries = {}
+    for table_name, columns in table_columns.items():
+        queries[(table_name, "ORIGINAL")] = build_column_fingerprint_query(original_db, schema, table_name, columns)
+        queries[(table_name, "ENCRYPTED")] = build_column_fingerprint_query(encrypted_db, schema, table_name, columns)
+
+    fingerprints = {}
+    comparisons = {}
+    for done, (query_key, rows, error) in enumerate(execute_async_queries(session, queries, max_concurrency), 1):
+        on_progress(done / len(queries))
+        fingerprints[query_key] = error if error is not None else rows[0]
+
+        table_name = query_key[0]
+        if (table_name, "ORIGINAL") not in fingerprints or (table_name, "ENCRYPTED") not in fingerprints:
+            continue
+        original, encrypted = fingerprints[(table_name, "ORIGINAL")], fingerprints[(table_name, "ENCRYPTED")]
+        for i, column_name in enumerate(table_columns[table_name]):
+            if isinstance(original, Exception) or isinstance(encrypted, Exception):
+                error = original if isinstance(original, Exception) else encrypted
+                comparisons[(table_name, column_name)] = (True, f"Error comparing data: {str(error)}", 0, 0)
+                continue
+
+            original_count, encrypted_count = original['ROW_COUNT'], encrypted['ROW_COUNT']
+            matches = original[f'HASH_{i}'] == encrypted[f'HASH_{i}'] and original_count == encrypted_count
+            details = f"Full-column fingerprint {'matches' if matches else 'differs'} " \
+                      f"({original_count} original rows, {encrypted_count} encrypted rows)"
+            comparisons[(table_name, column_name)] = (not matches, details, original_count, encrypted_count)
+        on_compared({(table_name, c): comparisons[(table_name, c)] for c in table_columns[table_name]})
+    return comparisons
+
+def build_ciphertext_profile_query(original_db, encrypted_db, schema, table_name, columns, sample=""):
+    """Build one query profiling each column of the original table and its encrypted copy.
+
+    Per column i and side (O_ original, E_ encrypted) it returns the non-null and
+    approximate distinct counts, the length range and average, and the share of
+    characters in each PROFILE_CHARACTER_CLASSES class. E_PLAIN_LEN_i is the share of
+    encrypted values whose length still falls inside the original length range.
+    Only aggregates leave Snowflake.
+    """
+    def column_profile(prefix, i, column):
+        text = f"{column}::VARCHAR"
+        class_shares = ",\n                   ".join(
+            f"SUM(LENGTH(REGEXP_REPLACE({text}, '[^{chars}]', ''))) / NULLIF(SUM(LENGTH({text})), 0) AS {prefix}_{name}_{i}"
+            for name, (chars, _) in PROFILE_CHARACTER_CLASSES.items()
+        )
+        return f"""COUNT({column}) AS {prefix}_NONNULL_{i},
+                   APPROX_COUNT_DISTINCT({column}) AS {prefix}_DISTINCT_{i},
+                   MIN(LENGTH({text})) AS {prefix}_MIN_LEN_{i},
+                   MAX(LENGTH({text})) AS {prefix}_MAX_LEN_{i},
+                   AVG(LENGTH({text})) AS {prefix}_AVG_LEN_{i},
+                   {class_shares}"""
+
+    original_profile = ",\n                   ".join(column_profile("O", i, column) for i, column in enumerate(columns))
+    encrypted_profile = ",\n                   ".join(column_profile("E", i, f"x.{column}") for i, column in enumerate(columns))
+    plain_length_shares = ",\n                   ".join(
+        f"COUNT_IF(LENGTH(x.{column}::VARCHAR) BETWEEN o.O_MIN_LEN_{i} AND o.O_MAX_LEN_{i}) "
+        f"/ NULLIF(COUNT(x.{column}), 0) AS E_PLAIN_LEN_{i}"
+        for i, column in enumerate(columns)
+    )
+    return f"""
+        WITH o AS (
+            SELECT {original_profile}
+            FROM {original_db}.{schema}.{table_name} {sample}
+        ),
+        e AS (
+            SELECT {encrypted_profile},
+                   {plain_length_shares}
+            FROM {encrypted_db}.{schema}.{table_name} x {sample}, o
+        )
+        SELECT * FROM o, e
+    """
+
+def profile_entropy(profile, prefix, i):
+    """Approximate bits per character from the character class shares, assuming uniform use within a class"""
+    shares = [(float(profile[f'{prefix}_{name}_{i}'] or 0), size) for name, (_, size) in PROFILE_CHARACTER_CLASSES.items()]
+    shares.append((max(0.0, 1 - sum(share for share, _ in shares)), PROFILE_OTHER_CLASS_SIZE))
+    return -sum(share * math.log2(share / size) for share, size in shares if share > 0)
+
+def evaluate_ciphertext_profile(profile, i):
+    """Return (is_encrypted, details) for column i of a build_ciphertext_profile_query row"""
+    original_count, encrypted_count = profile[f'O_NONNULL_{i}'], profile[f'E_NONNULL_{i}']
+    if not original_count or not encrypted_count:
+        return False, "No data found in one or both databases"
+
+    original_length, encrypted_length = float(profile[f'O_AVG_LEN_{i}']), float(profile[f'E_AVG_LEN_{i}'])
+    original_entropy, encrypted_entropy = profile_entropy(profile, "O", i), profile_entropy(profile, "E", i)
+    original_distinct = profile[f'O_DISTINCT_{i}'] / original_count
+    encrypted_distinct = profile[f'E_DISTINCT_{i}'] / encrypted_count
+    class_shift = max(
+        abs(float(profile[f'O_{name}_{i}'] or 0) - float(profile[f'E_{name}_{i}'] or 0))
+        for name in PROFILE_CHARACTER_CLASSES
+    )
+    plain_length_share = float(profile[f'E_PLAIN_LEN_{i}'] or 0)
+
+    details = f"Avg length {original_length:.1f} -> {encrypted_length:.1f}, " \
+              f"entropy {original_entropy:.2f} -> {encrypted_entropy:.2f} bits/char, " \
+              f"distinct ratio {original_distinct:.2f} -> {encrypted_distinct:.2f}, " \
+              f"plaintext-length share {plain_length_share:.0%}"
+
+    if (abs(encrypted_length - original_length) < PROFILE_MIN_LENGTH_SHIFT
+            and class_shift < PROFILE_MIN_CLASS_SHIFT
+            and abs(encrypted_entropy - original_entropy) < PROFILE_MIN_ENTROPY_SHIFT):
+        return False, f"Profile unchanged - {details}"
+    if encrypted_distinct < original_distinct * PROFILE_MIN_DISTINCT_KEPT:
+        return False, f"Distinct values collapsed - {details}"
+    if 0 < plain_length_share <= PROFILE_PARTIAL_SHARE:
+        return False, f"Possibly partially encrypted - {details}"
+    return True, f"Profile changed - {details}"
+
+def profile_encryption_comparisons(session, original_db, encrypted_db, schema, table_columns,
+                                   row_counts=None, sampling_level=DEFAULT_SAMPLING_LEVEL,
+                                   max_concurrency=DEFAULT_MAX_CONCURRENCY, on_progress=_noop, on_compared=_noop):
+    """Profile the classified columns of each table in one statement per table.
+
+    Returns (table, column) -> (is_encrypted, details, original_count, encrypted_count),
+    the same shape compare_column_data returns; on_compared gets each table's share
+    of it as the table finishes.
+    """
+    row_counts = row_counts or {}
+    queries = {}
+    for table_name, columns in table_columns.items():
+        row_count = row_counts.get(table_name)
+        sample = sample_clause(row_count, sample_size_for(row_count, sampling_level))
+        queries[table_name] = build_ciphertext_profile_query(original_db, encrypted_db, schema, table_name, columns, sample)
+
+    comparisons = {}
+    for done, (table_name, rows, error) in enumerate(execute_async_queries(session, queries, max_concurrency), 1):
+        on_progress(done / len(queries))
+        for i, column_name in enumerate(table_columns[table_name]):
+            if error is not None:
+                comparisons[(table_name, column_name)] = (False, f"Error comparing data: {str(error)}", 0, 0)
+                continue
+
+            is_encrypted, details = evaluate_ciphertext_profile(rows[0], i)
+            comparisons[(table_name, column_name)] = (is_encrypted, details,
+                                                      rows[0][f'O_NONNULL_{i}'], rows[0][f'E_NONNULL_{i}'])
+        on_compared({(table_name, c): comparisons[(table_name, c)] for c in table_columns[table_name]})
+    return comparisons
+
+def encryption_validation_rows(session, env, selected_database, selected_schema, classification_owner,
+                               compare_mode="SAMPLE", sampling_level=DEFAULT_SAMPLING_LEVEL, on_progress=_noop,
+                               on_row=_noop):
+    """Compare actual data between original and encrypted databases for classified columns.
+
+    on_row receives each column's row as soon as its comparison is done.
+    """
+    # Get encrypted database name
+    encrypt_database = f"{selected_database}_ENCRYPT"
+
+    # Get tables and columns from classification
+    classification_data = get_tables_and_columns_from_classification(session, env, selected_database, selected_schema, classification_owner)
+
+    # One column inventory per database answers every existence check
+    original_columns = fetch_column_index(session, selected_database, selected_schema)
+    encrypted_columns = fetch_column_index(session, encrypt_database, selected_schema)
+    row_counts = fetch_table_row_counts(session, selected_database, selected_schema)
+
+    # Rows are matched on the primary key, unless the key is itself encrypted
+    primary_keys = fetch_primary_keys(session, selected_database, selected_schema)
+    classified = set(classification_data)
+    clear_keys = {table_name: key for table_name, key in primary_keys.items()
+                  if not any((table_name, key_column) in classified for key_column in key)}
+
+    def column_row(table_name, column_name, comparison=None):
+        # Check if table and column exist in both databases
+        original_exists = (table_name, column_name) in original_columns
+        encrypted_exists = (table_name, column_name) in encrypted_columns
+
+        if not original_exists or not encrypted_exists:
+            test_case = "FAILURE"
+            details = f"Column missing - Original: {'Yes' if original_exists else 'No'}, Encrypted: {'Yes' if encrypted_exists else 'No'}"
+            original_count = encrypted_count = 0
+        else:
+            # Compare actual data
+            if comparison is None:
+                row_count = row_counts.get(table_name)
+                comparison = compare_column_data(
+                    session, selected_database, encrypt_database, selected_schema, table_name, column_name,
+                    sample_size_for(row_count, sampling_level), row_count, clear_keys.get(table_name),
+                    expect_encrypted=True
+                )
+            is_encrypted, comparison_details, original_count, encrypted_count = comparison
+
+            if is_encrypted:
+                test_case = "SUCCESS"
+                details = f"Data encrypted successfully - {comparison_details}"
+            else:
+                test_case = "FAILURE"
+                details = f"Data not encrypted or identical - {comparison_details}"
+
+        return {
+            "Environment": env,
+            "Original Database": selected_database,
+            "Encrypted Database": encrypt_database,
+            "Schema": selected_schema,
+            "Table": table_name,
+            "Column": column_name,
+            "Classification Owner": classification_owner,
+            "Original Count": original_count,
+            "Encrypted Count": encrypted_count,
+            "Original Exists": "Yes" if original_exists else "No",
+            "Encrypted Exists": "Yes" if encrypted_exists else "No",
+            "Test Case": test_case,
+            "Details": details
+        }
+
+    results = {}
+
+    def emit_compared(table_comparisons):
+        for (table_name, column_name), comparison in table_comparisons.items():
+            results[(table_name, column_name)] = column_row(table_name, column_name, comparison)
+            on_row(results[(table_name, column_name)])
+
+    # Keyed join: all classified columns of a table in one statement. Tables without
+    # a primary key, or whose key is itself encrypted, fall back to sampling.
+    if compare_mode == "KEYED JOIN":
+        table_columns = {}
+        for table_name, column_name in classification_data:
+            if (table_name in clear_keys and (table_name, column_name) in original_columns
+                    and (table_name, column_name) in encrypted_columns):
+                table_columns.setdefault(table_name, []).append(column_name)
+        keyed_encryption_comparisons(session, selected_database, encrypt_database, selected_schema,
+                                     table_columns, primary_keys, row_counts, sampling_level,
+                                     on_progress=on_progress, on_compared=emit_compared)
+
+    # Profile: aggregates over each side only, one statement per table and no values leave Snowflake
+    elif compare_mode == "PROFILE":
+        table_columns = {}
+        for table_name, column_name in classification_data:
+            if (table_name, column_name) in original_columns and (table_name, column_name) in encrypted_columns:
+                table_columns.setdefault(table_name, []).append(column_name)
+        profile_encryption_comparisons(session, selected_database, encrypt_database, selected_schema,
+                                       table_columns, row_counts, sampling_level,
+                                       on_progress=on_progress, on_compared=emit_compared)
+
+    # Everything not compared in bulk is sampled column by column
+    for idx, (table_name, column_name) in enumerate(classification_data):
+        on_progress((idx + 1) / len(classification_data))
+        if (table_name, column_name) not in results:
+            results[(table_name, column_name)] = column_row(table_name, column_name)
+            on_row(results[(table_name, column_name)])
+    return [results[(table_name, column_name)] for table_name, column_name in classification_data]
+
+def non_encryption_validation_rows(session, env, selected_database, selected_schema, classification_owner,
+                                   compare_mode="SAMPLE", sampling_level=DEFAULT_SAMPLING_LEVEL, on_progress=_noop,
+                                   on_row=_noop):
+    """Check that columns NOT in classification details are unchanged in the encrypted database.
+
+    on_row receives each column's row as soon as its comparison is done.
+    """
+    # Get encrypted database name
+    encrypt_database = f"{selected_database}_ENCRYPT"
+
+    # Get all columns in the schema
+    all_columns_query = f"""
+        SELECT DISTINCT TABLE_NAME, COLUMN_NAME
+        FROM {selected_database}.INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = '{selected_schema}'
+        AND TABLE_NAME NOT LIKE 'RAW_%'
+        AND TABLE_NAME NOT LIKE 'VW_%'
+        AND COLUMN_NAME NOT LIKE 'ROW_%'
+        ORDER BY TABLE_NAME, COLUMN_NAME
+    """
+
+    all_columns_result = session.sql(all_columns_query).collect()
+    all_columns = [(row['TABLE_NAME'], row['COLUMN_NAME']) for row in all_columns_result]
+
+    # Get classified columns (these should be encrypted)
+    classified_columns = set(get_tables_and_columns_from_classification(
+        session, env, selected_database, selected_schema, classification_owner))
+
+    # Get non-classified columns (these should NOT be encrypted)
+    non_classified_columns = [col for col in all_columns if col not in classified_columns]
+
+    # One column inventory per database answers every existence check
+    original_columns = fetch_column_index(session, selected_database, selected_schema)
+    encrypted_columns = fetch_column_index(session, encrypt_database, selected_schema)
+    row_counts = fetch_table_row_counts(session, selected_database, selected_schema)
+
+    # Rows are matched on the primary key, unless the key is itself encrypted
+    primary_keys = fetch_primary_keys(session, selected_database, selected_schema)
+    clear_keys = {table_name: key for table_name, key in primary_keys.items()
+                  if not any((table_name, key_column) in classified_columns for key_column in key)}
+
+    def column_row(table_name, column_name, comparison=None):
+        # Check if table and column exist in both databases
+        original_exists = (table_name, column_name) in original_columns
+        encrypted_exists = (table_name, column_name) in encrypted_columns
+
+        if not original_exists or not encrypted_exists:
+            test_case = "FAILURE"
+            details = f"Column missing - Original: {'Yes' if original_exists else 'No'}, Encrypted: {'Yes' if encrypted_exists else 'No'}"
+            original_count = encrypted_count = 0
+        else:
+            # Compare actual data - for non-encrypted columns, data should be identical
+            if comparison is None:
+                row_count = row_counts.get(table_name)
+                comparison = compare_column_data(
+                    session, selected_database, encrypt_database, selected_schema, table_name, column_name,
+                    sample_size_for(row_count, sampling_level), row_count, clear_keys.get(table_name)
+                )
+            is_different, comparison_details, original_count, encrypted_count = comparison
+
+            if not is_different:
+                test_case = "SUCCESS"
+                details = f"Data identical (not encrypted) - {comparison_details}"
+            else:
+                test_case = "FAILURE"
+                details = f"Data unexpectedly different - {comparison_details}"
+
+        return {
+            "Environment": env,
+            "Original Database": selected_database,
+            "Encrypted Database": encrypt_database,
+            "Schema": selected_schema,
+            "Table": table_name,
+            "Column": column_name,
+            "Classification": "Not Required",
+            "Original Count": original_count,
+            "Encrypted Count": encrypted_count,
+            "Original Exists": "Yes" if original_exists else "No",
+            "Encrypted Exists": "Yes" if encrypted_exists else "No",
+            "Test Case": test_case,
+            "Details": details
+        }
+
+    results = {}
+
+    def emit_compared(table_comparisons):
+        for (table_name, column_name), comparison in table_comparisons.items():
+            results[(table_name, column_name)] = column_row(table_name, column_name, comparison)
+            on_row(results[(table_name, column_name)])
+
+    # Fingerprint: every column present on both sides is hashed in full, two statements per table
+    if compare_mode == "FINGERPRINT":
+        table_columns = {}
+        for table_name, column_name in non_classified_columns:
+            if (table_name, column_name) in original_columns and (table_name, column_name) in encrypted_columns:
+                table_columns.setdefault(table_name, []).append(column_name)
+        fingerprint_column_comparisons(session, selected_database, encrypt_database, selected_schema,
+                                       table_columns, on_progress=on_progress, on_compared=emit_compared)
+
+    # Everything not compared in bulk is sampled column by column
+    for idx, (table_name, column_name) in enumerate(non_classified_columns):
+        on_progress((idx + 1) / len(non_classified_columns))
+        if (table_name, column_name) not in results:
+            results[(table_name, column_name)] = column_row(table_name, column_name)
+            on_row(results[(table_name, column_name)])
+    return [results[(table_name, column_name)] for table_name, column_name in non_classified_columns]
+
+# ---------------------------------------------------------------------------
+# Stored procedure
+# ---------------------------------------------------------------------------
+
+def run_validation_rule(session, rule, params):
+    """Run one validation rule end to end and return its result rows.
+
+    params holds the control panel selections: environment, database, databases, schema,
+    load_group, load_type, source_db_type, classification_owner, compare_mode, cdc_since,
+    sampling_level, include_names, name_limit, name_offset, data_set_index,
+    tag_provider, tag_references and max_concurrency, as needed by the rule.
+    """
+    if rule == "COUNT VALIDATION":
+        return count_validation_rows(session, params["load_group"], params["load_type"],
+                                     params["source_db_type"], params["environment"])
+
+    if rule in ("DATA VALIDATION", "DUPLICATE VALIDATION", "ALL INGESTION RULES"):
+        tables = fetch_validation_tables(session, params["environment"], params["database"], params["schema"],
+                                         params["load_group"], params["load_type"])
+        max_concurrency = int(params.get("max_concurrency", DEFAULT_MAX_CONCURRENCY))
+        if rule == "DATA VALIDATION":
+            cdc_since = {(schema_name, table_name): since for schema_name, table_name, since in params.get("cdc_since", [])}
+            return data_validation_rows(session, tables, params["database"], params["load_type"], params["load_group"],
+                                        params["environment"], max_concurrency,
+                                        params.get("compare_mode", "MINUS DIFF"), cdc_since)
+        if rule == "DUPLICATE VALIDATION":
+            return duplicate_validation_rows(session, tables, params["database"], params["load_type"],
+                                             params["load_group"], params["environment"])
+        return ingestion_suite_rows(session, tables, params["database"], params["load_type"], params["load_group"],
+                                    params["environment"], params["source_db_type"], max_concurrency, params["schema"])
+
+    if rule == "MASKING VALIDATION":
+        return masking_validation_rows(session, params["environment"], params["database"], params["schema"],
+                                       params["classification_owner"], bool(params.get("include_names", False)),
+                                       int(params.get("name_limit", MASKING_NAME_LIMIT)), int(params.get("name_offset", 0)),
+                                       params.get("data_set_index"), params.get("tag_provider", "ACCOUNT USAGE"),
+                                       params.get("tag_references"))
+    if rule == "MASKING SWEEP":
+        return masking_sweep_rows(session, params["environment"], params["databases"], params["classification_owner"],
+                                  bool(params.get("include_names", False)), int(params.get("name_limit", MASKING_NAME_LIMIT)),
+                                  int(params.get("name_offset", 0)), params.get("data_set_index"),
+                                  params.get("tag_provider", "ACCOUNT USAGE"), params.get("tag_references"),
+                                  int(params.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)))
+    if rule == "MASKED CONTENT":
+        return masked_content_rows(session, params["environment"], params["database"], params["schema"],
+                                   params["classification_owner"], params.get("sampling_level", DEFAULT_SAMPLING_LEVEL),
+                                   int(params.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)))
+    if rule == "ENCRYPTED COLUMNS":
+        return encryption_validation_rows(session, params["environment"], params["database"], params["schema"],
+                                          params["classification_owner"], params.get("compare_mode", "SAMPLE"),
+                                          params.get("sampling_level", DEFAULT_SAMPLING_LEVEL))
+    if rule == "NON-ENCRYPTED COLUMNS":
+        return non_encryption_validation_rows(session, params["environment"], params["database"], params["schema"],
+                                              params["classification_owner"], params.get("compare_mode", "SAMPLE"),
+                                              params.get("sampling_level", DEFAULT_SAMPLING_LEVEL))
+
+    raise ValueError(f"Unknown validation rule: {rule}")
+
+def run_validation_procedure(session, rule, params):
+    """ZDQ_RUN_VALIDATION handler: run a whole validation inside Snowflake and return one result table"""
+    results_df = pd.DataFrame(run_validation_rule(session, rule, params or {}))
+    if results_df.empty:
+        return session.create_dataframe([], schema=StructType([StructField("Test Case", StringType())]))
+
+    # Error messages share columns with counts; keep mixed columns as text and nulls as nulls
+    for col in results_df.select_dtypes(include="object").columns:
+        results_df[col] = pd.Series([str(value) if present else None
+                                     for value, present in zip(results_df[col], results_df[col].notna())],
+                                    index=results_df.index, dtype=object)
+    return session.create_dataframe(results_df)
+
+def register_validation_procedure(session, stage_location=None):
+    """Register ZDQ_RUN_VALIDATION with this module as its only import.
+
+    Without a stage_location the procedure is temporary and lives as long as the session.
+    """
+    session.sproc.register(
+        run_validation_procedure,
+        name=VALIDATION_PROCEDURE_NAME,
+        return_type=StructType(),
+        input_types=[StringType(), VariantType()],
+        packages=["snowflake-snowpark-python", "pandas"],
+        imports=[os.path.abspath(__file__)],
+        is_permanent=stage_location is not None,
+        stage_location=stage_location,
+        replace=True
+    )
+    return VALIDATION_PROCEDURE_NAME
+
+# ---------------------------------------------------------------------------
+# Environment matrix
+# ---------------------------------------------------------------------------
+
+def environment_matrix_rows(sessions, rule, params, environments=None, run_rule=None,
+                            on_progress=_noop, on_warning=_noop):
+    """Run one validation rule in every environment at the same time.
+
+    sessions maps environment -> session and each environment runs on its own
+    thread, so the run takes as long as the slowest environment. The database
+    and databases params are renamed for each environment. run_rule defaults to
+    run_validation_rule; an environment that fails gets one FAILURE row.
+    """
+    environments = environments or list(ENV_DB_MAP)
+    run_rule = run_rule or run_validation_rule
+
+    def environment_params(environment):
+        env_params = dict(params, environment=environment)
+        if params.get("database"):
+            env_params["database"] = to_environment_database(params["database"], environment)
+        if params.get("databases"):
+            env_params["databases"] = [to_environment_database(database, environment) for database in params["databases"]]
+        return env_params
+
+    rows = {}
+    with ThreadPoolExecutor(max_workers=len(environments)) as executor:
+        futures = {
+            executor.submit(run_rule, sessions[environment], rule, environment_params(environment)): environment
+            for environment in environments
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            environment = futures[future]
+            on_progress(done / len(futures))
+            try:
+                rows[environment] = list(future.result())
+            except Exception as e:
+                on_warning(f"⚠️ {rule} failed in {environment}: {e}")
+                rows[environment] = [{"Environment": environment, "Test Case": "FAILURE", "Details": str(e)}]
+    return [row for environment in environments for row in rows[environment]]